@@ -1,17 +1,21 @@
 """مسیرهای API برای عملیات بارنامه مبتنی بر نقشه"""
 
-import math
-from typing import Optional
+import json
+from typing import Iterator, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from app.automation.browser import browser_manager
 from app.automation.reporting import report_service
 from app.automation.traffic_control import waybill_traffic_controller
 from app.core.config import utcms_config
+from app.core.geo import estimate_duration_min, haversine_km, haversine_matrix, haversine_rows, matrix_engine
 from app.core.security import require_sensitive_auth
 from app.schemas.waybill import (
     CargoModel,
+    DistanceMatrixRequest,
     FinancialModel,
     GeoCoordinateModel,
     LocationModel,
@@ -28,7 +32,7 @@ router = APIRouter(prefix="/waybill", tags=["waybill-map"])
 
 @router.post("/create-with-map", dependencies=[Depends(require_sensitive_auth)])
 async def create_waybill_with_map(request: WaybillMapRequest):
-    """ایجاد بارنامه با حالت safe/full."""
+    """ایجاد بارنامه با حالت safe/full یا اعتبارسنجی بدون مرورگر (validate_only)."""
     return await waybill_service.create_waybill_with_map(request)
 
 
@@ -66,21 +70,8 @@ async def get_traffic_status():
 @router.post("/calculate-route")
 async def calculate_route(origin: GeoCoordinateModel, destination: GeoCoordinateModel):
     """محاسبه مسیر بین دو مختصات جغرافیایی."""
-    earth_radius_km = 6371
-
-    lat1 = math.radians(origin.lat)
-    lat2 = math.radians(destination.lat)
-    dlat = math.radians(destination.lat - origin.lat)
-    dlon = math.radians(destination.lng - origin.lng)
-
-    a = (
-        math.sin(dlat / 2) * math.sin(dlat / 2)
-        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) * math.sin(dlon / 2)
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = earth_radius_km * c
-
-    duration_min = (distance / 60) * 60
+    distance = haversine_km(origin.lat, origin.lng, destination.lat, destination.lng)
+    duration_min = estimate_duration_min(distance)
 
     return {
         "distance_km": round(distance, 2),
@@ -91,6 +82,59 @@ async def calculate_route(origin: GeoCoordinateModel, destination: GeoCoordinate
     }
 
 
+def _matrix_ndjson(origins, destinations) -> Iterator[bytes]:
+    for index, row in enumerate(haversine_rows(origins, destinations)):
+        line = {"row": index, "distances_km": [round(value, 3) for value in row]}
+        yield (json.dumps(line, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+@router.post("/distance-matrix", dependencies=[Depends(require_sensitive_auth)])
+async def distance_matrix(request: DistanceMatrixRequest):
+    """ماتریس فاصله هاورسین بین همه مبداها و مقصدها (کیلومتر)."""
+    max_points = utcms_config.DISTANCE_MATRIX_MAX_POINTS
+    if len(request.origins) > max_points or len(request.destinations) > max_points:
+        raise HTTPException(
+            status_code=422,
+            detail=f"حداکثر {max_points} نقطه برای مبدا و مقصد مجاز است",
+        )
+
+    origins = [(point.lat, point.lng) for point in request.origins]
+    destinations = [(point.lat, point.lng) for point in request.destinations]
+    cells = len(origins) * len(destinations)
+
+    threshold = utcms_config.DISTANCE_MATRIX_STREAM_THRESHOLD
+    if request.stream is False and cells > threshold:
+        # Building the full matrix in memory is only allowed below the streaming threshold.
+        raise HTTPException(
+            status_code=413,
+            detail=f"ماتریس بیش از {threshold} خانه فقط به صورت stream ارسال می‌شود",
+        )
+
+    stream = request.stream
+    if stream is None:
+        stream = cells > threshold
+    if stream:
+        # Rows are computed lazily in the threadpool while the response is written.
+        return StreamingResponse(
+            _matrix_ndjson(origins, destinations),
+            media_type="application/x-ndjson",
+            headers={
+                "X-Matrix-Rows": str(len(origins)),
+                "X-Matrix-Cols": str(len(destinations)),
+                "X-Matrix-Engine": matrix_engine(),
+            },
+        )
+
+    matrix = await run_in_threadpool(haversine_matrix, origins, destinations)
+    return {
+        "rows": len(origins),
+        "cols": len(destinations),
+        "distances_km": [[round(value, 3) for value in row] for row in matrix],
+        "method": "haversine",
+        "engine": matrix_engine(),
+    }
+
+
 __all__ = [
     "GeoCoordinateModel",
     "LocationModel",
@@ -3,18 +3,53 @@ import base64
 import inspect
 import logging
 import random
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
 
 from playwright.async_api import BrowserContext, Page
 
-from app.automation.captcha import get_captcha_provider
+from app.automation.captcha import captcha_stats, get_captcha_provider
+from app.automation.captcha.base import CaptchaProvider, CaptchaResult
+from app.automation.login_probe import login_url_probe
+from app.automation.page_probe import first_match, probe_selectors
 from app.automation.selectors import AuthSelectors
 from app.core.config import utcms_config
 from app.core.network import is_retryable_network_error
+from app.core.text import normalize_persian
 from app.core.utils import resolve_maybe_awaitable
 
 logger = logging.getLogger(__name__)
 
+AUTH_COOKIE_KEYWORDS = (
+    "auth",
+    "session",
+    "sessionid",
+    "aspxauth",
+    "identity",
+    "aspnet.applicationcookie",
+    "aspnetcore.identity",
+    "jwt",
+)
+
+
+def is_auth_cookie(cookie: dict) -> bool:
+    name = str(cookie.get("name", "")).lower()
+    return any(keyword in name for keyword in AUTH_COOKIE_KEYWORDS)
+
+
+def auth_cookie_expiry(cookies: Iterable[dict]) -> Optional[float]:
+    """Earliest expiry (epoch seconds) among auth cookies; None for session-only cookies."""
+    expiries = []
+    for cookie in cookies:
+        if not is_auth_cookie(cookie):
+            continue
+        try:
+            expires = float(cookie.get("expires", -1))
+        except (TypeError, ValueError):
+            continue
+        if expires > 0:
+            expiries.append(expires)
+    return min(expiries) if expiries else None
+
 
 class UTCMSAuthenticator:
     """Handles authentication for UTCMS."""
@@ -23,6 +58,8 @@ class UTCMSAuthenticator:
         self.page = page
         self.context = context
         self.last_error: Optional[str] = None
+        # Provider and result whose answer was typed into the captcha field of the current attempt.
+        self._captcha_attempt: Optional[Tuple[CaptchaProvider, CaptchaResult]] = None
 
     async def _current_url(self) -> str:
         raw_url = getattr(self.page, "url", "")
@@ -85,17 +122,7 @@ class UTCMSAuthenticator:
         visible: bool = False,
         timeout: int = 1000,
     ) -> Optional[str]:
-        for selector in selectors:
-            try:
-                if visible:
-                    element = await self.page.wait_for_selector(selector, state="visible", timeout=timeout)
-                else:
-                    element = await self.page.query_selector(selector)
-                if element:
-                    return selector
-            except Exception:
-                continue
-        return None
+        return await first_match(self.page, selectors, visible=visible, timeout_ms=timeout if visible else 0)
 
     async def _has_auth_cookie(self) -> bool:
         try:
@@ -103,30 +130,21 @@ class UTCMSAuthenticator:
         except Exception:
             return False
 
-        auth_keywords = (
-            "auth",
-            "session",
-            "sessionid",
-            "aspxauth",
-            "identity",
-            "aspnet.applicationcookie",
-            "aspnetcore.identity",
-            "jwt",
-        )
-        for cookie in cookies:
-            name = str(cookie.get("name", "")).lower()
-            if any(keyword in name for keyword in auth_keywords):
-                return True
-        return False
+        return any(is_auth_cookie(cookie) for cookie in cookies)
 
     async def _looks_like_login_page(self) -> bool:
         if self._is_login_url(await self._current_url()):
             return True
 
-        username_selector = await self._find_selector(AuthSelectors.USERNAME_SELECTORS)
-        password_selector = await self._find_selector(AuthSelectors.PASSWORD_SELECTORS)
-        submit_selector = await self._find_selector(AuthSelectors.SUBMIT_SELECTORS)
-        return bool(username_selector and password_selector and submit_selector)
+        found = await probe_selectors(
+            self.page,
+            {
+                "username": AuthSelectors.USERNAME_SELECTORS,
+                "password": AuthSelectors.PASSWORD_SELECTORS,
+                "submit": AuthSelectors.SUBMIT_SELECTORS,
+            },
+        )
+        return all(found.values())
 
     async def _is_logged_in(self) -> bool:
         self.last_error = None
@@ -142,12 +160,8 @@ class UTCMSAuthenticator:
         if await self._find_selector(AuthSelectors.LOGOUT_SELECTORS, visible=True, timeout=500):
             return True
 
-        for selector in AuthSelectors.WAYBILL_FORM_MARKERS:
-            try:
-                if await self.page.query_selector(selector):
-                    return True
-            except Exception:
-                continue
+        if await first_match(self.page, AuthSelectors.WAYBILL_FORM_MARKERS):
+            return True
 
         if await self._looks_like_login_page():
             return False
@@ -258,6 +272,7 @@ class UTCMSAuthenticator:
 
         result = await provider.solve_text_captcha(image_base64)
         if result.solved and result.value:
+            self._captcha_attempt = (provider, result)
             return result.value
 
         logger.warning(
@@ -266,6 +281,39 @@ class UTCMSAuthenticator:
         )
         return None
 
+    def _is_captcha_error(self, message: Optional[str]) -> bool:
+        text = normalize_persian(message or "")
+        return any(normalize_persian(marker) in text for marker in AuthSelectors.CAPTCHA_ERROR_MARKERS)
+
+    async def _record_captcha_outcome(self, logged_in: bool) -> None:
+        """
+        Feed the login result back to the captcha stats and provider.
+
+        A successful login means the answer was accepted. A failed login only counts
+        against the provider when UTCMS says the captcha was wrong; other failures
+        (credentials, network) say nothing about the solve.
+        """
+        if self._captcha_attempt is None:
+            return
+        provider, result = self._captcha_attempt
+        self._captcha_attempt = None
+
+        if logged_in:
+            captcha_stats.record_outcome(result.provider, accepted=True)
+            return
+        if not self._is_captcha_error(self.last_error):
+            return
+
+        captcha_stats.record_outcome(result.provider, accepted=False)
+        logger.warning(
+            "captcha_answer_rejected",
+            extra={"extra_fields": {"provider": result.provider, "task_id": result.task_id}},
+        )
+        try:
+            await provider.report(result, accepted=False)
+        except Exception as exc:
+            logger.warning("captcha_report_failed", extra={"extra_fields": {"error": str(exc)}})
+
     def _captcha_mode(self) -> str:
         mode = (utcms_config.CAPTCHA_MODE or "").strip().lower()
         if mode in ("provider_first", "manual_only", "provider_only"):
@@ -382,13 +430,32 @@ class UTCMSAuthenticator:
             self.last_error = await self._extract_login_error() or "لاگین ناموفق بود؛ صفحه در وضعیت ورود باقی ماند."
         return False
 
+    async def _probe_login_url(self, candidates: list[str]) -> Optional[str]:
+        return await login_url_probe.resolve(candidates)
+
+    async def _login_urls(self) -> list[str]:
+        """Candidate login URLs, with the HTTP-probed working one (if any) first."""
+        candidates = self._candidate_login_urls()
+        if not utcms_config.LOGIN_URL_PROBE:
+            return candidates
+        known_url = await self._probe_login_url(candidates)
+        if not known_url:
+            return candidates
+        return [known_url] + [candidate for candidate in candidates if candidate != known_url]
+
     async def login(self, username: str, password: str) -> bool:
         self.last_error = None
-        for login_url in self._candidate_login_urls():
+        failure: Optional[str] = None
+        for login_url in await self._login_urls():
+            # Each candidate starts clean so an earlier captcha error cannot be read as
+            # this submit's outcome (and trigger a false reportbad); the last reason is kept.
+            failure = self.last_error or failure
+            self.last_error = None
             try:
                 await self._goto_with_retry(login_url, wait_until="domcontentloaded")
                 await asyncio.sleep(1.0)
             except Exception:
+                login_url_probe.forget(login_url)
                 continue
 
             username_selector = await self._find_selector(AuthSelectors.USERNAME_SELECTORS, visible=True, timeout=4000)
@@ -396,18 +463,23 @@ class UTCMSAuthenticator:
             submit_selector = await self._find_selector(AuthSelectors.SUBMIT_SELECTORS, visible=True, timeout=4000)
 
             if not (username_selector and password_selector and submit_selector):
+                login_url_probe.forget(login_url)
                 continue
 
             if not await self._fill_credentials(username_selector, password_selector, username, password):
                 continue
 
             captcha_selector = await self._find_selector(AuthSelectors.CAPTCHA_SELECTORS)
+            self._captcha_attempt = None
             if captcha_selector and not await self._handle_captcha(captcha_selector):
                 return False
 
-            if await self._submit_login(submit_selector):
+            submitted = await self._submit_login(submit_selector)
+            await self._record_captcha_outcome(submitted)
+            if submitted:
                 return True
 
+        self.last_error = self.last_error or failure
         if not self.last_error:
             self.last_error = "فرم ورود معتبر در URLهای شناخته‌شده پیدا نشد. مقدار `LOGIN_URL` را تنظیم کنید."
 
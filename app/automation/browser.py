@@ -1,8 +1,12 @@
 import asyncio
 import logging
 import os
+import time
 import uuid
-from typing import Dict, Optional, Tuple
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from playwright.async_api import Browser, BrowserContext, Page, async_playwright
 
@@ -10,6 +14,114 @@ from app.core.config import utcms_config
 
 logger = logging.getLogger(__name__)
 
+BROWSER_PROCESS_MARKERS = ("chrom", "headless_shell")
+
+
+def browser_process_rss_mb(root_pid: Optional[int] = None) -> float:
+    """Total resident memory of Chromium processes started by this service.
+
+    Walks ``/proc`` for descendants of ``root_pid`` (default: this process) whose
+    command name looks like a Chromium binary. Returns 0.0 where ``/proc`` is missing.
+    """
+    proc = Path("/proc")
+    if not proc.exists():
+        return 0.0
+
+    root_pid = root_pid or os.getpid()
+    parents: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        head, _, tail = stat.rpartition(")")
+        fields = tail.split()
+        if len(fields) < 2:
+            continue
+        pid = int(entry.name)
+        parents[pid] = int(fields[1])
+        names[pid] = head.partition("(")[2].lower()
+
+    def descends_from_root(pid: int) -> bool:
+        seen = set()
+        while pid and pid not in seen:
+            if pid == root_pid:
+                return True
+            seen.add(pid)
+            pid = parents.get(pid, 0)
+        return False
+
+    total_kb = 0
+    for pid, name in names.items():
+        if not any(marker in name for marker in BROWSER_PROCESS_MARKERS):
+            continue
+        if not descends_from_root(pid):
+            continue
+        try:
+            for line in (proc / str(pid) / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+                    break
+        except (OSError, ValueError, IndexError):
+            continue
+    return total_kb / 1024
+
+
+@dataclass
+class ContextSlot:
+    """A pooled browser context hosting up to ``tab_limit`` concurrent pages."""
+
+    session_id: str
+    context: BrowserContext
+    tab_limit: int
+    pages: Set[Page] = field(default_factory=set)
+    reserved: int = 0
+    authenticated: bool = False
+    invalidated: bool = False
+    served: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    auth_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def free_tabs(self) -> int:
+        return self.tab_limit - len(self.pages) - self.reserved
+
+
+@dataclass
+class PageLease:
+    """A page handed out by ``BrowserManager.lease_page``.
+
+    With context pooling disabled ``slot`` is None and the context is private to
+    this lease, so authentication state is never shared.
+    """
+
+    session_id: str
+    context: BrowserContext
+    page: Page
+    slot: Optional[ContextSlot] = None
+    auth_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def __post_init__(self):
+        if self.slot is not None:
+            self.auth_lock = self.slot.auth_lock
+
+    @property
+    def authenticated(self) -> bool:
+        return bool(self.slot and self.slot.authenticated and not self.slot.invalidated)
+
+    def mark_authenticated(self, value: bool = True) -> None:
+        if self.slot is not None:
+            self.slot.authenticated = value
+
+    def invalidate(self) -> None:
+        """Retire the underlying context once its open pages are released."""
+        if self.slot is not None:
+            self.slot.invalidated = True
+            self.slot.authenticated = False
+
 
 class BrowserManager:
     """Manages Playwright browser lifecycle"""
@@ -18,15 +130,38 @@ class BrowserManager:
         self.playwright = None
         self.browser: Optional[Browser] = None
         self._contexts: Dict[str, BrowserContext] = {}
+        self._pool: Dict[str, ContextSlot] = {}
         self._state_lock = asyncio.Lock()
+        self._pool_lock = asyncio.Lock()
+        self._recycle_lock = asyncio.Lock()
+        self._launch_lock = asyncio.Lock()
+        # Recycling bookkeeping: which browser owns each context, and browsers
+        # that are draining (no new contexts) together with their drain start time.
+        self._context_owner: Dict[str, Browser] = {}
+        self._draining: List[Tuple[Browser, float]] = []
+        self._launched_at: Optional[float] = None
+        self._contexts_served = 0
+        self._last_memory_check = 0.0
+        self._last_rss_mb = 0.0
+        self.recycle_count = 0
 
     async def initialize(self):
         """Initialize the browser instance"""
-        if not self.playwright:
-            self.playwright = await async_playwright().start()
+        if self.playwright and self.browser:
+            return
 
-        if not self.browser:
-            self.browser = await self.playwright.chromium.launch(headless=utcms_config.HEADLESS)
+        # Serialised so concurrent callers never launch (and leak) a second Chromium.
+        async with self._launch_lock:
+            if not self.playwright:
+                self.playwright = await async_playwright().start()
+
+            if not self.browser:
+                self._install_browser(await self.playwright.chromium.launch(headless=utcms_config.HEADLESS))
+
+    def _install_browser(self, browser: Browser) -> None:
+        self.browser = browser
+        self._launched_at = time.monotonic()
+        self._contexts_served = 0
 
     async def create_context(self) -> Tuple[str, BrowserContext]:
         """Create a new browser context with a secure session ID"""
@@ -45,6 +180,8 @@ class BrowserManager:
 
         context = await self.browser.new_context(**context_args)
         self._contexts[session_id] = context
+        self._context_owner[session_id] = self.browser
+        self._contexts_served += 1
         return session_id, context
 
     async def save_auth_state(self, context: BrowserContext):
@@ -68,16 +205,275 @@ class BrowserManager:
 
     async def close_context(self, session_id: str):
         """Close a specific browser context"""
-        if session_id in self._contexts:
-            await self._contexts[session_id].close()
-            del self._contexts[session_id]
+        try:
+            if session_id in self._contexts:
+                await self._contexts[session_id].close()
+                del self._contexts[session_id]
+        finally:
+            owner = self._context_owner.pop(session_id, None)
+            if owner is not None and any(browser is owner for browser, _ in self._draining):
+                await self._close_drained_browser(owner)
 
     async def new_page(self, context: BrowserContext) -> Page:
         """Create a new page in the given context"""
         return await context.new_page()
 
+    def _recycle_reason(self) -> Optional[str]:
+        if not self.browser or self._launched_at is None:
+            return None
+
+        max_age = utcms_config.BROWSER_MAX_AGE_SECONDS
+        if max_age > 0 and time.monotonic() - self._launched_at >= max_age:
+            return "age"
+
+        max_contexts = utcms_config.BROWSER_MAX_CONTEXTS
+        if max_contexts > 0 and self._contexts_served >= max_contexts:
+            return "contexts"
+
+        max_rss = utcms_config.BROWSER_MAX_RSS_MB
+        # The RSS figure covers every Chromium under this process, so while a recycled
+        # browser is still draining it would count against its replacement and trigger
+        # back-to-back relaunches; memory is checked again once draining is over.
+        if max_rss > 0 and not self._draining:
+            now = time.monotonic()
+            if now - self._last_memory_check >= utcms_config.BROWSER_MEMORY_CHECK_SECONDS:
+                self._last_memory_check = now
+                self._last_rss_mb = browser_process_rss_mb()
+            if self._last_rss_mb >= max_rss:
+                return "memory"
+
+        return None
+
+    async def maybe_recycle(self) -> bool:
+        """Relaunch the browser when it is too old, too big or has served too much.
+
+        The old browser stops receiving new contexts and is closed once its last
+        context is released, so in-flight waybills are never interrupted.
+        """
+        await self._force_close_stale_drains()
+
+        if self._recycle_reason() is None:
+            return False
+
+        async with self._recycle_lock:
+            reason = self._recycle_reason()
+            if reason is None:
+                return False
+
+            # The replacement is launched before the old browser is retired, so
+            # self.browser is never empty and concurrent initialize() calls stay no-ops.
+            try:
+                async with self._launch_lock:
+                    new_browser = await self.playwright.chromium.launch(headless=utcms_config.HEADLESS)
+            except Exception as exc:
+                logger.warning(
+                    "browser_recycle_launch_failed",
+                    extra={"extra_fields": {"reason": reason, "error": str(exc)}},
+                )
+                return False
+
+            old_browser = self.browser
+            logger.info(
+                "browser_recycle_started",
+                extra={
+                    "extra_fields": {
+                        "reason": reason,
+                        "rss_mb": round(self._last_rss_mb, 1),
+                        "contexts_served": self._contexts_served,
+                        "age_seconds": round(time.monotonic() - (self._launched_at or 0.0), 1),
+                    }
+                },
+            )
+            self._draining.append((old_browser, time.monotonic()))
+            self._install_browser(new_browser)
+            self._last_rss_mb = 0.0
+            self.recycle_count += 1
+
+            async with self._pool_lock:
+                idle_slots = []
+                for slot in list(self._pool.values()):
+                    if self._context_owner.get(slot.session_id) is not old_browser:
+                        continue
+                    slot.invalidated = True
+                    if not slot.pages and slot.reserved == 0:
+                        self._pool.pop(slot.session_id, None)
+                        idle_slots.append(slot)
+
+        for slot in idle_slots:
+            await self._release_slot(slot, None)
+        await self._close_drained_browser(old_browser)
+        return True
+
+    async def _close_drained_browser(self, browser: Browser, force: bool = False) -> None:
+        if not any(item is browser for item, _ in self._draining):
+            return
+        if not force and any(owner is browser for owner in self._context_owner.values()):
+            return
+        self._draining = [(item, started) for item, started in self._draining if item is not browser]
+        if force:
+            for session_id, owner in list(self._context_owner.items()):
+                if owner is browser:
+                    self._context_owner.pop(session_id, None)
+                    self._contexts.pop(session_id, None)
+                    self._pool.pop(session_id, None)
+        try:
+            await browser.close()
+        except Exception as exc:
+            logger.warning(
+                "browser_recycle_close_failed",
+                extra={"extra_fields": {"error": str(exc)}},
+            )
+            return
+        logger.info("browser_recycle_completed", extra={"extra_fields": {"forced": force}})
+
+    async def _force_close_stale_drains(self) -> None:
+        timeout = utcms_config.BROWSER_DRAIN_TIMEOUT_SECONDS
+        if timeout <= 0 or not self._draining:
+            return
+        now = time.monotonic()
+        for browser, started in list(self._draining):
+            if now - started >= timeout:
+                await self._close_drained_browser(browser, force=True)
+
+    async def _acquire_slot(self) -> ContextSlot:
+        """Reserve a tab in a pooled context, preferring already-authenticated ones."""
+        async with self._pool_lock:
+            candidates = [
+                slot for slot in self._pool.values()
+                if not slot.invalidated and slot.free_tabs > 0
+            ]
+            if candidates:
+                slot = max(candidates, key=lambda item: (item.authenticated, -len(item.pages)))
+            else:
+                session_id, context = await self.create_context()
+                slot = ContextSlot(
+                    session_id=session_id,
+                    context=context,
+                    tab_limit=max(1, utcms_config.BROWSER_CONTEXT_TAB_LIMIT),
+                )
+                self._pool[session_id] = slot
+            slot.reserved += 1
+            return slot
+
+    async def _release_slot(self, slot: ContextSlot, page: Optional[Page]) -> None:
+        async with self._pool_lock:
+            if page is not None:
+                slot.pages.discard(page)
+            if slot.invalidated and not slot.pages and slot.reserved == 0:
+                self._pool.pop(slot.session_id, None)
+                retire = True
+            else:
+                retire = False
+        if retire:
+            try:
+                await self.close_context(slot.session_id)
+            except Exception as exc:
+                logger.warning(
+                    "pooled_context_close_failed",
+                    extra={"extra_fields": {"session_id": slot.session_id, "error": str(exc)}},
+                )
+
+    @asynccontextmanager
+    async def lease_page(self) -> AsyncIterator[PageLease]:
+        """Yield a page for one waybill and clean it up afterwards.
+
+        When ``BROWSER_CONTEXT_POOLING`` is on, pages are opened as tabs of a shared
+        context (bounded by ``BROWSER_CONTEXT_TAB_LIMIT``) so cookies and login are
+        reused across waybills; otherwise each lease gets its own context.
+        """
+        await self.maybe_recycle()
+
+        if not utcms_config.BROWSER_CONTEXT_POOLING:
+            session_id, context = await self.create_context()
+            page = None
+            try:
+                page = await self.new_page(context)
+                yield PageLease(session_id=session_id, context=context, page=page)
+            finally:
+                if page is not None:
+                    await self._close_page_quietly(page, session_id)
+                try:
+                    await self.close_context(session_id)
+                except Exception:
+                    logger.warning(
+                        "context_close_failed",
+                        extra={"extra_fields": {"session_id": session_id}},
+                    )
+            return
+
+        slot = await self._acquire_slot()
+        page = None
+        try:
+            try:
+                page = await self.new_page(slot.context)
+            except Exception:
+                slot.invalidated = True
+                raise
+            finally:
+                slot.reserved -= 1
+            slot.pages.add(page)
+            slot.served += 1
+            yield PageLease(session_id=slot.session_id, context=slot.context, page=page, slot=slot)
+        finally:
+            if page is not None:
+                await self._close_page_quietly(page, slot.session_id)
+            await self._release_slot(slot, page)
+
+    async def _close_page_quietly(self, page: Page, session_id: str) -> None:
+        try:
+            await page.close()
+        except Exception:
+            logger.warning(
+                "page_close_failed",
+                extra={"extra_fields": {"session_id": session_id}},
+            )
+
+    async def adopt_context(self, session_id: str, context: BrowserContext) -> bool:
+        """Put a freshly authenticated context at the front of the pool.
+
+        Existing pooled contexts are retired (closed once their pages are released),
+        so new leases land on the adopted context and skip login. Returns False when
+        pooling is disabled or the context is not managed here.
+        """
+        if not utcms_config.BROWSER_CONTEXT_POOLING or session_id not in self._contexts:
+            return False
+
+        async with self._pool_lock:
+            idle_slots = []
+            for slot in list(self._pool.values()):
+                slot.invalidated = True
+                if not slot.pages and slot.reserved == 0:
+                    self._pool.pop(slot.session_id, None)
+                    idle_slots.append(slot)
+            self._pool[session_id] = ContextSlot(
+                session_id=session_id,
+                context=context,
+                tab_limit=max(1, utcms_config.BROWSER_CONTEXT_TAB_LIMIT),
+                authenticated=True,
+            )
+
+        for slot in idle_slots:
+            await self._release_slot(slot, None)
+        return True
+
+    def authenticated_contexts(self) -> List[BrowserContext]:
+        return [
+            slot.context for slot in self._pool.values()
+            if slot.authenticated and not slot.invalidated
+        ]
+
+    def pool_snapshot(self) -> Dict[str, int]:
+        return {
+            "contexts": len(self._pool),
+            "draining_browsers": len(self._draining),
+            "recycle_count": self.recycle_count,
+            "open_pages": sum(len(slot.pages) for slot in self._pool.values()),
+            "authenticated_contexts": sum(1 for slot in self._pool.values() if slot.authenticated),
+        }
+
     async def close(self):
         """Close browser and playwright"""
+        self._pool.clear()
         for context in self._contexts.values():
             try:
                 await context.close()
@@ -87,6 +483,17 @@ class BrowserManager:
                     extra={"extra_fields": {"error": str(exc)}},
                 )
         self._contexts.clear()
+        self._context_owner.clear()
+
+        for browser, _ in self._draining:
+            try:
+                await browser.close()
+            except Exception as exc:
+                logger.warning(
+                    "browser_close_failed_on_shutdown",
+                    extra={"extra_fields": {"error": str(exc)}},
+                )
+        self._draining.clear()
 
         if self.browser:
             try:
@@ -1,9 +1,44 @@
 from typing import Optional
 
 from app.automation.captcha.base import CaptchaProvider
+from app.automation.captcha.local import LocalCaptchaProvider
+from app.automation.captcha.router import CaptchaRouter
+from app.automation.captcha.stats import captcha_stats
 from app.automation.captcha.twocaptcha import TwoCaptchaProvider
 from app.core.config import utcms_config
 
+# The local solver owns a process pool with a loaded model, so it is created once.
+_local_provider: Optional[LocalCaptchaProvider] = None
+
+
+def _get_twocaptcha_provider() -> Optional[TwoCaptchaProvider]:
+    if not utcms_config.TWOCAPTCHA_API_KEY:
+        return None
+    return TwoCaptchaProvider(
+        api_key=utcms_config.TWOCAPTCHA_API_KEY,
+        timeout_seconds=utcms_config.CAPTCHA_TIMEOUT_SECONDS,
+        poll_seconds=utcms_config.CAPTCHA_POLL_SECONDS,
+        max_retries=utcms_config.CAPTCHA_MAX_RETRIES,
+        cost_per_solve=utcms_config.TWOCAPTCHA_COST_PER_SOLVE,
+    )
+
+
+def get_local_captcha_provider(with_fallback: bool = True) -> LocalCaptchaProvider:
+    global _local_provider
+    if _local_provider is None or _local_provider.model_spec != utcms_config.LOCAL_CAPTCHA_MODEL.strip():
+        if _local_provider is not None:
+            _local_provider.close()
+        _local_provider = LocalCaptchaProvider(
+            model_spec=utcms_config.LOCAL_CAPTCHA_MODEL,
+            min_confidence=utcms_config.LOCAL_CAPTCHA_MIN_CONFIDENCE,
+            workers=utcms_config.LOCAL_CAPTCHA_WORKERS,
+            timeout_seconds=utcms_config.LOCAL_CAPTCHA_TIMEOUT_SECONDS,
+            threshold=utcms_config.LOCAL_CAPTCHA_THRESHOLD,
+        )
+    use_fallback = with_fallback and utcms_config.LOCAL_CAPTCHA_FALLBACK
+    _local_provider.fallback = _get_twocaptcha_provider() if use_fallback else None
+    return _local_provider
+
 
 def get_captcha_provider() -> Optional[CaptchaProvider]:
     provider = utcms_config.CAPTCHA_PROVIDER
@@ -11,16 +46,54 @@ def get_captcha_provider() -> Optional[CaptchaProvider]:
         return None
 
     if provider == "twocaptcha":
-        if not utcms_config.TWOCAPTCHA_API_KEY:
-            return None
-        return TwoCaptchaProvider(
-            api_key=utcms_config.TWOCAPTCHA_API_KEY,
-            timeout_seconds=utcms_config.CAPTCHA_TIMEOUT_SECONDS,
-            poll_seconds=utcms_config.CAPTCHA_POLL_SECONDS,
-            max_retries=utcms_config.CAPTCHA_MAX_RETRIES,
+        return _get_twocaptcha_provider()
+
+    if provider == "local":
+        if not utcms_config.LOCAL_CAPTCHA_MODEL.strip():
+            return _get_twocaptcha_provider() if utcms_config.LOCAL_CAPTCHA_FALLBACK else None
+        return get_local_captcha_provider()
+
+    if provider == "auto":
+        # The router does its own fallback, so the local solver is used without one.
+        candidates = []
+        if utcms_config.LOCAL_CAPTCHA_MODEL.strip():
+            candidates.append(get_local_captcha_provider(with_fallback=False))
+        twocaptcha = _get_twocaptcha_provider()
+        if twocaptcha is not None:
+            candidates.append(twocaptcha)
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        return CaptchaRouter(
+            candidates,
+            cost_weight_seconds=utcms_config.CAPTCHA_COST_WEIGHT_SECONDS,
+            min_samples=utcms_config.CAPTCHA_ROUTER_MIN_SAMPLES,
         )
 
     return None
 
 
-__all__ = ["CaptchaProvider", "TwoCaptchaProvider", "get_captcha_provider"]
+async def warm_up_captcha_provider() -> bool:
+    """Load the local captcha model at startup so the first login does not pay for it."""
+    if utcms_config.CAPTCHA_PROVIDER not in ("local", "auto") or not utcms_config.LOCAL_CAPTCHA_MODEL.strip():
+        return False
+    return await get_local_captcha_provider().warm_up()
+
+
+def shutdown_captcha_providers() -> None:
+    global _local_provider
+    if _local_provider is not None:
+        _local_provider.close()
+        _local_provider = None
+
+
+__all__ = [
+    "CaptchaProvider",
+    "CaptchaRouter",
+    "LocalCaptchaProvider",
+    "TwoCaptchaProvider",
+    "captcha_stats",
+    "get_captcha_provider",
+    "get_local_captcha_provider",
+    "shutdown_captcha_providers",
+    "warm_up_captcha_provider",
+]
@@ -9,9 +9,20 @@ class CaptchaResult:
     provider: str
     value: Optional[str] = None
     error: Optional[str] = None
+    confidence: Optional[float] = None
+    latency_ms: Optional[float] = None
+    # Provider-side id of the solve, used to report the outcome back.
+    task_id: Optional[str] = None
 
 
 class CaptchaProvider(ABC):
+    name = "provider"
+    cost_per_solve = 0.0
+
     @abstractmethod
     async def solve_text_captcha(self, image_base64: str) -> CaptchaResult:
         raise NotImplementedError
+
+    async def report(self, result: CaptchaResult, accepted: bool) -> None:
+        """Tell the provider whether UTCMS accepted its answer (no-op by default)."""
+        return None
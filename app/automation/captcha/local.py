@@ -0,0 +1,220 @@
+"""CPU captcha solver running a pluggable OCR/classifier model in a process pool.
+
+``LOCAL_CAPTCHA_MODEL`` names a factory as ``"package.module:callable"``. The
+factory is called once per worker process and must return an object with
+``predict(image_png: bytes) -> (text, confidence)`` where confidence is in [0, 1].
+Images are pre-processed (grayscale, contrast stretch, binarisation) with Pillow
+when it is installed. Results under ``LOCAL_CAPTCHA_MIN_CONFIDENCE`` are handed to
+the fallback (remote) provider. If the process pool breaks (for example the model
+fails to load in a worker), it is rebuilt after an exponential backoff and the
+fallback handles captchas in the meantime.
+"""
+
+import asyncio
+import base64
+import importlib
+import io
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from app.automation.captcha.base import CaptchaProvider, CaptchaResult
+from app.automation.captcha.stats import SolveTimer, captcha_stats
+
+try:  # Pillow is optional; without it the model receives the raw PNG.
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Model instance of the current worker process (or thread pool), built by _init_worker.
+_worker_model: Any = None
+_worker_lock = threading.Lock()
+
+
+def load_model_factory(spec: str) -> Callable[[], Any]:
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"invalid model spec {spec!r}; expected 'package.module:callable'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def preprocess_image(image_png: bytes, threshold: int = 140) -> bytes:
+    """Grayscale, stretch contrast and binarise a captcha image (no-op without Pillow)."""
+    if Image is None or not image_png:
+        return image_png
+    try:
+        with Image.open(io.BytesIO(image_png)) as image:
+            gray = ImageOps.autocontrast(ImageOps.grayscale(image))
+            binary = gray.point(lambda value: 255 if value > threshold else 0)
+            output = io.BytesIO()
+            binary.save(output, format="PNG")
+            return output.getvalue()
+    except Exception:
+        return image_png
+
+
+def _init_worker(model_spec: str) -> None:
+    global _worker_model
+    with _worker_lock:
+        if _worker_model is None:
+            _worker_model = load_model_factory(model_spec)()
+
+
+def _predict(model_spec: str, image_png: bytes, threshold: int) -> Tuple[str, float]:
+    _init_worker(model_spec)
+    text, confidence = _worker_model.predict(preprocess_image(image_png, threshold))
+    return str(text or "").strip(), float(confidence or 0.0)
+
+
+def _warm_up(model_spec: str) -> bool:
+    _init_worker(model_spec)
+    return True
+
+
+class LocalCaptchaProvider(CaptchaProvider):
+    name = "local"
+    # Backoff before rebuilding a process pool that broke (e.g. the model failed to load).
+    pool_retry_base_seconds = 5.0
+    pool_retry_max_seconds = 300.0
+
+    def __init__(
+        self,
+        model_spec: str,
+        min_confidence: float = 0.8,
+        workers: int = 1,
+        timeout_seconds: float = 10.0,
+        threshold: int = 140,
+        fallback: Optional[CaptchaProvider] = None,
+    ):
+        self.model_spec = model_spec.strip()
+        self.min_confidence = float(min_confidence)
+        self.workers = max(0, int(workers))
+        self.timeout_seconds = max(0.5, float(timeout_seconds))
+        self.threshold = int(threshold)
+        self.fallback = fallback
+        self._executor: Optional[Executor] = None
+        self._pool_failures = 0
+        self._pool_retry_at = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.model_spec,),
+                )
+            else:
+                # workers=0: run in a single thread of this process (small deployments, tests).
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="captcha-local")
+        return self._executor
+
+    async def warm_up(self) -> bool:
+        """Load the model in the pool ahead of the first captcha."""
+        if not self.model_spec:
+            return False
+        if self._pool_unavailable():
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), _warm_up, self.model_spec)
+        except BrokenProcessPool as exc:
+            self._discard_broken_pool(exc)
+            return False
+        except Exception as exc:
+            logger.warning("local_captcha_model_load_failed", extra={"extra_fields": {"error": str(exc)}})
+            return False
+
+    def close(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _pool_unavailable(self) -> bool:
+        return time.monotonic() < self._pool_retry_at
+
+    def _discard_broken_pool(self, exc: BaseException) -> None:
+        """Drop a broken pool; a new one is built on the first solve after the backoff."""
+        self.close()
+        self._pool_failures += 1
+        delay = min(
+            self.pool_retry_max_seconds,
+            self.pool_retry_base_seconds * 2 ** (self._pool_failures - 1),
+        )
+        self._pool_retry_at = time.monotonic() + delay
+        logger.warning(
+            "local_captcha_pool_broken",
+            extra={
+                "extra_fields": {
+                    "error": str(exc),
+                    "failures": self._pool_failures,
+                    "retry_in_seconds": delay,
+                }
+            },
+        )
+
+    async def solve_text_captcha(self, image_base64: str) -> CaptchaResult:
+        if not image_base64:
+            return CaptchaResult(solved=False, provider=self.name, error="missing_image")
+
+        result = await self._solve_locally(image_base64)
+        if result.solved or self.fallback is None:
+            return result
+
+        logger.info(
+            "local_captcha_fallback",
+            extra={"extra_fields": {"error": result.error, "confidence": result.confidence}},
+        )
+        return await self.fallback.solve_text_captcha(image_base64)
+
+    async def report(self, result: CaptchaResult, accepted: bool) -> None:
+        # Answers that came from the fallback are reported back to it (e.g. 2captcha reportbad).
+        if self.fallback is not None and result.provider == self.fallback.name:
+            await self.fallback.report(result, accepted)
+
+    async def _solve_locally(self, image_base64: str) -> CaptchaResult:
+        if not self.model_spec:
+            return CaptchaResult(solved=False, provider=self.name, error="missing_model")
+        if self._pool_unavailable():
+            return CaptchaResult(solved=False, provider=self.name, error="solver_unavailable")
+
+        loop = asyncio.get_running_loop()
+        with SolveTimer() as timer:
+            try:
+                image_png = base64.b64decode(image_base64)
+                value, confidence = await asyncio.wait_for(
+                    loop.run_in_executor(
+                        self._get_executor(), _predict, self.model_spec, image_png, self.threshold
+                    ),
+                    timeout=self.timeout_seconds,
+                )
+                error = None
+                self._pool_failures = 0
+            except BrokenProcessPool as exc:
+                self._discard_broken_pool(exc)
+                value, confidence, error = "", 0.0, "solver_unavailable"
+            except Exception as exc:
+                logger.warning("local_captcha_failed", extra={"extra_fields": {"error": str(exc)}})
+                value, confidence, error = "", 0.0, "solve_failed"
+
+        if error is None and not value:
+            error = "empty_prediction"
+        elif error is None and confidence < self.min_confidence:
+            error = "low_confidence"
+
+        solved = error is None
+        captcha_stats.record_solve(self.name, solved, timer.elapsed_ms)
+        return CaptchaResult(
+            solved=solved,
+            provider=self.name,
+            value=value if solved else None,
+            error=error,
+            confidence=round(confidence, 4),
+            latency_ms=round(timer.elapsed_ms, 2),
+        )
@@ -0,0 +1,64 @@
+import logging
+from typing import List, Optional, Sequence
+
+from app.automation.captcha.base import CaptchaProvider, CaptchaResult
+from app.automation.captcha.stats import CaptchaStats, captcha_stats
+
+logger = logging.getLogger(__name__)
+
+
+class CaptchaRouter(CaptchaProvider):
+    """
+    Routes each captcha to the provider with the best expected time-to-accepted-login.
+
+    Providers with fewer than ``min_samples`` attempts are tried first (in the given
+    order) so every provider gets measured; afterwards they are ranked by
+    ``expected_seconds_to_accept`` plus ``cost_weight_seconds`` per unit of cost per
+    accepted answer. When the chosen provider cannot solve, the next one is tried.
+    """
+
+    name = "router"
+
+    def __init__(
+        self,
+        providers: Sequence[CaptchaProvider],
+        cost_weight_seconds: float = 0.0,
+        min_samples: int = 3,
+        stats: Optional[CaptchaStats] = None,
+    ):
+        self.providers: List[CaptchaProvider] = list(providers)
+        self.cost_weight_seconds = max(0.0, float(cost_weight_seconds))
+        self.min_samples = max(1, int(min_samples))
+        self._stats = stats
+
+    @property
+    def stats(self) -> CaptchaStats:
+        return self._stats or captcha_stats
+
+    def rank(self) -> List[CaptchaProvider]:
+        def score(indexed):
+            index, provider = indexed
+            expected = self.stats.expected_seconds_to_accept(provider.name, min_samples=self.min_samples)
+            if expected is None:
+                return (0, 0.0, index)
+            return (1, expected + self.cost_weight_seconds * provider.cost_per_solve, index)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=score)]
+
+    async def solve_text_captcha(self, image_base64: str) -> CaptchaResult:
+        result = CaptchaResult(solved=False, provider=self.name, error="no_provider")
+        for provider in self.rank():
+            result = await provider.solve_text_captcha(image_base64)
+            if result.solved and result.value:
+                return result
+            logger.info(
+                "captcha_route_fallthrough",
+                extra={"extra_fields": {"provider": provider.name, "error": result.error}},
+            )
+        return result
+
+    async def report(self, result: CaptchaResult, accepted: bool) -> None:
+        for provider in self.providers:
+            if provider.name == result.provider:
+                await provider.report(result, accepted)
+                return
@@ -0,0 +1,112 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+
+@dataclass
+class ProviderStats:
+    attempts: int = 0
+    solved: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    cost_total: float = 0.0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        judged = self.accepted + self.rejected
+        return {
+            "attempts": self.attempts,
+            "solved": self.solved,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "accuracy": round(self.accepted / judged, 4) if judged else None,
+            "cost_total": round(self.cost_total, 4),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+            },
+        }
+
+
+class CaptchaStats:
+    """Per-provider solve latency and accuracy (accepted by UTCMS / judged solves)."""
+
+    def __init__(self):
+        self._providers: Dict[str, ProviderStats] = {}
+
+    def _get(self, provider: str) -> ProviderStats:
+        return self._providers.setdefault(provider, ProviderStats())
+
+    def record_solve(self, provider: str, solved: bool, latency_ms: float, cost: float = 0.0) -> None:
+        stats = self._get(provider)
+        stats.attempts += 1
+        stats.cost_total += cost
+        stats.latencies_ms.append(round(latency_ms, 2))
+        if solved:
+            stats.solved += 1
+
+    def record_outcome(self, provider: str, accepted: bool) -> None:
+        stats = self._get(provider)
+        if accepted:
+            stats.accepted += 1
+        else:
+            stats.rejected += 1
+
+    def expected_seconds_to_accept(
+        self,
+        provider: str,
+        min_samples: int = 3,
+        prior_accuracy: float = 0.9,
+    ) -> Optional[float]:
+        """
+        Expected wall time until UTCMS accepts an answer from ``provider``.
+
+        Mean solve latency divided by the chance that one attempt is both solved and
+        accepted (retries are geometric). None until ``min_samples`` attempts exist.
+        """
+        stats = self._providers.get(provider)
+        if stats is None or stats.attempts < min_samples or not stats.latencies_ms:
+            return None
+        judged = stats.accepted + stats.rejected
+        # Laplace-style smoothing keeps one early rejection from ruling a provider out.
+        accuracy = (stats.accepted + prior_accuracy) / (judged + 1)
+        success = (stats.solved / stats.attempts) * accuracy
+        mean_seconds = sum(stats.latencies_ms) / len(stats.latencies_ms) / 1000
+        return mean_seconds / max(success, 0.01)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        snapshot = {}
+        for name, stats in sorted(self._providers.items()):
+            expected = self.expected_seconds_to_accept(name)
+            snapshot[name] = {
+                **stats.snapshot(),
+                "expected_seconds_to_accept": round(expected, 2) if expected is not None else None,
+            }
+        return snapshot
+
+    def reset(self) -> None:
+        self._providers.clear()
+
+
+class SolveTimer:
+    """``with SolveTimer() as timer: ...`` then read ``timer.elapsed_ms``."""
+
+    def __enter__(self) -> "SolveTimer":
+        self._started = time.perf_counter()
+        self.elapsed_ms: Optional[float] = None
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+
+
+def _percentile(samples, percentile: int) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round((percentile / 100) * (len(samples) - 1))))
+    return round(samples[index], 2)
+
+
+captcha_stats = CaptchaStats()
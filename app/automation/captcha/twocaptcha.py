@@ -1,17 +1,23 @@
 import asyncio
 import logging
-from typing import Optional
-
-import aiohttp
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
 
 from app.automation.captcha.base import CaptchaProvider, CaptchaResult
+from app.automation.captcha.stats import SolveTimer, captcha_stats
+from app.core.config import utcms_config
+from app.core.http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
+NOT_READY = "CAPCHA_NOT_READY"
+
 
 class TwoCaptchaProvider(CaptchaProvider):
     IN_URL = "https://2captcha.com/in.php"
     RES_URL = "https://2captcha.com/res.php"
+    name = "twocaptcha"
 
     def __init__(
         self,
@@ -19,13 +25,53 @@ class TwoCaptchaProvider(CaptchaProvider):
         timeout_seconds: int = 120,
         poll_seconds: float = 5.0,
         max_retries: int = 2,
+        cost_per_solve: float = 0.0,
     ):
         self.api_key = api_key.strip()
         self.timeout_seconds = max(30, int(timeout_seconds))
         self.poll_seconds = max(2.0, float(poll_seconds))
         self.max_retries = max(1, int(max_retries))
+        self.cost_per_solve = max(0.0, float(cost_per_solve))
 
     async def solve_text_captcha(self, image_base64: str) -> CaptchaResult:
+        with SolveTimer() as timer:
+            result = await self._solve(image_base64)
+        result.latency_ms = round(timer.elapsed_ms, 2)
+        if result.error not in ("missing_api_key", "missing_image"):
+            captcha_stats.record_solve(
+                self.name,
+                result.solved,
+                timer.elapsed_ms,
+                cost=self.cost_per_solve if result.solved else 0.0,
+            )
+        return result
+
+    async def report(self, result: CaptchaResult, accepted: bool) -> None:
+        """``reportgood``/``reportbad`` for a solved task; 2captcha refunds bad solves."""
+        if not (self.api_key and result.task_id):
+            return
+        params = {
+            "key": self.api_key,
+            "action": "reportgood" if accepted else "reportbad",
+            "id": result.task_id,
+            "json": 1,
+        }
+        try:
+            session = http_clients.session("twocaptcha")
+            async with session.get(self.RES_URL, params=params) as resp:
+                payload = await resp.json(content_type=None)
+            if str(payload.get("status")) != "1":
+                logger.warning(
+                    "twocaptcha_report_rejected",
+                    extra={"extra_fields": {"task_id": result.task_id, "response": payload}},
+                )
+        except Exception as exc:
+            logger.warning(
+                "twocaptcha_report_failed",
+                extra={"extra_fields": {"task_id": result.task_id, "error": str(exc)}},
+            )
+
+    async def _solve(self, image_base64: str) -> CaptchaResult:
         if not self.api_key:
             return CaptchaResult(solved=False, provider="twocaptcha", error="missing_api_key")
         if not image_base64:
@@ -39,7 +85,9 @@ class TwoCaptchaProvider(CaptchaProvider):
 
                 solved_value = await self._poll_result(task_id)
                 if solved_value:
-                    return CaptchaResult(solved=True, provider="twocaptcha", value=solved_value)
+                    return CaptchaResult(
+                        solved=True, provider="twocaptcha", value=solved_value, task_id=task_id
+                    )
             except Exception:
                 logger.exception(
                     "twocaptcha_solve_failed",
@@ -55,11 +103,9 @@ class TwoCaptchaProvider(CaptchaProvider):
             "body": image_base64,
             "json": 1,
         }
-        timeout = aiohttp.ClientTimeout(total=30)
-
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(self.IN_URL, data=data) as resp:
-                payload = await resp.json(content_type=None)
+        session = http_clients.session("twocaptcha")
+        async with session.post(self.IN_URL, data=data) as resp:
+            payload = await resp.json(content_type=None)
 
         if str(payload.get("status")) == "1":
             return str(payload.get("request"))
@@ -71,36 +117,226 @@ class TwoCaptchaProvider(CaptchaProvider):
         return None
 
     async def _poll_result(self, task_id: str) -> Optional[str]:
-        deadline = asyncio.get_running_loop().time() + self.timeout_seconds
-
-        while asyncio.get_running_loop().time() < deadline:
-            params = {
-                "key": self.api_key,
-                "action": "get",
-                "id": task_id,
-                "json": 1,
-            }
-            timeout = aiohttp.ClientTimeout(total=20)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(self.RES_URL, params=params) as resp:
-                    payload = await resp.json(content_type=None)
-
-            if str(payload.get("status")) == "1":
-                value = str(payload.get("request", "")).strip()
-                return value or None
-
-            request_value = str(payload.get("request", ""))
-            if request_value != "CAPCHA_NOT_READY":
-                logger.warning(
-                    "twocaptcha_task_failed",
-                    extra={"extra_fields": {"task_id": task_id, "response": payload}},
-                )
-                return None
+        poller = TwoCaptchaResultPoller.for_api_key(self.api_key, self.RES_URL)
+        return await poller.wait_for(task_id, self.timeout_seconds, self.poll_seconds)
+
+
+class SolveTimeModel:
+    """
+    Observed 2captcha solve times and the poll schedule derived from them.
+
+    With too few samples every poll waits ``default`` seconds (the configured
+    ``CAPTCHA_POLL_SECONDS``). Afterwards the first poll lands near the median solve
+    time, polls are tight until the 90th percentile and then back off.
+    """
+
+    def __init__(self, max_samples: int = 200, min_samples: int = 5):
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float) -> None:
+        if seconds > 0:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def next_delay(self, elapsed: float, attempt: int, default: float, minimum: float) -> float:
+        median = self.quantile(0.5)
+        if median is None or not utcms_config.CAPTCHA_ADAPTIVE_POLLING:
+            return default
+        p90 = max(median, self.quantile(0.9) or median)
+        if attempt == 0:
+            return max(minimum, median - elapsed)
+        if elapsed < p90:
+            return min(max(minimum, (p90 - median) / 3), max(minimum, p90 - elapsed))
+        # Slower than usual: back off towards twice the fixed interval.
+        return min(default * 2, max(minimum, (elapsed - p90) / 2))
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        p50, p90 = self.quantile(0.5), self.quantile(0.9)
+        return {
+            "samples": len(self._samples),
+            "p50_seconds": round(p50, 2) if p50 is not None else None,
+            "p90_seconds": round(p90, 2) if p90 is not None else None,
+        }
+
+
+solve_time_model = SolveTimeModel()
+
 
-            await asyncio.sleep(self.poll_seconds)
+@dataclass
+class _PendingTask:
+    task_id: str
+    created_at: float
+    deadline: float
+    poll_seconds: float
+    future: asyncio.Future
+    due_at: float = 0.0
+    attempts: int = 0
+    last_poll_at: Optional[float] = None
 
+
+class TwoCaptchaResultPoller:
+    """
+    Polls every outstanding 2captcha task of one API key with multi-id requests.
+
+    Each task has its own adaptive schedule; tasks that come due within
+    ``COALESCE_SECONDS`` of each other share one ``res.php?action=get&ids=...`` call.
+    """
+
+    MAX_IDS = 100
+    COALESCE_SECONDS = 0.25
+    _instances: Dict[str, "TwoCaptchaResultPoller"] = {}
+
+    def __init__(self, api_key: str, res_url: str, timing: Optional[SolveTimeModel] = None):
+        self.api_key = api_key
+        self.res_url = res_url
+        self.timing = timing or solve_time_model
+        self.requests = 0
+        self._pending: Dict[str, _PendingTask] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @classmethod
+    def for_api_key(cls, api_key: str, res_url: str) -> "TwoCaptchaResultPoller":
+        poller = cls._instances.get(api_key)
+        if poller is None or poller._loop not in (None, asyncio.get_running_loop()):
+            poller = cls(api_key, res_url)
+            cls._instances[api_key] = poller
+        return poller
+
+    async def wait_for(self, task_id: str, timeout_seconds: float, poll_seconds: float) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._wakeup, self._runner = loop, asyncio.Event(), None
+
+        now = loop.time()
+        pending = _PendingTask(
+            task_id=task_id,
+            created_at=now,
+            deadline=now + timeout_seconds,
+            poll_seconds=poll_seconds,
+            future=loop.create_future(),
+        )
+        pending.due_at = now + self._delay(pending, now)
+        self._pending[task_id] = pending
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+        self._wakeup.set()
+        try:
+            return await pending.future
+        finally:
+            self._pending.pop(task_id, None)
+
+    def _delay(self, pending: _PendingTask, now: float) -> float:
+        delay = self.timing.next_delay(
+            now - pending.created_at,
+            pending.attempts,
+            default=pending.poll_seconds,
+            minimum=utcms_config.CAPTCHA_POLL_MIN_SECONDS,
+        )
+        return max(0.0, min(delay, pending.deadline - now))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            waiting = [item for item in self._pending.values() if not item.future.done()]
+            if not waiting:
+                return
+            now = loop.time()
+            due = [item for item in waiting if item.due_at <= now + self.COALESCE_SECONDS]
+            if not due:
+                next_due = min(item.due_at for item in waiting)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_due - now))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for start in range(0, len(due), self.MAX_IDS):
+                await self._poll_batch(due[start:start + self.MAX_IDS])
+
+    async def _poll_batch(self, batch: List[_PendingTask]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            answers = await self._fetch([item.task_id for item in batch])
+        except Exception as exc:
+            # One failed multi-id call says nothing about the tasks; poll them again later.
+            logger.warning(
+                "twocaptcha_poll_failed",
+                extra={"extra_fields": {"task_ids": [item.task_id for item in batch], "error": str(exc)}},
+            )
+            now = loop.time()
+            for item in batch:
+                if item.future.done():
+                    continue
+                if now >= item.deadline:
+                    self._expire(item)
+                else:
+                    item.due_at = now + max(0.0, min(item.poll_seconds, item.deadline - now))
+            return
+
+        now = loop.time()
+        for item, answer in zip(batch, answers):
+            if item.future.done():
+                continue
+            if answer != NOT_READY:
+                if answer:
+                    # Ready somewhere between the previous poll and this one.
+                    ready_at = ((item.last_poll_at or item.created_at) + now) / 2
+                    self.timing.observe(ready_at - item.created_at)
+                item.future.set_result(answer or None)
+                continue
+
+            item.attempts += 1
+            item.last_poll_at = now
+            if now >= item.deadline:
+                self._expire(item)
+            else:
+                item.due_at = now + self._delay(item, now)
+
+    @staticmethod
+    def _expire(item: _PendingTask) -> None:
         logger.warning(
             "twocaptcha_timeout",
-            extra={"extra_fields": {"task_id": task_id, "timeout_seconds": self.timeout_seconds}},
+            extra={
+                "extra_fields": {
+                    "task_id": item.task_id,
+                    "timeout_seconds": round(item.deadline - item.created_at),
+                }
+            },
         )
-        return None
+        item.future.set_result(None)
+
+    async def _fetch(self, task_ids: List[str]) -> List[Optional[str]]:
+        """One ``action=get`` call for all ids: answer, NOT_READY or None (failed) per id."""
+        params = {
+            "key": self.api_key,
+            "action": "get",
+            "ids": ",".join(task_ids),
+            "json": 1,
+        }
+        session = http_clients.session("twocaptcha")
+        async with session.get(self.res_url, params=params) as resp:
+            payload = await resp.json(content_type=None)
+        self.requests += 1
+
+        request_value = str(payload.get("request", "")).strip()
+        parts = request_value.split("|")
+        if len(parts) == len(task_ids) and (str(payload.get("status")) == "1" or set(parts) == {NOT_READY}):
+            # Per-id errors (e.g. ERROR_CAPTCHA_UNSOLVABLE) fail only that task.
+            return [None if part.strip().startswith("ERROR") else part.strip() for part in parts]
+        if request_value == NOT_READY:
+            return [NOT_READY] * len(task_ids)
+
+        logger.warning(
+            "twocaptcha_task_failed",
+            extra={"extra_fields": {"task_ids": task_ids, "response": payload}},
+        )
+        return [None] * len(task_ids)
@@ -0,0 +1,125 @@
+"""Classify the page reached on the way to the waybill form and remember what worked.
+
+``classify_page`` turns one ``PageSnapshot`` into a ``PageState``. From the state,
+``EnhancedWaybillManager`` picks a single recovery step instead of sweeping every
+menu selector and URL: a menu link with a real href is opened directly, while
+script-driven menu links and error-page buttons are clicked. ``FormRouteMemory`` keeps, per UTCMS account, the URL
+at which the form was last ready, so later requests navigate straight to it.
+"""
+
+import logging
+from enum import Enum
+from typing import Dict, Optional
+from urllib.parse import urljoin
+
+from app.automation.page_probe import PageSnapshot
+from app.automation.selectors import AuthSelectors, WaybillPageSelectors
+
+logger = logging.getLogger(__name__)
+
+
+class PageState(str, Enum):
+    FORM_READY = "form_ready"
+    NOT_FOUND = "not_found"
+    LOGIN = "login"
+    NO_ACCESS = "no_access"
+    HOME = "home"
+
+
+PAGE_STATE_GROUPS = {
+    "form": WaybillPageSelectors.FORM_MARKERS,
+    "login": AuthSelectors.PASSWORD_SELECTORS,
+    "no_access": WaybillPageSelectors.NO_ACCESS_MARKERS,
+    "not_found": WaybillPageSelectors.NOT_FOUND_MARKERS,
+    "recovery": WaybillPageSelectors.RECOVERY_ACTIONS,
+}
+
+
+def classify_page(snapshot: PageSnapshot) -> PageState:
+    url = snapshot.url.strip().lower()
+    if snapshot.has("form"):
+        return PageState.FORM_READY
+
+    if (
+        snapshot.has("no_access")
+        or any(fragment in url for fragment in WaybillPageSelectors.NO_ACCESS_URL_FRAGMENTS)
+        or any(
+            marker in link.get("text", "")
+            for link in snapshot.links
+            for marker in WaybillPageSelectors.NO_ACCESS_LINK_TEXTS
+        )
+    ):
+        return PageState.NO_ACCESS
+
+    if snapshot.has("login") or "/login" in url:
+        return PageState.LOGIN
+
+    if (
+        any(marker in snapshot.title for marker in WaybillPageSelectors.NOT_FOUND_TITLES)
+        or any(fragment in url for fragment in WaybillPageSelectors.ERROR_URL_FRAGMENTS)
+        or snapshot.has("not_found")
+    ):
+        return PageState.NOT_FOUND
+
+    return PageState.HOME
+
+
+def _navigable(href: str) -> bool:
+    return bool(href) and not href.startswith(("#", "javascript:"))
+
+
+def form_link(snapshot: PageSnapshot) -> Optional[str]:
+    """Absolute URL of the best menu link to the waybill form, if the page shows one."""
+    links = [link for link in snapshot.links if _navigable(link.get("href", ""))]
+    for text in WaybillPageSelectors.FORM_LINK_TEXTS:
+        for link in links:
+            if text in link.get("text", ""):
+                return urljoin(snapshot.url, link["href"])
+    for link in links:
+        if "waybill" in link["href"].lower():
+            return urljoin(snapshot.url, link["href"])
+    return None
+
+
+def form_link_click_selector(snapshot: PageSnapshot) -> Optional[str]:
+    """Selector for a menu link to the form that only works when clicked (no usable href)."""
+    for text in WaybillPageSelectors.FORM_LINK_TEXTS:
+        for link in snapshot.links:
+            if text in link.get("text", "") and not _navigable(link.get("href", "")):
+                return f"a:has-text('{text}')"
+    return None
+
+
+class FormRouteMemory:
+    """The URL at which the waybill form was last ready, per account."""
+
+    def __init__(self):
+        self._routes: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def route_for(self, account: str) -> Optional[str]:
+        return self._routes.get(account or "")
+
+    def remember(self, account: str, url: str) -> None:
+        if not url or not url.startswith(("http://", "https://")):
+            return
+        key = account or ""
+        if self._routes.get(key) != url:
+            logger.info("waybill_form_route_learned", extra={"extra_fields": {"url": url}})
+        self._routes[key] = url
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def forget(self, account: str) -> None:
+        self._routes.pop(account or "", None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"accounts": len(self._routes), "hits": self.hits, "misses": self.misses}
+
+
+form_routes = FormRouteMemory()
@@ -0,0 +1,220 @@
+"""
+گزتیر آفلاین استان‌ها، شهرها و مناطق ایران برای ژئوکد بدون نیاز به شبکه
+
+داده از فایل CSV یا جدول SQLite بارگذاری و در یک ایندکس درون‌حافظه‌ای با کلید
+متن نرمال‌شده فارسی نگهداری می‌شود.
+"""
+
+import csv
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import utcms_config
+from app.core.text import normalize_persian
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent / "data" / "iran_gazetteer.csv"
+
+KINDS = ("province", "city", "district")
+
+# پیشوندهایی که در ورودی کاربر رایج است اما جزو نام مکان نیست
+_NAME_PREFIXES = ("استان ", "شهرستان ", "شهر ", "منطقه ", "بخش ")
+
+
+@dataclass(frozen=True)
+class GazetteerEntry:
+    """یک مکان در گزتیر"""
+    kind: str
+    name: str
+    lat: float
+    lng: float
+    province: str = ""
+    city: str = ""
+    aliases: Tuple[str, ...] = field(default_factory=tuple)
+
+    def to_coordinates(self) -> Dict[str, float]:
+        return {"lat": self.lat, "lng": self.lng}
+
+
+def place_key(name: str) -> str:
+    """کلید جستجوی نام مکان: متن نرمال‌شده بدون پیشوندهایی مثل «استان» یا «شهر»"""
+    key = normalize_persian(name)
+    for prefix in _NAME_PREFIXES:
+        if key.startswith(prefix) and len(key) > len(prefix):
+            key = key[len(prefix):]
+            break
+    return key.replace(" ", "")
+
+
+class Gazetteer:
+    """ایندکس درون‌حافظه‌ای مکان‌ها با تطبیق نرمال‌شده نام"""
+
+    def __init__(self, entries: Iterable[GazetteerEntry] = ()):
+        self._index: Dict[Tuple[str, str], List[GazetteerEntry]] = {}
+        self._size = 0
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, entry: GazetteerEntry) -> None:
+        if entry.kind not in KINDS:
+            raise ValueError(f"Unknown gazetteer kind: {entry.kind}")
+        keys = {place_key(entry.name)}
+        keys.update(place_key(alias) for alias in entry.aliases if alias)
+        for key in keys:
+            if key:
+                self._index.setdefault((entry.kind, key), []).append(entry)
+        self._size += 1
+
+    def _candidates(self, kind: str, name: Optional[str]) -> List[GazetteerEntry]:
+        if not name:
+            return []
+        return self._index.get((kind, place_key(name)), [])
+
+    def _canonical_key(self, kind: str, name: Optional[str]) -> str:
+        """کلید نام اصلی؛ نام‌های مستعار (مثلا Tehran) به نام ثبت‌شده تبدیل می‌شوند"""
+        if not name:
+            return ""
+        candidates = self._candidates(kind, name)
+        if candidates:
+            return place_key(candidates[0].name)
+        return place_key(name)
+
+    def _pick(
+        self,
+        candidates: List[GazetteerEntry],
+        province: Optional[str] = None,
+        city: Optional[str] = None,
+    ) -> Optional[GazetteerEntry]:
+        if not candidates:
+            return None
+        province_key = self._canonical_key("province", province)
+        city_key = self._canonical_key("city", city)
+        if province_key or city_key:
+            for entry in candidates:
+                if province_key and entry.province and place_key(entry.province) != province_key:
+                    continue
+                if city_key and entry.city and place_key(entry.city) != city_key:
+                    continue
+                return entry
+            # استان/شهر ورودی با هیچ‌کدام نخواند؛ نام مشترک بین استان‌ها قابل اتکا نیست
+            return candidates[0] if len(candidates) == 1 and not province_key else None
+        return candidates[0]
+
+    def lookup(
+        self,
+        province: Optional[str] = None,
+        city: Optional[str] = None,
+        district: Optional[str] = None,
+    ) -> Optional[GazetteerEntry]:
+        """
+        دقیق‌ترین مکان شناخته‌شده: منطقه، سپس شهر، سپس استان
+
+        مرکز استان فقط وقتی برگردانده می‌شود که شهری داده نشده باشد؛ شهر ناشناخته None
+        می‌دهد تا ژئوکد خارجی امتحان شود (مرکز استان ممکن است صدها کیلومتر دور باشد).
+        """
+        entry = self._pick(self._candidates("district", district), province, city)
+        if entry:
+            return entry
+        if city:
+            return self._pick(self._candidates("city", city), province)
+        return self._pick(self._candidates("province", province))
+
+    def geocode(self, location_data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        entry = self.lookup(
+            province=location_data.get("province"),
+            city=location_data.get("city"),
+            district=location_data.get("district"),
+        )
+        return entry.to_coordinates() if entry else None
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "Gazetteer":
+        gazetteer = cls()
+        for row in rows:
+            try:
+                aliases = tuple(
+                    alias.strip() for alias in str(row.get("aliases") or "").split("|") if alias.strip()
+                )
+                gazetteer.add(
+                    GazetteerEntry(
+                        kind=str(row["kind"]).strip().lower(),
+                        name=str(row["name"]).strip(),
+                        lat=float(row["lat"]),
+                        lng=float(row["lng"]),
+                        province=str(row.get("province") or "").strip(),
+                        city=str(row.get("city") or "").strip(),
+                        aliases=aliases,
+                    )
+                )
+            except (KeyError, TypeError, ValueError) as exc:
+                logger.warning(
+                    "gazetteer_row_skipped",
+                    extra={"extra_fields": {"name": row.get("name"), "error": str(exc)}},
+                )
+        return gazetteer
+
+    @classmethod
+    def from_csv(cls, path: os.PathLike) -> "Gazetteer":
+        with open(path, "r", encoding="utf-8-sig", newline="") as handle:
+            return cls.from_rows(csv.DictReader(handle))
+
+    @classmethod
+    def from_sqlite(cls, path: os.PathLike, table: str = "places") -> "Gazetteer":
+        if not table.isidentifier():
+            raise ValueError(f"Invalid gazetteer table name: {table}")
+        connection = sqlite3.connect(f"file:{os.fspath(path)}?mode=ro", uri=True)
+        try:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                f"SELECT kind, name, province, city, lat, lng, aliases FROM {table}"
+            ).fetchall()
+        finally:
+            connection.close()
+        return cls.from_rows(dict(row) for row in rows)
+
+    @classmethod
+    def from_path(cls, path: os.PathLike) -> "Gazetteer":
+        suffix = Path(path).suffix.lower()
+        if suffix in (".db", ".sqlite", ".sqlite3"):
+            return cls.from_sqlite(path)
+        return cls.from_csv(path)
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """گزتیر مشترک که در اولین استفاده از GAZETTEER_PATH (یا فایل پیش‌فرض) بارگذاری می‌شود"""
+    global _gazetteer
+    if _gazetteer is not None:
+        return _gazetteer
+
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            path = utcms_config.GAZETTEER_PATH or DEFAULT_GAZETTEER_PATH
+            try:
+                _gazetteer = Gazetteer.from_path(path)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning(
+                    "gazetteer_load_failed",
+                    extra={"extra_fields": {"path": str(path), "error": str(exc)}},
+                )
+                _gazetteer = Gazetteer()
+    return _gazetteer
+
+
+def reset_gazetteer() -> None:
+    """پاک کردن گزتیر بارگذاری‌شده تا دفعه بعد دوباره خوانده شود"""
+    global _gazetteer
+    with _gazetteer_lock:
+        _gazetteer = None
@@ -0,0 +1,247 @@
+"""
+کش ژئوکد: LRU درون‌حافظه‌ای جلوی یک جدول SQLite
+
+کلید، متن نرمال‌شده «شهر، آدرس» است. نتایج موفق با GEOCODE_CACHE_TTL_SECONDS و پاسخ
+خالی سرویس (آدرس یافت نشد) با GEOCODE_NEGATIVE_TTL_SECONDS نگهداری می‌شوند. خطاهای
+انتقال (timeout، DNS، 5xx) کش نمی‌شوند تا درخواست بعدی دوباره تلاش کند.
+درخواست‌های هم‌زمان برای یک کلید فقط یک بار به سرویس خارجی می‌روند.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import utcms_config
+from app.core.text import normalize_persian
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Dict[str, float]
+
+# مقدار داخلی برای «قبلا جستجو شده و نتیجه‌ای نداشت»
+_NEGATIVE = None
+
+
+def geocode_cache_key(location_data: Dict[str, Any]) -> str:
+    city = normalize_persian(str(location_data.get("city") or ""))
+    address = normalize_persian(str(location_data.get("address") or ""))
+    return f"{city}, {address}"
+
+
+class GeocodeCache:
+    """کش دوسطحی ژئوکد با TTL، کش منفی، ادغام درخواست‌های هم‌زمان و آمار hit/miss"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        negative_ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._path = path
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+        self._memory: "OrderedDict[str, Tuple[float, Optional[Coordinates]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        self._db_lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "sqlite_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "fetch_errors": 0,
+        }
+
+    # -- configuration -------------------------------------------------
+
+    @property
+    def path(self) -> str:
+        return self._path if self._path is not None else utcms_config.GEOCODE_CACHE_PATH
+
+    @property
+    def max_entries(self) -> int:
+        value = self._max_entries if self._max_entries is not None else utcms_config.GEOCODE_CACHE_MAX_ENTRIES
+        return max(1, value)
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds if self._ttl_seconds is not None else utcms_config.GEOCODE_CACHE_TTL_SECONDS
+
+    @property
+    def negative_ttl_seconds(self) -> float:
+        if self._negative_ttl_seconds is not None:
+            return self._negative_ttl_seconds
+        return utcms_config.GEOCODE_NEGATIVE_TTL_SECONDS
+
+    # -- public API ----------------------------------------------------
+
+    async def get_or_fetch(
+        self,
+        location_data: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Optional[Coordinates]]],
+    ) -> Optional[Coordinates]:
+        key = geocode_cache_key(location_data)
+
+        found, value = self._memory_get(key)
+        source = "memory_hits"
+        if not found:
+            found, entry = await asyncio.to_thread(self._sqlite_get, key)
+            if found:
+                expires_at, value = entry
+                self._memory_put(key, expires_at, value)
+                source = "sqlite_hits"
+        if found:
+            self._count(source if value is not _NEGATIVE else "negative_hits")
+            return dict(value) if value else None
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._count("coalesced")
+            result = await asyncio.shield(pending)
+            return dict(result) if result else None
+
+        self._count("misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                result = await fetch()
+            except Exception as exc:
+                # خطای گذرای سرویس کش نمی‌شود؛ فقط منتظران همین درخواست None می‌گیرند
+                self._count("fetch_errors")
+                logger.warning(
+                    "geocode_fetch_failed",
+                    extra={"extra_fields": {"key": key, "error": str(exc)}},
+                )
+                future.set_result(None)
+                return None
+            await self.store(key, result)
+            future.set_result(result)
+            return dict(result) if result else None
+        except BaseException as exc:
+            if not future.done():
+                future.set_exception(exc)
+                # جلوگیری از هشدار «exception was never retrieved» وقتی منتظری نیست
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def store(self, key: str, coordinates: Optional[Coordinates]) -> None:
+        ttl = self.ttl_seconds if coordinates else self.negative_ttl_seconds
+        if ttl <= 0:
+            return
+        expires_at = self._clock() + ttl
+        value = {"lat": float(coordinates["lat"]), "lng": float(coordinates["lng"])} if coordinates else _NEGATIVE
+        self._memory_put(key, expires_at, value)
+        await asyncio.to_thread(self._sqlite_put, key, expires_at, value)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["sqlite_hits"] + stats["negative_hits"] + stats["coalesced"]
+        lookups = hits + stats["misses"]
+        stats["entries"] = len(self._memory)
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # -- memory layer --------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        self._stats[name] += 1
+
+    def _memory_get(self, key: str) -> Tuple[bool, Optional[Coordinates]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            self._memory.pop(key, None)
+            return False, None
+        self._memory.move_to_end(key)
+        return True, value
+
+    def _memory_put(self, key: str, expires_at: float, value: Optional[Coordinates]) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # -- sqlite layer --------------------------------------------------
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None or self._db_failed or not self.path:
+            return self._db
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                "key TEXT PRIMARY KEY, lat REAL, lng REAL, expires_at REAL NOT NULL)"
+            )
+            db.commit()
+            self._db = db
+        except (OSError, sqlite3.Error) as exc:
+            self._db_failed = True
+            logger.warning(
+                "geocode_cache_unavailable",
+                extra={"extra_fields": {"path": self.path, "error": str(exc)}},
+            )
+        return self._db
+
+    def _sqlite_get(self, key: str) -> Tuple[bool, Optional[Tuple[float, Optional[Coordinates]]]]:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return False, None
+            try:
+                row = db.execute(
+                    "SELECT lat, lng, expires_at FROM geocode_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return False, None
+        if row is None or row[2] <= self._clock():
+            return False, None
+        value = {"lat": row[0], "lng": row[1]} if row[0] is not None else _NEGATIVE
+        return True, (row[2], value)
+
+    def _sqlite_put(self, key: str, expires_at: float, value: Optional[Coordinates]) -> None:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO geocode_cache (key, lat, lng, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, value["lat"] if value else None, value["lng"] if value else None, expires_at),
+                )
+                db.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (self._clock(),))
+                db.commit()
+            except sqlite3.Error as exc:
+                logger.warning(
+                    "geocode_cache_write_failed",
+                    extra={"extra_fields": {"error": str(exc)}},
+                )
+
+
+geocode_cache = GeocodeCache()
@@ -0,0 +1,55 @@
+(containerSelectors) => {
+    // تشخیص یکجای کتابخانه نقشه، نسخه، کانتینر و محل نگهداری نمونه نقشه
+    const result = { library: null, version: null, selector: null, instance: null };
+
+    if (typeof google !== 'undefined' && typeof google.maps !== 'undefined') {
+        result.library = 'google_maps';
+        result.version = google.maps.version || null;
+    } else if (typeof ol !== 'undefined' && typeof ol.Map !== 'undefined') {
+        result.library = 'openlayers';
+        result.version = ol.VERSION || (ol.util && ol.util.VERSION) || null;
+    } else if (typeof L !== 'undefined' && typeof L.Map !== 'undefined') {
+        result.library = 'leaflet';
+        result.version = L.version || null;
+    } else if (typeof mapboxgl !== 'undefined') {
+        result.library = 'mapbox';
+        result.version = mapboxgl.version || null;
+    }
+
+    let container = null;
+    for (const selector of containerSelectors || []) {
+        try {
+            container = document.querySelector(selector);
+        } catch (e) {
+            container = null;
+        }
+        if (container) {
+            result.selector = selector;
+            break;
+        }
+    }
+
+    // نام متغیر سراسری یا خصوصیت کانتینر که نمونه نقشه را نگه می‌دارد
+    if (container) {
+        for (const prop of ['_leaflet_map', '_map', '__gm', 'map']) {
+            if (container[prop]) {
+                result.instance = 'element.' + prop;
+                break;
+            }
+        }
+    }
+    if (!result.instance) {
+        for (const name of ['map', 'leafletMap', 'olMap', 'googleMap', 'mapInstance']) {
+            const value = window[name];
+            if (value && typeof value === 'object' && !(value instanceof Element)) {
+                result.instance = 'window.' + name;
+                break;
+            }
+        }
+    }
+
+    if (!result.library && result.selector) {
+        result.library = 'unknown_map';
+    }
+    return result;
+}
@@ -0,0 +1,8 @@
+(select) => {
+    // استخراج یکجای گزینه‌های منوی کشویی به صورت [متن، مقدار]
+    const options = select.options || select.querySelectorAll('option');
+    return Array.from(options, (option) => [
+        (option.textContent || '').trim(),
+        option.value == null ? '' : String(option.value),
+    ]);
+}
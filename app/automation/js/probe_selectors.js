@@ -0,0 +1,111 @@
+({ groups, visible, linkKeywords }) => {
+    // بررسی یکجای چند گروه سلکتور؛ برای هر گروه اولین سلکتور منطبق برگردانده می‌شود.
+    // سلکتورهای text= و :has-text() به جستجوی متنی ترجمه می‌شوند و سلکتورهایی که
+    // در مرورگر قابل ارزیابی نیستند در unsupported گزارش می‌شوند. با linkKeywords پیوندهایی
+    // که متن یا آدرسشان شامل یکی از کلیدواژه‌هاست هم در همان فراخوانی برگردانده می‌شوند.
+    const normalize = (value) => String(value || '').replace(/\s+/g, ' ').trim();
+    const SKIPPED_TEXT = 'script, style, noscript, template';
+
+    // مثل موتور متن Playwright: متن داخل script/style نادیده گرفته می‌شود.
+    const nodeText = (root) => {
+        const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT, {
+            acceptNode: (node) => (
+                node.parentElement && node.parentElement.closest(SKIPPED_TEXT)
+                    ? NodeFilter.FILTER_REJECT
+                    : NodeFilter.FILTER_ACCEPT
+            ),
+        });
+        const parts = [];
+        while (walker.nextNode()) {
+            parts.push(walker.currentNode.nodeValue);
+        }
+        return parts.join('');
+    };
+
+    const isVisible = (element) => {
+        if (!element.getClientRects().length) {
+            return false;
+        }
+        const style = window.getComputedStyle(element);
+        return style.visibility !== 'hidden' && style.display !== 'none';
+    };
+
+    const elementText = (element) => (visible ? element.innerText || '' : nodeText(element));
+
+    // text=abc: زیررشته بدون حساسیت به حروف؛ text="abc": متن کامل یک عنصر با حساسیت به حروف
+    const textMatches = (raw) => {
+        const body = document.body;
+        if (!body) {
+            return false;
+        }
+        const quoted = raw.match(/^(['"])(.*)\1$/);
+        if (!quoted) {
+            const expected = normalize(raw).toLowerCase();
+            return normalize(elementText(body)).toLowerCase().includes(expected);
+        }
+        const expected = normalize(quoted[2]);
+        return Array.from(body.querySelectorAll('*')).some((element) => (
+            !element.matches(SKIPPED_TEXT)
+            && (!visible || isVisible(element))
+            && normalize(elementText(element)) === expected
+        ));
+    };
+
+    const matches = (selector) => {
+        if (selector.startsWith('text=')) {
+            return textMatches(selector.slice(5));
+        }
+
+        // :has-text() در Playwright همیشه زیررشته بدون حساسیت به حروف است، با یا بدون نقل‌قول.
+        const hasText = selector.match(/^(.*):has-text\((['"])(.*)\2\)$/);
+        const css = hasText ? hasText[1] || '*' : selector;
+        const expected = hasText ? normalize(hasText[3]).toLowerCase() : null;
+        const candidates = hasText || visible
+            ? Array.from(document.querySelectorAll(css))
+            : [document.querySelector(css)].filter(Boolean);
+        return candidates.some((element) => (
+            (!visible || isVisible(element))
+            && (expected === null || normalize(nodeText(element)).toLowerCase().includes(expected))
+        ));
+    };
+
+    const matched = {};
+    const unsupported = [];
+    for (const [name, selectors] of Object.entries(groups || {})) {
+        matched[name] = null;
+        for (const selector of selectors || []) {
+            try {
+                if (matches(selector)) {
+                    matched[name] = selector;
+                    break;
+                }
+            } catch (e) {
+                unsupported.push(selector);
+            }
+        }
+    }
+
+    const links = [];
+    const keywords = (linkKeywords || []).map((keyword) => String(keyword).toLowerCase());
+    if (keywords.length) {
+        for (const anchor of document.querySelectorAll('a')) {
+            const text = normalize(anchor.innerText || anchor.textContent);
+            const href = (anchor.getAttribute('href') || '').trim();
+            const haystack = `${text} ${href}`.toLowerCase();
+            if (keywords.some((keyword) => haystack.includes(keyword))) {
+                links.push({ text, href });
+                if (links.length >= 50) {
+                    break;
+                }
+            }
+        }
+    }
+    return {
+        matched,
+        unsupported,
+        links,
+        url: location.href,
+        title: document.title || '',
+        readyState: document.readyState,
+    };
+}
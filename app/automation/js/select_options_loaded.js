@@ -0,0 +1,7 @@
+(selectors) => {
+    // منوی وابسته وقتی بارگذاری شده است که به جز گزینه راهنما گزینه دیگری داشته باشد
+    return selectors.some((selector) => {
+        const select = document.querySelector(selector);
+        return !!select && (select.options || select.querySelectorAll('option')).length > 1;
+    });
+}
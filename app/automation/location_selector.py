@@ -3,11 +3,19 @@
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 from playwright.async_api import Page
 import logging
 
+from app.automation.gazetteer import get_gazetteer
+from app.automation.geocode_cache import geocode_cache
 from app.automation.map_controller import MapController, GeoCoordinate
+from app.automation.option_catalog import option_catalog
+from app.automation.route_cache import RouteKey, route_cache
+from app.core.config import utcms_config
+from app.core.http_client import http_clients
+from app.core.geo import estimate_duration_min, haversine_km
+from app.core.text import best_option_match
 from app.core.exceptions import LocationSelectionError
 from app.automation.script_loader import script_loader
 from app.automation.selectors import LocationSelectors
@@ -159,7 +167,8 @@ class LocationSelector:
             province_selectors = selectors["province"]
             province_selected = await self._select_from_options(
                 province_selectors,
-                location_data.get("province", "")
+                location_data.get("province", ""),
+                level="province",
             )
 
             if not province_selected:
@@ -169,13 +178,19 @@ class LocationSelector:
                     "error": "انتخاب استان با شکست مواجه شد"
                 }
 
-            await asyncio.sleep(0.5)  # انتظار برای بارگذاری شهرها
+            # اگر فهرست شهرهای این استان در کاتالوگ باشد، به جای تاخیر ثابت
+            # تا ظاهر شدن همان گزینه در منوی شهر صبر می‌شود
+            city_parents = self._catalog_parents(province_selected)
+            if not option_catalog.knows("city", city_parents):
+                await asyncio.sleep(0.5)  # انتظار برای بارگذاری شهرها
 
             # انتخاب شهر
             city_selectors = selectors["city"]
             city_selected = await self._select_from_options(
                 city_selectors,
-                location_data.get("city", "")
+                location_data.get("city", ""),
+                level="city",
+                parents=city_parents,
             )
 
             if not city_selected:
@@ -185,13 +200,17 @@ class LocationSelector:
                     "error": "انتخاب شهر با شکست مواجه شد"
                 }
 
-            await asyncio.sleep(0.5)  # انتظار برای بارگذاری مناطق
+            district_parents = self._catalog_parents(province_selected, city_selected)
+            if location_data.get("district") and not option_catalog.knows("district", district_parents):
+                await asyncio.sleep(0.5)  # انتظار برای بارگذاری مناطق
 
             # انتخاب منطقه (اختیاری)
             district_selectors = selectors["district"]
             await self._select_from_options(
                 district_selectors,
-                location_data.get("district", "")
+                location_data.get("district", ""),
+                level="district",
+                parents=district_parents,
             )
 
             # پر کردن آدرس متنی اگر وجود داشته باشد
@@ -268,43 +287,108 @@ class LocationSelector:
         except Exception as e:
             return {"success": False, "method": "autocomplete", "error": str(e)}
 
+    @staticmethod
+    def _catalog_parents(*selected: Any) -> Optional[Tuple[str, ...]]:
+        """مقادیر والد برای کلید کاتالوگ؛ اگر مقدار انتخاب‌شده معلوم نباشد None"""
+        if not all(isinstance(value, str) for value in selected):
+            return None
+        return tuple(selected)
+
     async def _select_from_options(
         self,
         selectors: List[str],
-        value: str
-    ) -> bool:
-        """انتخاب گزینه از منوی کشویی بر اساس متن یا مقدار"""
+        value: str,
+        level: Optional[str] = None,
+        parents: Optional[Sequence[str]] = (),
+    ) -> Optional[str]:
+        """
+        انتخاب گزینه از منوی کشویی بر اساس متن یا مقدار
 
+        گزینه‌ها با یک فراخوانی eval_on_selector خوانده می‌شوند و تطبیق (نرمال‌سازی فارسی و
+        رتبه‌بندی فازی) در پایتون انجام می‌شود؛ سپس فقط یک select_option ارسال می‌شود.
+        با مشخص بودن level، فهرست خوانده‌شده در کاتالوگ گزینه‌ها ثبت می‌شود و دفعات بعد
+        مقدار گزینه مستقیما از کاتالوگ انتخاب می‌شود.
+
+        Returns:
+            مقدار (value) گزینه انتخاب‌شده یا None
+        """
+        if not value or not str(value).strip():
+            return None
+
+        use_catalog = level is not None and parents is not None
+        if use_catalog:
+            selected = await self._select_from_catalog(selectors, value, level, parents)
+            if selected:
+                return selected
+            if parents:
+                # با کاتالوگ گرم تاخیر ثابت رد شده است؛ پیش از خواندن فهرست باید
+                # منوی وابسته پر شده باشد تا گزینه راهنما در کاتالوگ ثبت نشود
+                await self._wait_for_dependent_options(selectors)
+
+        script = script_loader.load("extract_select_options")
         for selector in selectors:
             try:
-                # بررسی وجود عنصر
-                element = await self.page.query_selector(selector)
-                if not element:
-                    continue
+                options = await self.page.eval_on_selector(selector, script)
+            except Exception:
+                continue
+            if not isinstance(options, list):
+                continue
 
-                # دریافت تمام گزینه‌ها
-                options = await self.page.query_selector_all(f'{selector} option')
+            if use_catalog:
+                option_catalog.record(level, parents, options)
+                option_catalog.remember_selector(selectors, selector)
 
-                for option in options:
-                    option_text = await option.text_content()
-                    option_value = await option.get_attribute('value')
+            match = best_option_match(value, options)
+            if not match:
+                continue
 
-                    if value in (option_text or "") or value in (option_value or ""):
-                        await self.page.select_option(selector, value=option_value)
-                        return True
+            try:
+                await self.page.select_option(selector, value=match[1])
+                return match[1]
+            except Exception:
+                continue
 
-                # تلاش برای تطابق جزئی
-                for option in options:
-                    option_text = await option.text_content() or ""
-                    if value in option_text or option_text in value:
-                        option_value = await option.get_attribute('value')
-                        await self.page.select_option(selector, value=option_value)
-                        return True
+        return None
 
-            except Exception as e:
-                continue
+    async def _wait_for_dependent_options(self, selectors: List[str]) -> None:
+        """انتظار تا بارگذاری گزینه‌های منوی وابسته (بیش از گزینه راهنما)"""
+        script = script_loader.load("select_options_loaded")
+        try:
+            await self.page.wait_for_function(
+                script,
+                arg=list(selectors),
+                timeout=utcms_config.OPTION_CATALOG_WAIT_MS,
+            )
+        except Exception:
+            # منو ممکن است واقعا خالی باشد؛ خواندن فهرست تصمیم نهایی را می‌گیرد
+            pass
 
-        return False
+    async def _select_from_catalog(
+        self,
+        selectors: List[str],
+        value: str,
+        level: str,
+        parents: Sequence[str],
+    ) -> Optional[str]:
+        selector = option_catalog.preferred_selector(selectors)
+        option_value = option_catalog.resolve(level, parents, value) if selector else None
+        if not selector or not option_value:
+            return None
+
+        escaped = option_value.replace("\\", "\\\\").replace('"', '\\"')
+        try:
+            # منوی وابسته با AJAX پر می‌شود؛ فقط تا اضافه شدن همین گزینه صبر می‌کنیم
+            await self.page.wait_for_selector(
+                f'{selector} option[value="{escaped}"]',
+                state="attached",
+                timeout=utcms_config.OPTION_CATALOG_WAIT_MS,
+            )
+            await self.page.select_option(selector, value=option_value)
+            return option_value
+        except Exception:
+            # فهرست سایت تغییر کرده است؛ با خواندن دوباره صفحه بازسازی می‌شود
+            option_catalog.invalidate(level, parents)
+            return None
 
     async def _find_map_search_input(self, prefix: str) -> Optional[str]:
         """یافتن انتخابگر ورودی جستجوی نقشه"""
@@ -321,42 +405,62 @@ class LocationSelector:
 
         return None
 
+    async def resolve_coordinates(self, location_data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        """مختصات مکان: مقدار داده‌شده در درخواست یا نتیجه ژئوکد (بدون مراجعه به صفحه)"""
+        coordinates = location_data.get("coordinates")
+        if coordinates:
+            return coordinates
+        if not (location_data.get("city") or location_data.get("province") or location_data.get("address")):
+            return None
+        return await self._geocode_address(location_data)
+
     async def _geocode_address(self, location_data: Dict[str, Any]) -> Optional[Dict[str, float]]:
         """
-        تبدیل آدرس به مختصات با استفاده از سرویس خارجی
+        تبدیل آدرس به مختصات: ابتدا گزتیر آفلاین، سپس (در صورت فعال بودن) سرویس خارجی
         """
-        import aiohttp
+        coordinates = get_gazetteer().geocode(location_data)
+        if coordinates:
+            return coordinates
+
+        if not utcms_config.GEOCODE_REMOTE_FALLBACK:
+            return None
 
+        return await geocode_cache.get_or_fetch(
+            location_data,
+            lambda: self._geocode_remote(location_data),
+        )
+
+    async def _geocode_remote(self, location_data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        """
+        تبدیل آدرس به مختصات با استفاده از سرویس خارجی (Nominatim)
+
+        None فقط یعنی سرویس پاسخ داد و آدرسی پیدا نکرد؛ خطاهای انتقال و پاسخ‌های غیر 200
+        به صورت استثنا بالا می‌روند تا در کش ژئوکد به عنوان «یافت نشد» ثبت نشوند.
+        """
         address = f"{location_data.get('city', '')}, {location_data.get('address', '')}, Iran"
 
-        try:
-            # استفاده از Nominatim (OpenStreetMap)
-            async with aiohttp.ClientSession() as session:
-                url = "https://nominatim.openstreetmap.org/search"
-                params = {
-                    "q": address,
-                    "format": "json",
-                    "limit": 1
-                }
-                headers = {
-                    "User-Agent": "UTCMS-Automation/1.0"
-                }
+        # استفاده از Nominatim (OpenStreetMap) با نشست مشترک و اتصال ماندگار
+        session = http_clients.session("geocode")
+        url = utcms_config.GEOCODE_REMOTE_URL
+        params = {
+            "q": address,
+            "format": "json",
+            "limit": 1
+        }
+        headers = {
+            "User-Agent": "UTCMS-Automation/1.0"
+        }
 
-                async with session.get(url, params=params, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data:
-                            return {
-                                "lat": float(data[0]["lat"]),
-                                "lng": float(data[0]["lon"])
-                            }
-        except Exception as e:
-            logger.warning(
-                "geocoding_failed",
-                extra={"extra_fields": {"address": address, "error": str(e)}},
-            )
+        async with session.get(url, params=params, headers=headers) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
 
-        return None
+        if not data:
+            return None
+        return {
+            "lat": float(data[0]["lat"]),
+            "lng": float(data[0]["lon"])
+        }
 
 
 class RouteCalculator:
@@ -373,9 +477,15 @@ class RouteCalculator:
         """
         محاسبه مسافت و زمان بین دو نقطه
 
-        استفاده از جاوااسکریپت برای محاسبه یا استخراج از صفحه
+        استفاده از جاوااسکریپت برای محاسبه یا استخراج از صفحه؛ نتیجه مسیرهای تکراری از
+        کش مسیر (مختصات گردشده) خوانده می‌شود و به صفحه مراجعه نمی‌شود
         """
 
+        cache_key = self._cache_key(origin, destination)
+        cached = route_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         script = script_loader.load("calculate_distance")
 
         try:
@@ -385,34 +495,43 @@ class RouteCalculator:
                 "destLat": destination.latitude,
                 "destLng": destination.longitude
             })
+            if result and isinstance(result, dict):
+                # نتیجه ماتریس فاصله گوگل روش را مشخص نمی‌کند
+                result.setdefault("method", "google_distance_matrix")
+                # هاورسین جاوااسکریپتی ارزان است و نباید جای مسیر واقعی را در کش بگیرد
+                if result["method"] == "google_distance_matrix":
+                    route_cache.put(cache_key, result)
             return result or {}
         except:
             # محاسبه با استفاده از پایتون
             return self._calculate_haversine(origin, destination)
 
+    def cached_route(
+        self,
+        origin: GeoCoordinate,
+        destination: GeoCoordinate
+    ) -> Optional[Dict[str, Any]]:
+        """نتیجه مسیر از کش، بدون مراجعه به صفحه"""
+        return route_cache.get(self._cache_key(origin, destination))
+
+    @staticmethod
+    def _cache_key(origin: GeoCoordinate, destination: GeoCoordinate) -> RouteKey:
+        return route_cache.key(
+            origin.latitude, origin.longitude, destination.latitude, destination.longitude
+        )
+
     def _calculate_haversine(
         self,
         origin: GeoCoordinate,
         destination: GeoCoordinate
     ) -> Dict[str, Any]:
         """محاسبه فاصله با استفاده از فرمول هاورسین"""
-        import math
-
-        R = 6371  # شعاع زمین به کیلومتر
-
-        lat1 = math.radians(origin.latitude)
-        lat2 = math.radians(destination.latitude)
-        dlat = math.radians(destination.latitude - origin.latitude)
-        dlon = math.radians(destination.longitude - origin.longitude)
-
-        a = (math.sin(dlat/2) * math.sin(dlat/2) +
-             math.cos(lat1) * math.cos(lat2) *
-             math.sin(dlon/2) * math.sin(dlon/2))
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance = R * c
+        distance = haversine_km(
+            origin.latitude, origin.longitude, destination.latitude, destination.longitude
+        )
 
-        # تخمین زمان
-        duration_min = (distance / 60) * 60  # فرض ۶۰ کیلومتر بر ساعت
+        # تخمین زمان (فرض ۶۰ کیلومتر بر ساعت)
+        duration_min = estimate_duration_min(distance)
 
         return {
             "distance": f"{distance:.2f} km",
@@ -0,0 +1,111 @@
+"""Find the working UTCMS login URL with concurrent plain-HTTP probes.
+
+Each candidate URL is fetched with the shared aiohttp session and its HTML is
+checked for a password input. The first candidate (in priority order) that serves
+a login form is remembered for the life of the process, so the browser navigates
+straight to it instead of trying candidates one by one. A probe that finds no form
+(e.g. the form is rendered by JavaScript or plain HTTP is blocked) is also
+remembered for ``LOGIN_PROBE_RETRY_SECONDS``, so logins do not pay for it again.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Callable, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.core.config import utcms_config
+from app.core.http_client import http_clients
+
+logger = logging.getLogger(__name__)
+
+_PASSWORD_INPUT_RE = re.compile(r"<input\b[^>]*\btype\s*=\s*[\"']?password\b", re.IGNORECASE)
+_FORM_RE = re.compile(r"<form\b", re.IGNORECASE)
+
+
+def looks_like_login_form(html: str) -> bool:
+    return bool(html and _FORM_RE.search(html) and _PASSWORD_INPUT_RE.search(html))
+
+
+class LoginUrlProbe:
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._known_url: Optional[str] = None
+        self._failed_until = 0.0
+        self._lock = asyncio.Lock()
+        self.probes = 0
+
+    @property
+    def known_url(self) -> Optional[str]:
+        return self._known_url
+
+    def forget(self, url: Optional[str] = None) -> None:
+        """Drop the remembered URL (e.g. the browser did not find a form there)."""
+        if url is None or url == self._known_url:
+            self._known_url = None
+
+    async def resolve(self, candidates: Sequence[str]) -> Optional[str]:
+        """The remembered login URL, probing ``candidates`` concurrently on first use.
+
+        After a failed probe ``None`` is returned without probing until the retry
+        interval has passed.
+        """
+        if self._known_url or self._clock() < self._failed_until:
+            return self._known_url
+        async with self._lock:
+            if self._known_url or self._clock() < self._failed_until:
+                return self._known_url
+            self._known_url = await self._probe(list(candidates))
+            if self._known_url is None:
+                self._failed_until = self._clock() + max(0.0, utcms_config.LOGIN_PROBE_RETRY_SECONDS)
+            return self._known_url
+
+    async def _probe(self, candidates: List[str]) -> Optional[str]:
+        if not candidates:
+            return None
+        self.probes += 1
+        tasks = [asyncio.create_task(self._fetch_login_form(url)) for url in candidates]
+        try:
+            # Await in priority order: a match on an earlier candidate wins even when a
+            # later one answers first, and no later response is waited for.
+            for url, task in zip(candidates, tasks):
+                found = await task
+                if found:
+                    logger.info(
+                        "login_url_resolved",
+                        extra={"extra_fields": {"candidate": url, "url": found}},
+                    )
+                    return found
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.warning("login_url_probe_failed", extra={"extra_fields": {"candidates": candidates}})
+        return None
+
+    async def _fetch_login_form(self, url: str) -> Optional[str]:
+        """Final URL (after redirects on the same host) when it serves a login form."""
+        timeout = aiohttp.ClientTimeout(total=max(0.5, utcms_config.LOGIN_PROBE_TIMEOUT_SECONDS))
+        try:
+            session = http_clients.session("utcms")
+            async with session.get(url, timeout=timeout, allow_redirects=True) as resp:
+                if resp.status != 200:
+                    return None
+                html = await resp.text(errors="ignore")
+                final_url = str(resp.url)
+        except Exception as exc:
+            logger.debug("login_url_probe_error", extra={"extra_fields": {"url": url, "error": str(exc)}})
+            return None
+
+        if not looks_like_login_form(html):
+            return None
+        if urlsplit(final_url).netloc != urlsplit(url).netloc:
+            return url
+        return final_url
+
+
+login_url_probe = LoginUrlProbe()
@@ -4,10 +4,14 @@
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List
+import time
+import weakref
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
+from urllib.parse import urlsplit
 from playwright.async_api import Page
 
+from app.core.config import utcms_config
 from app.core.exceptions import MapInteractionError
 from app.automation.script_loader import script_loader
 
@@ -37,6 +41,115 @@ class MapSelection:
     route_polyline: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class MapDetection:
+    """نتیجه تشخیص یکجای نقشه در صفحه"""
+    map_type: str
+    version: Optional[str] = None
+    selector: Optional[str] = None
+    instance: Optional[str] = None
+
+    @classmethod
+    def from_script_result(cls, result: Any) -> Optional["MapDetection"]:
+        if not isinstance(result, dict) or not result.get("library"):
+            return None
+        return cls(
+            map_type=str(result["library"]),
+            version=result.get("version") or None,
+            selector=result.get("selector") or None,
+            instance=result.get("instance") or None,
+        )
+
+
+class MapDetectionCache:
+    """
+    کش نتیجه تشخیص نقشه
+
+    دو سطح دارد: برای هر صفحه (تا زمانی که آدرس صفحه عوض نشده) و برای هر مسیر URL
+    بین درخواست‌ها با TTL. فقط تشخیص‌های موفق ذخیره می‌شوند، چون نقشه ممکن است دیرتر بارگذاری شود؛
+    unknown_map (کانتینر پیدا شده ولی کتابخانه هنوز بارگذاری نشده) فقط برای همان صفحه نگه داشته می‌شود.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_paths: int = 64):
+        self._ttl_seconds = ttl_seconds
+        self._max_paths = max_paths
+        self._by_page: "weakref.WeakKeyDictionary[Any, Tuple[str, MapDetection]]" = weakref.WeakKeyDictionary()
+        self._by_path: Dict[str, Tuple[float, MapDetection]] = {}
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return utcms_config.MAP_DETECTION_CACHE_TTL_SECONDS
+
+    @staticmethod
+    def _page_url(page: Any) -> Optional[str]:
+        url = getattr(page, "url", None)
+        return url if isinstance(url, str) else None
+
+    @staticmethod
+    def _url_path(url: Optional[str]) -> Optional[str]:
+        if not url:
+            return None
+        parts = urlsplit(url)
+        if not parts.netloc:
+            return None
+        return f"{parts.netloc}{parts.path}".lower()
+
+    def get(self, page: Any) -> Optional[MapDetection]:
+        url = self._page_url(page)
+        try:
+            cached = self._by_page.get(page)
+        except TypeError:
+            cached = None
+        if cached and cached[0] == url:
+            return cached[1]
+
+        path = self._url_path(url)
+        if path and self.ttl_seconds > 0:
+            entry = self._by_path.get(path)
+            if entry:
+                expires_at, detection = entry
+                if expires_at > time.monotonic():
+                    self._remember_page(page, url, detection)
+                    return detection
+                self._by_path.pop(path, None)
+        return None
+
+    def put(self, page: Any, detection: MapDetection) -> None:
+        url = self._page_url(page)
+        self._remember_page(page, url, detection)
+
+        path = self._url_path(url)
+        if path and self.ttl_seconds > 0 and detection.map_type != "unknown_map":
+            self._by_path.pop(path, None)
+            self._by_path[path] = (time.monotonic() + self.ttl_seconds, detection)
+            while len(self._by_path) > self._max_paths:
+                self._by_path.pop(next(iter(self._by_path)))
+
+    def invalidate(self, page: Any) -> None:
+        try:
+            self._by_page.pop(page, None)
+        except TypeError:
+            pass
+        path = self._url_path(self._page_url(page))
+        if path:
+            self._by_path.pop(path, None)
+
+    def clear(self) -> None:
+        self._by_page.clear()
+        self._by_path.clear()
+
+    def _remember_page(self, page: Any, url: Optional[str], detection: MapDetection) -> None:
+        try:
+            self._by_page[page] = (url, detection)
+        except TypeError:
+            pass
+
+
+map_detection_cache = MapDetectionCache()
+
+
 class MapController:
     """کنترلر تعامل با نقشه برای انتخاب مبدا و مقصد بارنامه"""
 
@@ -56,58 +169,32 @@ class MapController:
         self.page = page
         self.map_type = None
         self.map_selector: Optional[str] = None
+        self.detection: Optional[MapDetection] = None
 
-    async def detect_map_type(self) -> Optional[str]:
+    async def detect_map_type(self, use_cache: bool = True) -> Optional[str]:
         """
         تشخیص نوع نقشه مورد استفاده
 
+        کتابخانه، نسخه، کانتینر و محل نمونه نقشه با یک فراخوانی evaluate خوانده می‌شود
+        و نتیجه برای همین صفحه و همین مسیر URL کش می‌شود.
+
         Returns:
-            نوع نقشه: 'google_maps', 'openlayers', 'leaflet', 'mapbox' یا None
+            نوع نقشه: 'google_maps', 'openlayers', 'leaflet', 'mapbox', 'unknown_map' یا None
         """
-        # بررسی وجود Google Maps
-        has_google = await self.page.evaluate("""
-            () => typeof google !== 'undefined' &&
-                 typeof google.maps !== 'undefined'
-        """)
-        if has_google:
-            self.map_type = 'google_maps'
-            return 'google_maps'
-
-        # بررسی وجود OpenLayers
-        has_ol = await self.page.evaluate("""
-            () => typeof ol !== 'undefined' &&
-                 typeof ol.Map !== 'undefined'
-        """)
-        if has_ol:
-            self.map_type = 'openlayers'
-            return 'openlayers'
-
-        # بررسی وجود Leaflet
-        has_leaflet = await self.page.evaluate("""
-            () => typeof L !== 'undefined' &&
-                 typeof L.Map !== 'undefined'
-        """)
-        if has_leaflet:
-            self.map_type = 'leaflet'
-            return 'leaflet'
-
-        # بررسی وجود Mapbox
-        has_mapbox = await self.page.evaluate("""
-            () => typeof mapboxgl !== 'undefined'
-        """)
-        if has_mapbox:
-            self.map_type = 'mapbox'
-            return 'mapbox'
-
-        # بررسی وجود کانتینر نقشه با انتخابگرهای رایج
-        for selector in self.MAP_CONTAINER_SELECTORS:
-            element = await self.page.query_selector(selector)
-            if element:
-                self.map_selector = selector
-                self.map_type = "unknown_map"
-                return 'unknown_map'
-
-        return None
+        detection = map_detection_cache.get(self.page) if use_cache else None
+        if detection is None:
+            script = script_loader.load("detect_map")
+            result = await self.page.evaluate(script, list(self.MAP_CONTAINER_SELECTORS))
+            detection = MapDetection.from_script_result(result)
+            if detection is None:
+                return None
+            map_detection_cache.put(self.page, detection)
+
+        self.detection = detection
+        self.map_type = detection.map_type
+        if detection.selector:
+            self.map_selector = detection.selector
+        return detection.map_type
 
     async def _resolve_map_selector(self, preferred_selector: Optional[str] = None) -> Optional[str]:
         """Resolve a usable map selector with runtime discovery fallback."""
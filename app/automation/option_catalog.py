@@ -0,0 +1,123 @@
+"""
+کاتالوگ گزینه‌های منوهای آبشاری استان ← شهر ← منطقه
+
+اولین بار که فهرست گزینه‌های یک منو (به ازای مقدار والد) خوانده می‌شود، متن و مقدار
+گزینه‌ها ثبت می‌شود. در درخواست‌های بعدی مقدار گزینه از کاتالوگ پیدا می‌شود و فقط تا
+زمان ظاهر شدن همان گزینه در منوی وابسته صبر می‌شود. فهرست‌ها پس از
+OPTION_CATALOG_REVALIDATE_SECONDS دوباره از صفحه خوانده می‌شوند.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import utcms_config
+from app.core.text import best_option_match
+
+CatalogKey = Tuple[str, Tuple[str, ...]]
+
+
+@dataclass
+class CatalogEntry:
+    options: List[Tuple[str, str]]
+    observed_at: float
+
+
+class OptionCatalog:
+    """نگهداری فهرست گزینه‌ها به ازای (سطح، مقادیر والد) و انتخابگر کارا برای هر منو"""
+
+    def __init__(
+        self,
+        revalidate_seconds: Optional[float] = None,
+        max_lists: int = 2000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._revalidate_seconds = revalidate_seconds
+        self._max_lists = max_lists
+        self._clock = clock
+        self._lists: "OrderedDict[CatalogKey, CatalogEntry]" = OrderedDict()
+        self._selectors: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def revalidate_seconds(self) -> float:
+        if self._revalidate_seconds is not None:
+            return self._revalidate_seconds
+        return utcms_config.OPTION_CATALOG_REVALIDATE_SECONDS
+
+    def _fresh_entry(self, level: str, parents: Optional[Sequence[str]]) -> Optional[CatalogEntry]:
+        if parents is None:
+            return None
+        key = (level, tuple(parents))
+        entry = self._lists.get(key)
+        if entry is None:
+            return None
+        if self._clock() - entry.observed_at >= self.revalidate_seconds:
+            self._lists.pop(key, None)
+            return None
+        self._lists.move_to_end(key)
+        return entry
+
+    def knows(self, level: str, parents: Optional[Sequence[str]]) -> bool:
+        return self._fresh_entry(level, parents) is not None
+
+    def resolve(self, level: str, parents: Sequence[str], target: str) -> Optional[str]:
+        """
+        مقدار گزینه متناظر با target در صورت وجود فهرست تازه برای این والد
+
+        اگر فهرست ثبت‌شده گزینه‌ای برای target نداشته باشد، فهرست کهنه فرض شده و حذف
+        می‌شود تا با خواندن دوباره صفحه بازسازی شود.
+        """
+        entry = self._fresh_entry(level, parents)
+        match = best_option_match(target, entry.options) if entry else None
+        if match is None:
+            if entry is not None:
+                self.invalidate(level, parents)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return match[1]
+
+    def lookup(self, level: str, parents: Sequence[str], target: str) -> Optional[str]:
+        """مانند resolve ولی بدون ثبت در آمار؛ برای اعتبارسنجی پیش از باز کردن صفحه"""
+        entry = self._fresh_entry(level, parents)
+        match = best_option_match(target, entry.options) if entry else None
+        return match[1] if match else None
+
+    def record(self, level: str, parents: Sequence[str], options: Sequence[Sequence[str]]) -> None:
+        cleaned = [
+            (str(option[0] or ""), str(option[1] or ""))
+            for option in options
+            if len(option) >= 2 and str(option[1] or "").strip()
+        ]
+        if not cleaned:
+            return
+        key = (level, tuple(parents))
+        self._lists[key] = CatalogEntry(options=cleaned, observed_at=self._clock())
+        self._lists.move_to_end(key)
+        while len(self._lists) > self._max_lists:
+            self._lists.popitem(last=False)
+
+    def invalidate(self, level: str, parents: Sequence[str]) -> None:
+        self._lists.pop((level, tuple(parents)), None)
+
+    def preferred_selector(self, selectors: Sequence[str]) -> Optional[str]:
+        return self._selectors.get(selectors[0]) if selectors else None
+
+    def remember_selector(self, selectors: Sequence[str], selector: str) -> None:
+        if selectors:
+            self._selectors[selectors[0]] = selector
+
+    def clear(self) -> None:
+        self._lists.clear()
+        self._selectors.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"lists": len(self._lists), "hits": self.hits, "misses": self.misses}
+
+
+option_catalog = OptionCatalog()
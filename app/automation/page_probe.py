@@ -0,0 +1,191 @@
+"""Check many selectors against a page in one browser round trip.
+
+``probe_selectors`` sends named groups of selectors to ``probe_selectors.js``, which
+returns the first matching selector of every group. Playwright ``text=`` markers
+and trailing ``:has-text()`` filters are evaluated as text searches in the page,
+skipping script and style text like Playwright's text engine;
+anything else the browser cannot parse is reported back and checked with
+``query_selector``. Pages that cannot evaluate scripts fall back to the old
+one-selector-per-call loop. ``snapshot_page`` adds the page title, URL and
+keyword-matching links to the same call, for classifying a page from one look.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from playwright.async_api import Page
+
+from app.automation.script_loader import script_loader
+
+logger = logging.getLogger(__name__)
+
+PROBE_POLL_SECONDS = 0.1
+
+ProbeResult = Dict[str, Optional[str]]
+
+
+@dataclass
+class PageSnapshot:
+    url: str = ""
+    title: str = ""
+    matched: ProbeResult = field(default_factory=dict)
+    links: List[Dict[str, str]] = field(default_factory=list)
+    # document.readyState; empty when the page could not be asked
+    ready_state: str = ""
+
+    @property
+    def loading(self) -> bool:
+        return self.ready_state not in ("", "complete")
+
+    def has(self, group: str) -> bool:
+        return bool(self.matched.get(group))
+
+
+async def probe_selectors(
+    page: Page,
+    groups: Mapping[str, Iterable[str]],
+    visible: bool = False,
+    timeout_ms: int = 0,
+) -> ProbeResult:
+    """
+    First matching selector (or None) for every named group.
+
+    With ``timeout_ms`` the page is re-probed until every group matched or the
+    timeout passed; the wait is shared by all groups instead of paid per selector.
+    """
+    groups = {name: list(selectors) for name, selectors in groups.items()}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0, timeout_ms) / 1000
+
+    while True:
+        raw = await _evaluate(page, groups, visible)
+        if raw is None:
+            return await _probe_one_by_one(page, groups, visible, timeout_ms)
+
+        result = await _resolve_matches(page, groups, raw, visible)
+        if all(result.values()) or loop.time() >= deadline:
+            return result
+        await asyncio.sleep(PROBE_POLL_SECONDS)
+
+
+async def first_match(
+    page: Page,
+    selectors: Iterable[str],
+    visible: bool = False,
+    timeout_ms: int = 0,
+) -> Optional[str]:
+    """First selector of ``selectors`` present on the page."""
+    result = await probe_selectors(page, {"match": selectors}, visible=visible, timeout_ms=timeout_ms)
+    return result["match"]
+
+
+async def snapshot_page(
+    page: Page,
+    groups: Mapping[str, Iterable[str]],
+    link_keywords: Sequence[str] = (),
+) -> PageSnapshot:
+    """Matched groups, title, URL, ready state and links containing ``link_keywords`` in one call."""
+    groups = {name: list(selectors) for name, selectors in groups.items()}
+    raw = await _evaluate(page, groups, False, link_keywords)
+    if raw is None:
+        return PageSnapshot(
+            url=str(getattr(page, "url", "") or ""),
+            title=await _safe_title(page),
+            matched=await _probe_one_by_one(page, groups, False, 0),
+        )
+
+    links = [
+        {"text": str(link.get("text") or ""), "href": str(link.get("href") or "")}
+        for link in raw.get("links") or []
+        if isinstance(link, dict)
+    ]
+    return PageSnapshot(
+        url=str(raw.get("url") or ""),
+        title=str(raw.get("title") or ""),
+        matched=await _resolve_matches(page, groups, raw, False),
+        links=links,
+        ready_state=str(raw.get("readyState") or ""),
+    )
+
+
+async def _evaluate(
+    page: Page,
+    groups: Dict[str, List[str]],
+    visible: bool,
+    link_keywords: Sequence[str] = (),
+) -> Optional[Dict[str, Any]]:
+    payload = {"groups": groups, "visible": visible, "linkKeywords": list(link_keywords)}
+    try:
+        raw = await page.evaluate(script_loader.load("probe_selectors"), payload)
+    except Exception as exc:
+        logger.debug("page_probe_evaluate_failed", extra={"extra_fields": {"error": str(exc)}})
+        return None
+
+    if not isinstance(raw, dict) or not isinstance(raw.get("matched"), dict):
+        return None
+    return raw
+
+
+async def _resolve_matches(
+    page: Page,
+    groups: Dict[str, List[str]],
+    raw: Dict[str, Any],
+    visible: bool,
+) -> ProbeResult:
+    matched = raw["matched"]
+    unsupported = set(raw.get("unsupported") or [])
+    result: ProbeResult = {}
+    for name, selectors in groups.items():
+        result[name] = None
+        # Selectors are tried in priority order: an unsupported selector ahead of the
+        # script's match is checked first and wins if present.
+        for selector in selectors:
+            if selector == matched.get(name) or (
+                selector in unsupported and await _query(page, selector, visible)
+            ):
+                result[name] = selector
+                break
+    return result
+
+
+async def _safe_title(page: Page) -> str:
+    try:
+        title = await page.title()
+    except Exception:
+        return ""
+    return title if isinstance(title, str) else ""
+
+
+async def _query(page: Page, selector: str, visible: bool) -> bool:
+    try:
+        element = await page.query_selector(selector)
+        if element and visible:
+            return bool(await element.is_visible())
+        return bool(element)
+    except Exception:
+        return False
+
+
+async def _probe_one_by_one(
+    page: Page,
+    groups: Dict[str, List[str]],
+    visible: bool,
+    timeout_ms: int,
+) -> ProbeResult:
+    result: ProbeResult = {}
+    for name, selectors in groups.items():
+        result[name] = None
+        for selector in selectors:
+            try:
+                if visible:
+                    element = await page.wait_for_selector(selector, state="visible", timeout=max(1, timeout_ms))
+                else:
+                    element = await page.query_selector(selector)
+            except Exception:
+                continue
+            if element:
+                result[name] = selector
+                break
+    return result
@@ -9,6 +9,13 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
+from app.automation.captcha import captcha_stats
+from app.automation.captcha.twocaptcha import solve_time_model
+from app.automation.form_route import form_routes
+from app.automation.geocode_cache import geocode_cache
+from app.automation.option_catalog import option_catalog
+from app.automation.route_cache import route_cache
+from app.automation.session_refresher import session_refresher
 from app.core.config import utcms_config
 from app.core.database import engine
 from app.models import BotStats
@@ -24,6 +31,7 @@ class ReportService:
         self._mode_counters = {
             "safe": {"requests": 0, "success": 0, "failure": 0},
             "full": {"requests": 0, "success": 0, "failure": 0},
+            "validate_only": {"requests": 0, "success": 0, "failure": 0},
         }
         self._error_categories = {
             "auth": 0,
@@ -105,6 +113,13 @@ class ReportService:
             lambda stats: setattr(stats, "failed_attempts", stats.failed_attempts + 1)
         )
 
+    async def record_validation(self, valid: bool) -> None:
+        """درخواست validate_only فقط در شمارنده‌های حالت ثبت می‌شود، نه در آمار روزانه بارنامه"""
+        async with self._op_lock:
+            counters = self._mode_counters["validate_only"]
+            counters["requests"] += 1
+            counters["success" if valid else "failure"] += 1
+
     async def record_map_usage(self, map_type: str):
         def _updater(stats: BotStats):
             if map_type == "google_maps":
@@ -182,6 +197,13 @@ class ReportService:
             },
             "mode_counters": mode_counters,
             "error_categories": error_categories,
+            "geocode_cache": geocode_cache.stats(),
+            "route_cache": route_cache.stats(),
+            "option_catalog": option_catalog.stats(),
+            "form_routes": form_routes.stats(),
+            "session_refresher": session_refresher.stats(),
+            "captcha": captcha_stats.snapshot(),
+            "captcha_solve_time": solve_time_model.snapshot(),
         }
 
     def get_mode_counters(self) -> Dict[str, Dict[str, int]]:
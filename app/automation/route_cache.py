@@ -0,0 +1,92 @@
+"""
+کش نتیجه محاسبه مسیر بر اساس زوج مختصات گردشده مبدا و مقصد
+
+فقط نتیجه ماتریس فاصله گوگل (مسیر جاده‌ای واقعی) همراه با روش محاسبه برای مدت
+ROUTE_CACHE_TTL_SECONDS نگهداری می‌شود تا مسیرهای تکراری هزینه‌ای نداشته باشند؛ هاورسین
+جاوااسکریپتی کش نمی‌شود تا وقتی گوگل در دسترس شد مسیر واقعی محاسبه شود.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import utcms_config
+
+RouteKey = Tuple[float, float, float, float]
+
+
+class RouteCache:
+    """کش LRU با TTL برای نتایج مسیر"""
+
+    def __init__(
+        self,
+        precision: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._precision = precision
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[RouteKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def precision(self) -> int:
+        return self._precision if self._precision is not None else utcms_config.ROUTE_CACHE_PRECISION
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds if self._ttl_seconds is not None else utcms_config.ROUTE_CACHE_TTL_SECONDS
+
+    @property
+    def max_entries(self) -> int:
+        value = self._max_entries if self._max_entries is not None else utcms_config.ROUTE_CACHE_MAX_ENTRIES
+        return max(1, value)
+
+    def key(self, origin_lat: float, origin_lng: float, dest_lat: float, dest_lng: float) -> RouteKey:
+        digits = self.precision
+        return (
+            round(origin_lat, digits),
+            round(origin_lng, digits),
+            round(dest_lat, digits),
+            round(dest_lng, digits),
+        )
+
+    def get(self, key: RouteKey) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, key: RouteKey, result: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0 or not result:
+            return
+        self._entries[key] = (self._clock() + self.ttl_seconds, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+route_cache = RouteCache()
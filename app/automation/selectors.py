@@ -140,3 +140,53 @@ class AuthSelectors:
         ".toast-body",
         ".swal2-html-container",
     )
+    # Login error texts that mean the captcha answer itself was rejected
+    CAPTCHA_ERROR_MARKERS = (
+        "کپچا",
+        "captcha",
+        "کد امنیتی",
+        "کد تصویر",
+        "تصویر امنیتی",
+        "عبارت امنیتی",
+        "حروف تصویر",
+    )
+
+
+class WaybillPageSelectors:
+    """نشانه‌های وضعیت صفحه در مسیر رسیدن به فرم بارنامه"""
+
+    FORM_MARKERS = (
+        'input[name="txtSenderFirstName"]',
+        'input[name="SenderName"]',
+        'input[name="txtReceiverFirstName"]',
+        'input[name="ReceiverName"]',
+        '#btnGoLVL2',
+        '#GoLVL2',
+    )
+    NOT_FOUND_MARKERS = (
+        "text=یافت نشد",
+        "text=صفحه مورد نظر شما یافت نشد",
+        "text=درخواست مجاز نمی باشد",
+        "text=خطا در سامانه",
+        "text=متاسفانه در هنگام پردازش درخواست شما خطایی رخ داده است",
+        "text=ورود مجدد به سامانه",
+    )
+    NOT_FOUND_TITLES = ("یافت نشد", "خطا در سامانه")
+    ERROR_URL_FRAGMENTS = ("/error", "/exception", "/fault")
+    NO_ACCESS_MARKERS = (
+        "text=نامه درخواست دسترسی به سامانه صدور بارنامه شهری",
+    )
+    NO_ACCESS_URL_FRAGMENTS = ("/home/infoindex",)
+    NO_ACCESS_LINK_TEXTS = ("درخواست دسترسی",)
+    # پیوندهای منو که به فرم بارنامه می‌رسند، به ترتیب اولویت
+    FORM_LINK_TEXTS = ("حمل بارنامه", "صدور بارنامه")
+    FORM_LINK_KEYWORDS = ("بارنامه", "waybill")
+    # دکمه‌های صفحه خطا که به خانه یا ورود برمی‌گردند و با کلیک (نه آدرس) کار می‌کنند
+    RECOVERY_ACTIONS = (
+        "a:has-text('ورود مجدد به سامانه')",
+        "button:has-text('ورود مجدد به سامانه')",
+        "a:has-text('بازگشت به خانه')",
+        "button:has-text('بازگشت به خانه')",
+        "a:has-text('بازگشت به صفحه اصلی')",
+        "button:has-text('بازگشت به صفحه اصلی')",
+    )
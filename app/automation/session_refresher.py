@@ -0,0 +1,220 @@
+"""Background re-authentication ahead of UTCMS session expiry.
+
+The refresher watches the expiry of the auth cookies (from the persisted storage
+state, or the pooled contexts when state persistence is off). Shortly before they
+expire it takes a waybill traffic slot, logs in on a spare context, captcha included,
+saves the new storage state and, with context pooling on, hands the context to the
+pool. Requests then start from a valid session instead of waiting on a login and
+captcha round trip.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.automation.auth import UTCMSAuthenticator, auth_cookie_expiry
+from app.automation.browser import browser_manager
+from app.automation.traffic_control import waybill_traffic_controller
+from app.core.config import utcms_config
+
+logger = logging.getLogger(__name__)
+
+
+def storage_state_expiry(path: str) -> Optional[float]:
+    """Earliest auth cookie expiry in a Playwright storage-state file."""
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return auth_cookie_expiry(state.get("cookies") or [])
+
+
+class SessionRefresher:
+    """Keeps a logged-in session ready by re-authenticating before cookies expire."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._last_refresh_at: Optional[float] = None
+        self._lifetime: Optional[float] = None
+        self.session_expires_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        if self.running:
+            return True
+        if not utcms_config.SESSION_REFRESH_ENABLED:
+            return False
+        if not (utcms_config.UTCMS_USERNAME and utcms_config.UTCMS_PASSWORD):
+            logger.warning("session_refresher_disabled", extra={"extra_fields": {"reason": "missing_credentials"}})
+            return False
+        if not (utcms_config.USE_PERSISTENT_AUTH_STATE or utcms_config.BROWSER_CONTEXT_POOLING):
+            # Without a shared state file or pool a refreshed login would not be reused.
+            logger.warning("session_refresher_disabled", extra={"extra_fields": {"reason": "nothing_to_share"}})
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("session_refresh_loop_failed", extra={"extra_fields": {"error": str(exc)}})
+                delay = utcms_config.SESSION_REFRESH_RETRY_SECONDS
+            await asyncio.sleep(max(1.0, delay))
+
+    async def run_once(self) -> float:
+        """Refresh when due and return the number of seconds until the next check."""
+        check = max(1.0, utcms_config.SESSION_REFRESH_CHECK_SECONDS)
+        due, wait = await self._refresh_due()
+        if not due:
+            return min(check, wait) if wait is not None else check
+        if await self.refresh():
+            return check
+        return max(1.0, utcms_config.SESSION_REFRESH_RETRY_SECONDS)
+
+    async def _refresh_due(self):
+        now = self._clock()
+        expires_at = await self._current_expiry()
+        self.session_expires_at = expires_at
+        lead = max(0.0, utcms_config.SESSION_REFRESH_LEAD_SECONDS)
+        if self._lifetime:
+            # Cookies that live shorter than the lead would otherwise trigger back-to-back logins.
+            lead = min(lead, self._lifetime / 2)
+
+        if expires_at is not None:
+            remaining = expires_at - now - lead
+            return remaining <= 0, remaining
+
+        if self._last_refresh_at is None and not await self._has_session():
+            return True, None
+
+        max_age = utcms_config.SESSION_REFRESH_MAX_AGE_SECONDS
+        if max_age > 0:
+            refreshed_at = self._last_refresh_at or self._state_mtime() or now
+            remaining = refreshed_at + max_age - now
+            return remaining <= 0, remaining
+        return False, None
+
+    async def _current_expiry(self) -> Optional[float]:
+        if utcms_config.USE_PERSISTENT_AUTH_STATE:
+            return storage_state_expiry(os.path.abspath(utcms_config.AUTH_STATE_PATH))
+        return await self._pool_expiry()
+
+    async def _pool_expiry(self) -> Optional[float]:
+        expiries = []
+        for context in browser_manager.authenticated_contexts():
+            try:
+                expires = auth_cookie_expiry(await context.cookies())
+            except Exception:
+                continue
+            if expires is not None:
+                expiries.append(expires)
+        return min(expiries) if expiries else None
+
+    async def _has_session(self) -> bool:
+        if utcms_config.USE_PERSISTENT_AUTH_STATE:
+            return os.path.exists(os.path.abspath(utcms_config.AUTH_STATE_PATH))
+        return bool(browser_manager.authenticated_contexts())
+
+    @staticmethod
+    def _state_mtime() -> Optional[float]:
+        try:
+            return os.path.getmtime(os.path.abspath(utcms_config.AUTH_STATE_PATH))
+        except OSError:
+            return None
+
+    async def refresh(self) -> bool:
+        """Log in on a spare context and publish its session; never raises."""
+        async with self._lock:
+            started = time.perf_counter()
+            session_id = None
+            adopted = False
+            try:
+                # The refresh login is UTCMS traffic too, so it is paced like a waybill request.
+                async with waybill_traffic_controller.slot(mode="safe"):
+                    session_id, context = await browser_manager.create_context()
+                    # Start from a clean jar so the login form is shown even while the old session lives.
+                    await context.clear_cookies()
+                    page = await browser_manager.new_page(context)
+                    try:
+                        auth = UTCMSAuthenticator(page, context)
+                        logged_in = await auth.login(utcms_config.UTCMS_USERNAME, utcms_config.UTCMS_PASSWORD)
+                        if logged_in:
+                            await browser_manager.save_auth_state(context)
+                            self.session_expires_at = auth_cookie_expiry(await context.cookies())
+                    finally:
+                        try:
+                            await page.close()
+                        except Exception:
+                            pass
+
+                if not logged_in:
+                    self.failures += 1
+                    logger.warning(
+                        "session_refresh_failed",
+                        extra={"extra_fields": {"reason": auth.last_error}},
+                    )
+                    return False
+
+                adopted = await browser_manager.adopt_context(session_id, context)
+                self.refreshes += 1
+                self._last_refresh_at = self._clock()
+                if self.session_expires_at:
+                    self._lifetime = max(0.0, self.session_expires_at - self._last_refresh_at)
+                logger.info(
+                    "session_refreshed",
+                    extra={
+                        "extra_fields": {
+                            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                            "expires_at": self.session_expires_at,
+                            "pooled": adopted,
+                        }
+                    },
+                )
+                return True
+            except Exception as exc:
+                self.failures += 1
+                logger.warning("session_refresh_failed", extra={"extra_fields": {"error": str(exc)}})
+                return False
+            finally:
+                if session_id is not None and not adopted:
+                    try:
+                        await browser_manager.close_context(session_id)
+                    except Exception:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_refresh_at": self._last_refresh_at,
+            "session_expires_at": self.session_expires_at,
+        }
+
+
+session_refresher = SessionRefresher()
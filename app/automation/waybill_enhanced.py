@@ -6,8 +6,7 @@ import asyncio
 import inspect
 import logging
 import random
-from typing import Dict, Any, Optional
-from urllib.parse import urljoin
+from typing import Dict, Any, Optional, Tuple
 from playwright.async_api import Page, BrowserContext
 
 from app.core.config import utcms_config
@@ -17,6 +16,16 @@ from app.core.utils import resolve_maybe_awaitable
 from app.automation.browser import PageInteractor
 from app.automation.map_controller import MapController, GeoCoordinate
 from app.automation.location_selector import LocationSelector, RouteCalculator
+from app.automation.form_route import (
+    PAGE_STATE_GROUPS,
+    PageState,
+    classify_page,
+    form_link,
+    form_link_click_selector,
+    form_routes,
+)
+from app.automation.page_probe import PageSnapshot, first_match, snapshot_page
+from app.automation.selectors import WaybillPageSelectors
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +33,10 @@ logger = logging.getLogger(__name__)
 class EnhancedWaybillManager:
     """مدیریت بارنامه با پشتیبانی کامل از نقشه و مکان‌یابی"""
 
-    def __init__(self, page: Page, context: BrowserContext):
+    def __init__(self, page: Page, context: BrowserContext, account: Optional[str] = None):
         self.page = page
         self.context = context
+        self.account = account if account is not None else utcms_config.UTCMS_USERNAME
         self.interactor = PageInteractor(page)
         self.map_controller = MapController(page)
         self.location_selector = LocationSelector(page)
@@ -42,16 +52,6 @@ class EnhancedWaybillManager:
             return ""
         return value if isinstance(value, str) else str(value)
 
-    async def _safe_page_title(self) -> str:
-        try:
-            raw_title = await self.page.title()
-            value = await resolve_maybe_awaitable(raw_title)
-        except Exception:
-            value = ""
-        if value is None:
-            return ""
-        return (value if isinstance(value, str) else str(value)).strip()
-
     async def _as_clean_text(self, value: Any) -> str:
         try:
             resolved = await resolve_maybe_awaitable(value)
@@ -113,12 +113,22 @@ class EnhancedWaybillManager:
                 ...
             }
         """
+        # ژئوکد مبدا/مقصد هم‌زمان با بارگذاری صفحه انجام می‌شود تا زمان صفحه فقط صرف DOM شود
+        pre_resolution: Optional[asyncio.Task] = None
+        if utcms_config.WAYBILL_PRE_RESOLVE:
+            pre_resolution = asyncio.create_task(self._pre_resolve_locations(data))
+
         try:
-            # رفتن به صفحه ایجاد بارنامه
-            await self._goto_with_retry(utcms_config.WAYBILL_URL)
-            await asyncio.sleep(2)
+            # رفتن به صفحه ایجاد بارنامه (یا مسیری که آخرین بار برای این حساب به فرم رسید)
+            await self._goto_with_retry(form_routes.route_for(self.account) or utcms_config.WAYBILL_URL)
             await self._ensure_waybill_form_page()
 
+            resolved = await pre_resolution if pre_resolution else {}
+            origin_data = self._with_coordinates(data.get("origin", {}), resolved.get("origin"))
+            destination_data = self._with_coordinates(
+                data.get("destination", {}), resolved.get("destination")
+            )
+
             # پر کردن اطلاعات فرستنده
             await self._fill_sender_info(data.get("sender", {}))
 
@@ -127,7 +137,7 @@ class EnhancedWaybillManager:
 
             # انتخاب مکان مبدا (نقشه ← منوی کشویی ← متن)
             origin_result = await self.location_selector.select_location(
-                data.get("origin", {}),
+                origin_data,
                 origin=True
             )
 
@@ -136,28 +146,33 @@ class EnhancedWaybillManager:
 
             # انتخاب مکان مقصد
             dest_result = await self.location_selector.select_location(
-                data.get("destination", {}),
+                destination_data,
                 origin=False
             )
 
             if not dest_result["success"]:
                 raise WaybillError(f"انتخاب مقصد با شکست مواجه شد: {dest_result}")
 
-            # محاسبه مسیر در صورت وجود مختصات
+            # محاسبه مسیر در صورت وجود مختصات (نتیجه پیش‌محاسبه در صورت تطابق مختصات)
             route_info = None
             if (origin_result.get("coordinates") and
                 dest_result.get("coordinates")):
 
-                route_info = await self.route_calculator.calculate_distance(
-                    GeoCoordinate(
-                        latitude=origin_result["coordinates"]["lat"],
-                        longitude=origin_result["coordinates"]["lng"]
-                    ),
-                    GeoCoordinate(
-                        latitude=dest_result["coordinates"]["lat"],
-                        longitude=dest_result["coordinates"]["lng"]
+                if (resolved.get("route") and
+                        origin_result["coordinates"] == resolved.get("origin") and
+                        dest_result["coordinates"] == resolved.get("destination")):
+                    route_info = resolved["route"]
+                else:
+                    route_info = await self.route_calculator.calculate_distance(
+                        GeoCoordinate(
+                            latitude=origin_result["coordinates"]["lat"],
+                            longitude=origin_result["coordinates"]["lng"]
+                        ),
+                        GeoCoordinate(
+                            latitude=dest_result["coordinates"]["lat"],
+                            longitude=dest_result["coordinates"]["lng"]
+                        )
                     )
-                )
 
             # پر کردن اطلاعات بار
             await self._fill_cargo_info(data.get("cargo", {}))
@@ -199,119 +214,142 @@ class EnhancedWaybillManager:
         except Exception as e:
             await self.interactor.screenshot("waybill_map_error")
             raise WaybillError(f"ایجاد بارنامه با شکست مواجه شد: {str(e)}")
+        finally:
+            if pre_resolution and not pre_resolution.done():
+                pre_resolution.cancel()
 
-    async def _ensure_waybill_form_page(self):
-        """
-        In some deployments, the configured create URL lands on a not-found shell page.
-        Try to discover and open the real "حمل بارنامه" page from the side menu.
+    async def _pre_resolve_locations(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        if await self._is_waybill_form_ready():
-            return
+        پیش‌محاسبه بدون صفحه: ژئوکد مبدا و مقصد به صورت هم‌زمان و سپس مسیر از کش مسیر
 
-        current_url = await self._current_url()
-        if await self._looks_like_not_found_page():
-            try:
-                html = await self.page.content()
-                with open("waybill_notfound_snapshot.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-            except Exception:
-                pass
+        خطاها نادیده گرفته می‌شوند؛ در این صورت انتخاب مکان مثل قبل روی صفحه انجام می‌شود.
+        """
+        origin, destination = await asyncio.gather(
+            self._resolve_coordinates(data.get("origin") or {}),
+            self._resolve_coordinates(data.get("destination") or {}),
+        )
 
-            recovery_selectors = (
-                "a:has-text('ورود مجدد به سامانه')",
-                "button:has-text('ورود مجدد به سامانه')",
-                "a:has-text('بازگشت به خانه')",
-                "button:has-text('بازگشت به خانه')",
-                "a:has-text('بازگشت به صفحه اصلی')",
-                "button:has-text('بازگشت به صفحه اصلی')",
+        route = None
+        if origin and destination:
+            route = self.route_calculator.cached_route(
+                GeoCoordinate(latitude=origin["lat"], longitude=origin["lng"]),
+                GeoCoordinate(latitude=destination["lat"], longitude=destination["lng"]),
             )
-            for selector in recovery_selectors:
-                try:
-                    action = self.page.locator(selector).first
-                    if await action.count() == 0:
-                        continue
-
-                    href = await action.get_attribute("href")
-                    if href:
-                        await self._goto_with_retry(urljoin(current_url, href), wait_until="domcontentloaded")
-                    else:
-                        await action.click()
-                        await self.page.wait_for_load_state("domcontentloaded")
-
-                    await asyncio.sleep(1.2)
-                    if await self._is_waybill_form_ready():
-                        return
-                    current_url = await self._current_url()
-                except Exception:
-                    continue
 
+        return {"origin": origin, "destination": destination, "route": route}
+
+    async def _resolve_coordinates(self, location_data: Dict[str, Any]) -> Optional[Dict[str, float]]:
         try:
-            menu_links = await self.page.eval_on_selector_all(
-                "a",
-                "els => els.map(e => ({text:(e.innerText||'').trim(), href:(e.getAttribute('href')||'').trim()}))",
+            coordinates = await self.location_selector.resolve_coordinates(location_data)
+            return {"lat": float(coordinates["lat"]), "lng": float(coordinates["lng"])} if coordinates else None
+        except Exception as exc:
+            logger.warning(
+                "waybill_pre_resolve_failed",
+                extra={"extra_fields": {"error": str(exc)}},
             )
-            interesting = [
-                item for item in menu_links
-                if ("بارنامه" in item.get("text", "")) or ("Waybill" in item.get("href", ""))
-            ]
+            return None
+
+    @staticmethod
+    def _with_coordinates(
+        location_data: Dict[str, Any],
+        coordinates: Optional[Dict[str, float]],
+    ) -> Dict[str, Any]:
+        if not coordinates or location_data.get("coordinates"):
+            return location_data
+        return {**location_data, "coordinates": coordinates}
+
+    async def _ensure_waybill_form_page(self):
+        """
+        اطمینان از باز بودن فرم بارنامه.
+
+        وضعیت صفحه (فرم آماده، صفحه یافت نشد، ورود، عدم دسترسی، خانه) از یک تصویر DOM
+        تشخیص داده می‌شود و در هر دور یک قدم بازیابی انجام می‌شود: باز کردن پیوند منوی
+        بارنامه، کلیک روی پیوند منویی که آدرس ندارد یا دکمه‌های «ورود مجدد»/«بازگشت به
+        خانه» صفحه خطا و در نهایت آدرس‌های شناخته‌شده فرم. مسیری که به فرم رسید برای هر
+        حساب به خاطر سپرده می‌شود.
+        """
+        remembered = form_routes.route_for(self.account)
+        attempted = {("goto", await self._current_url())}
+        navigations = 0
+        not_found_dumped = False
+
+        while True:
+            state, snapshot = await self._wait_for_page_state()
             logger.info(
-                "waybill_menu_links_discovered",
-                extra={"extra_fields": {"url": current_url, "links": interesting[:20]}},
+                "waybill_page_state",
+                extra={"extra_fields": {"state": state.value, "url": snapshot.url}},
             )
-            if any("درخواست دسترسی" in item.get("text", "") for item in interesting):
-                raise WaybillError("حساب کاربری به ماژول صدور بارنامه دسترسی ندارد")
-        except WaybillError:
-            raise
-        except Exception:
-            pass
+            if state == PageState.FORM_READY:
+                if remembered:
+                    form_routes.record(hit=navigations == 0)
+                form_routes.remember(self.account, snapshot.url or await self._current_url())
+                return
 
-        menu_selectors = (
-            "a:has-text('حمل بارنامه')",
-            "a:has-text('صدور بارنامه')",
-            "a[href*='Waybill' i]",
-        )
+            if state == PageState.NO_ACCESS:
+                raise WaybillError("حساب کاربری به ماژول صدور بارنامه دسترسی ندارد")
+            if state == PageState.LOGIN:
+                raise WaybillError("نشست ورود به سامانه منقضی شده و فرم بارنامه در دسترس نیست")
+            if state == PageState.NOT_FOUND and not not_found_dumped:
+                not_found_dumped = True
+                await self._dump_not_found_snapshot()
+
+            if remembered and navigations == 0:
+                # مسیر به‌خاطرسپرده دیگر به فرم نمی‌رسد
+                form_routes.forget(self.account)
+
+            steps = (
+                ("goto", form_link(snapshot)),
+                ("click", form_link_click_selector(snapshot)),
+                ("click", snapshot.matched.get("recovery")),
+                *(("goto", url) for url in self._waybill_url_candidates()),
+            )
+            step = next((item for item in steps if item[1] and item not in attempted), None)
+            if step is None:
+                raise WaybillError("فرم بارنامه پس از بازیابی در دسترس نیست")
 
-        for selector in menu_selectors:
+            attempted.add(step)
+            navigations += 1
+            action, target = step
             try:
-                link = self.page.locator(selector).first
-                if await link.count() == 0:
-                    continue
-
-                href = await link.get_attribute("href")
-                if href:
-                    await self._goto_with_retry(urljoin(current_url, href), wait_until="domcontentloaded")
+                if action == "goto":
+                    await self._goto_with_retry(target, wait_until="domcontentloaded")
                 else:
-                    await link.click()
+                    await self.page.locator(target).first.click()
                     await self.page.wait_for_load_state("domcontentloaded")
+            except Exception as exc:
+                if is_retryable_network_error(exc):
+                    raise
+                logger.warning(
+                    "waybill_form_route_failed",
+                    extra={"extra_fields": {"action": action, "target": target, "error": str(exc)}},
+                )
 
-                await asyncio.sleep(1.5)
-                if await self._is_waybill_form_ready():
-                    return
-            except Exception:
-                continue
-
-        for candidate_url in self._waybill_url_candidates():
+    async def _wait_for_page_state(self) -> Tuple[PageState, PageSnapshot]:
+        """
+        تشخیص وضعیت صفحه؛ فقط اگر صفحه خانه تشخیص داده شود و سند هنوز در حال بارگذاری
+        باشد، یک بار تا رویداد load (حداکثر WAYBILL_FORM_WAIT_MS) صبر و دوباره بررسی می‌شود.
+        """
+        snapshot = await self._page_snapshot()
+        state = classify_page(snapshot)
+        if state == PageState.HOME and snapshot.loading:
             try:
-                await self._goto_with_retry(candidate_url, wait_until="domcontentloaded")
-                await asyncio.sleep(1.2)
-                if await self._is_waybill_form_ready():
-                    return
+                await self.page.wait_for_load_state("load", timeout=max(1, utcms_config.WAYBILL_FORM_WAIT_MS))
             except Exception:
-                continue
+                pass
+            snapshot = await self._page_snapshot()
+            state = classify_page(snapshot)
+        return state, snapshot
 
-        current_url = (await self._current_url()).lower()
+    async def _page_snapshot(self) -> PageSnapshot:
+        return await snapshot_page(self.page, PAGE_STATE_GROUPS, WaybillPageSelectors.FORM_LINK_KEYWORDS)
+
+    async def _dump_not_found_snapshot(self) -> None:
         try:
-            lacks_access_banner = await self.page.query_selector(
-                "text=نامه درخواست دسترسی به سامانه صدور بارنامه شهری"
-            )
+            html = await self.page.content()
+            with open("waybill_notfound_snapshot.html", "w", encoding="utf-8") as f:
+                f.write(html)
         except Exception:
-            lacks_access_banner = None
-
-        if "/home/infoindex" in current_url or lacks_access_banner:
-            raise WaybillError("حساب کاربری به ماژول صدور بارنامه دسترسی ندارد")
-
-        if not await self._is_waybill_form_ready():
-            raise WaybillError("فرم بارنامه پس از بازیابی در دسترس نیست")
+            pass
 
     def _waybill_url_candidates(self) -> list[str]:
         base_url = utcms_config.BASE_URL.rstrip("/")
@@ -327,54 +365,6 @@ class EnhancedWaybillManager:
                 unique.append(item)
         return unique
 
-    async def _is_waybill_form_ready(self) -> bool:
-        markers = (
-            'input[name="txtSenderFirstName"]',
-            'input[name="SenderName"]',
-            'input[name="txtReceiverFirstName"]',
-            'input[name="ReceiverName"]',
-            '#btnGoLVL2',
-            '#GoLVL2',
-        )
-        for selector in markers:
-            try:
-                if await self.page.query_selector(selector):
-                    return True
-            except Exception:
-                continue
-        return False
-
-    async def _looks_like_not_found_page(self) -> bool:
-        title = await self._safe_page_title()
-        current_url = (await self._current_url()).strip().lower()
-
-        if "یافت نشد" in title or "خطا در سامانه" in title:
-            return True
-
-        # In tests/mocks URL may not be a real HTTP URL; avoid false positives.
-        if current_url and not current_url.startswith(("http://", "https://")):
-            return False
-
-        error_url_fragments = ("/error", "/exception", "/fault")
-        if any(fragment in current_url for fragment in error_url_fragments):
-            return True
-
-        not_found_markers = (
-            "text=یافت نشد",
-            "text=صفحه مورد نظر شما یافت نشد",
-            "text=درخواست مجاز نمی باشد",
-            "text=خطا در سامانه",
-            "text=متاسفانه در هنگام پردازش درخواست شما خطایی رخ داده است",
-            "text=ورود مجدد به سامانه",
-        )
-        for marker in not_found_markers:
-            try:
-                if await self.page.query_selector(marker):
-                    return True
-            except Exception:
-                continue
-        return False
-
     async def _fill_sender_info(self, sender: Dict[str, str]):
         """پر کردن اطلاعات فرستنده"""
         await self._select_dropdown_with_fallback(
@@ -749,12 +739,8 @@ class EnhancedWaybillManager:
             "text=شماره بارنامه",
             "text=کد رهگیری",
         ]
-        for selector in success_selectors:
-            try:
-                if await self.page.query_selector(selector):
-                    return True
-            except Exception:
-                continue
+        if await first_match(self.page, success_selectors):
+            return True
 
         current_url = (await self._current_url()).lower()
         success_fragments = (
@@ -5,6 +5,11 @@ class UTCMSConfig:
     WAYBILL_URL = os.getenv("WAYBILL_URL", "https://barname.utcms.ir/Barname/Waybill/Create")
     BASE_URL = os.getenv("BASE_URL", "https://barname.utcms.ir")
     LOGIN_URL = os.getenv("LOGIN_URL", f"{BASE_URL.rstrip('/')}/Login")
+    # Probe candidate login URLs over plain HTTP in parallel and remember the working one
+    LOGIN_URL_PROBE = os.getenv("LOGIN_URL_PROBE", "True").lower() == "true"
+    LOGIN_PROBE_TIMEOUT_SECONDS = float(os.getenv("LOGIN_PROBE_TIMEOUT_SECONDS", "5"))
+    # After a probe finds no form, skip probing (browser tries candidates) for this long
+    LOGIN_PROBE_RETRY_SECONDS = float(os.getenv("LOGIN_PROBE_RETRY_SECONDS", "600"))
     HEADLESS = os.getenv("HEADLESS", "False").lower() == "true"
 
     # Credentials
@@ -22,6 +27,23 @@ class UTCMSConfig:
     CAPTCHA_TIMEOUT_SECONDS = int(os.getenv("CAPTCHA_TIMEOUT_SECONDS", "120"))
     CAPTCHA_POLL_SECONDS = float(os.getenv("CAPTCHA_POLL_SECONDS", "5"))
     CAPTCHA_MAX_RETRIES = int(os.getenv("CAPTCHA_MAX_RETRIES", "2"))
+    # Learn 2captcha solve times: first poll near the median, tight until p90, then back off;
+    # never poll faster than the 5s interval 2captcha recommends
+    CAPTCHA_ADAPTIVE_POLLING = os.getenv("CAPTCHA_ADAPTIVE_POLLING", "True").lower() == "true"
+    CAPTCHA_POLL_MIN_SECONDS = float(os.getenv("CAPTCHA_POLL_MIN_SECONDS", "5"))
+    # CAPTCHA_PROVIDER=auto: route to the provider with the best expected time to an accepted
+    # login; cost (per solve, e.g. USD) is weighed as CAPTCHA_COST_WEIGHT_SECONDS per unit
+    TWOCAPTCHA_COST_PER_SOLVE = float(os.getenv("TWOCAPTCHA_COST_PER_SOLVE", "0.001"))
+    CAPTCHA_COST_WEIGHT_SECONDS = float(os.getenv("CAPTCHA_COST_WEIGHT_SECONDS", "0"))
+    CAPTCHA_ROUTER_MIN_SAMPLES = int(os.getenv("CAPTCHA_ROUTER_MIN_SAMPLES", "3"))
+    # Local CPU solver (CAPTCHA_PROVIDER=local): model factory "package.module:callable",
+    # answers below the confidence threshold go to the remote provider when fallback is on
+    LOCAL_CAPTCHA_MODEL = os.getenv("LOCAL_CAPTCHA_MODEL", "").strip()
+    LOCAL_CAPTCHA_MIN_CONFIDENCE = float(os.getenv("LOCAL_CAPTCHA_MIN_CONFIDENCE", "0.8"))
+    LOCAL_CAPTCHA_WORKERS = int(os.getenv("LOCAL_CAPTCHA_WORKERS", "1"))
+    LOCAL_CAPTCHA_TIMEOUT_SECONDS = float(os.getenv("LOCAL_CAPTCHA_TIMEOUT_SECONDS", "10"))
+    LOCAL_CAPTCHA_THRESHOLD = int(os.getenv("LOCAL_CAPTCHA_THRESHOLD", "140"))
+    LOCAL_CAPTCHA_FALLBACK = os.getenv("LOCAL_CAPTCHA_FALLBACK", "True").lower() == "true"
 
     # Auth session state
     AUTH_STATE_PATH = os.getenv("AUTH_STATE_PATH", ".auth/utcms_state.json")
@@ -53,11 +75,74 @@ class UTCMSConfig:
     PAGE_GOTO_RETRY_BASE_SECONDS = float(os.getenv("PAGE_GOTO_RETRY_BASE_SECONDS", "1.0"))
     PAGE_GOTO_RETRY_JITTER_SECONDS = float(os.getenv("PAGE_GOTO_RETRY_JITTER_SECONDS", "0.4"))
 
+    # Browser context pooling: several waybills run as tabs of one authenticated context
+    BROWSER_CONTEXT_POOLING = os.getenv("BROWSER_CONTEXT_POOLING", "False").lower() == "true"
+    BROWSER_CONTEXT_TAB_LIMIT = int(os.getenv("BROWSER_CONTEXT_TAB_LIMIT", "3"))
+
+    # Background session refresher: log in again this long before the auth cookies expire
+    SESSION_REFRESH_ENABLED = os.getenv("SESSION_REFRESH_ENABLED", "False").lower() == "true"
+    SESSION_REFRESH_LEAD_SECONDS = float(os.getenv("SESSION_REFRESH_LEAD_SECONDS", "600"))
+    SESSION_REFRESH_CHECK_SECONDS = float(os.getenv("SESSION_REFRESH_CHECK_SECONDS", "60"))
+    SESSION_REFRESH_RETRY_SECONDS = float(os.getenv("SESSION_REFRESH_RETRY_SECONDS", "120"))
+    # For session-only cookies (no expiry): refresh after this many seconds (0 disables)
+    SESSION_REFRESH_MAX_AGE_SECONDS = float(os.getenv("SESSION_REFRESH_MAX_AGE_SECONDS", "0"))
+
+    # Browser recycling: relaunch Chromium after a memory/age/usage threshold (0 disables each)
+    BROWSER_MAX_RSS_MB = float(os.getenv("BROWSER_MAX_RSS_MB", "1500"))
+    BROWSER_MAX_AGE_SECONDS = float(os.getenv("BROWSER_MAX_AGE_SECONDS", "21600"))
+    BROWSER_MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "2000"))
+    BROWSER_MEMORY_CHECK_SECONDS = float(os.getenv("BROWSER_MEMORY_CHECK_SECONDS", "30"))
+    BROWSER_DRAIN_TIMEOUT_SECONDS = float(os.getenv("BROWSER_DRAIN_TIMEOUT_SECONDS", "600"))
+
+    # Map detection result cache per URL path (0 keeps only the per-page cache)
+    MAP_DETECTION_CACHE_TTL_SECONDS = float(os.getenv("MAP_DETECTION_CACHE_TTL_SECONDS", "600"))
+
+    # Geocoding: offline gazetteer first (CSV or SQLite; empty = bundled CSV), remote fallback optional
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "")
+    GEOCODE_REMOTE_FALLBACK = os.getenv("GEOCODE_REMOTE_FALLBACK", "True").lower() == "true"
+    GEOCODE_REMOTE_URL = os.getenv("GEOCODE_REMOTE_URL", "https://nominatim.openstreetmap.org/search")
+    GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", ".cache/geocode_cache.sqlite3")
+    GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "2000"))
+    GEOCODE_CACHE_TTL_SECONDS = float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", "2592000"))
+    GEOCODE_NEGATIVE_TTL_SECONDS = float(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", "3600"))
+
+    # Route result cache keyed by rounded origin/destination (4 decimals is about 11 m)
+    ROUTE_CACHE_PRECISION = int(os.getenv("ROUTE_CACHE_PRECISION", "4"))
+    ROUTE_CACHE_TTL_SECONDS = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", "86400"))
+    ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "5000"))
+
+    # Province/city/district option catalog (revalidation interval, wait for a known option)
+    OPTION_CATALOG_REVALIDATE_SECONDS = float(os.getenv("OPTION_CATALOG_REVALIDATE_SECONDS", "21600"))
+    OPTION_CATALOG_WAIT_MS = int(os.getenv("OPTION_CATALOG_WAIT_MS", "5000"))
+
+    # Geocode origin/destination (and look up cached routes) while the waybill page loads
+    WAYBILL_PRE_RESOLVE = os.getenv("WAYBILL_PRE_RESOLVE", "True").lower() == "true"
+
+    # Reject malformed waybill requests (national code, mobile, plate, numbers, catalog) before the traffic slot
+    WAYBILL_PRE_VALIDATION = os.getenv("WAYBILL_PRE_VALIDATION", "True").lower() == "true"
+
+    # Upper bound on waiting for a still-loading waybill page (load event) before recovering
+    WAYBILL_FORM_WAIT_MS = int(os.getenv("WAYBILL_FORM_WAIT_MS", "5000"))
+
+    # Distance matrix endpoint limits
+    DISTANCE_MATRIX_MAX_POINTS = int(os.getenv("DISTANCE_MATRIX_MAX_POINTS", "5000"))
+    DISTANCE_MATRIX_STREAM_THRESHOLD = int(os.getenv("DISTANCE_MATRIX_STREAM_THRESHOLD", "250000"))
+
+    # Shared outbound HTTP sessions (2captcha, geocoding): pool size, DNS cache, keep-alive, timeouts
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+    HTTP_DNS_CACHE_SECONDS = float(os.getenv("HTTP_DNS_CACHE_SECONDS", "300"))
+    HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./bot_stats.db")
 
     # Logging/observability
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_DEDUP_WINDOW_SECONDS = float(os.getenv("LOG_DEDUP_WINDOW_SECONDS", "30"))
+    LOG_SAMPLING_RATES = os.getenv("LOG_SAMPLING_RATES", "")
     LATENCY_SAMPLE_MAX = int(os.getenv("LATENCY_SAMPLE_MAX", "2000"))
 
 
@@ -0,0 +1,102 @@
+"""Great-circle distance helpers shared by the API and the route calculator.
+
+``haversine_rows`` computes an origins x destinations distance matrix one row at
+a time so large matrices can be streamed. It is vectorized with NumPy when it is
+installed and falls back to ``array``-based pure Python otherwise.
+"""
+
+import math
+from array import array
+from typing import Iterator, List, Sequence, Tuple
+
+try:  # NumPy is optional; the pure-Python path gives identical results.
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+
+# Assumed average road speed for duration estimates (km/h)
+DEFAULT_SPEED_KMH = 60.0
+
+# Rows per NumPy block: bounds temporary memory to roughly block * M floats.
+_NUMPY_BLOCK_ROWS = 256
+
+LatLng = Tuple[float, float]
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distance in kilometres between two points."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlmb = math.radians(lng2 - lng1)
+
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def estimate_duration_min(distance_km: float, speed_kmh: float = DEFAULT_SPEED_KMH) -> float:
+    return (distance_km / speed_kmh) * 60
+
+
+def matrix_engine() -> str:
+    return "numpy" if np is not None else "python"
+
+
+def haversine_rows(
+    origins: Sequence[LatLng],
+    destinations: Sequence[LatLng],
+    use_numpy: bool = True,
+) -> Iterator[List[float]]:
+    """Yield one list of distances (km) per origin, in destination order."""
+    if not origins or not destinations:
+        return iter(())
+    if use_numpy and np is not None:
+        return _numpy_rows(origins, destinations)
+    return _python_rows(origins, destinations)
+
+
+def haversine_matrix(
+    origins: Sequence[LatLng],
+    destinations: Sequence[LatLng],
+    use_numpy: bool = True,
+) -> List[List[float]]:
+    return list(haversine_rows(origins, destinations, use_numpy=use_numpy))
+
+
+def _numpy_rows(origins: Sequence[LatLng], destinations: Sequence[LatLng]) -> Iterator[List[float]]:
+    dest = np.radians(np.asarray(destinations, dtype=np.float64))
+    dest_lat = dest[:, 0][np.newaxis, :]
+    dest_lng = dest[:, 1][np.newaxis, :]
+    dest_cos = np.cos(dest_lat)
+
+    orig = np.radians(np.asarray(origins, dtype=np.float64))
+    for start in range(0, len(orig), _NUMPY_BLOCK_ROWS):
+        block = orig[start:start + _NUMPY_BLOCK_ROWS]
+        lat = block[:, 0][:, np.newaxis]
+        lng = block[:, 1][:, np.newaxis]
+
+        a = np.sin((dest_lat - lat) / 2) ** 2 + np.cos(lat) * dest_cos * np.sin((dest_lng - lng) / 2) ** 2
+        distances = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        yield from distances.tolist()
+
+
+def _python_rows(origins: Sequence[LatLng], destinations: Sequence[LatLng]) -> Iterator[List[float]]:
+    # Destination terms are computed once and reused for every origin row.
+    dest_lat = array("d", (math.radians(lat) for lat, _ in destinations))
+    dest_lng = array("d", (math.radians(lng) for _, lng in destinations))
+    dest_cos = array("d", (math.cos(value) for value in dest_lat))
+    sin, cos, atan2, sqrt = math.sin, math.cos, math.atan2, math.sqrt
+    diameter = EARTH_RADIUS_KM * 2
+
+    for lat_deg, lng_deg in origins:
+        lat = math.radians(lat_deg)
+        lng = math.radians(lng_deg)
+        cos_lat = cos(lat)
+        row = []
+        append = row.append
+        for d_lat, d_lng, d_cos in zip(dest_lat, dest_lng, dest_cos):
+            a = sin((d_lat - lat) / 2) ** 2 + cos_lat * d_cos * sin((d_lng - lng) / 2) ** 2
+            append(diameter * atan2(sqrt(a), sqrt(1 - a)))
+        yield row
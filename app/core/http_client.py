@@ -0,0 +1,99 @@
+"""Long-lived aiohttp sessions shared by outbound HTTP callers.
+
+One ``ClientSession`` is kept per upstream (``"twocaptcha"``, ``"geocode"``, ...) so
+connections stay alive between requests and DNS answers are cached by the connector.
+Sessions are created lazily on first use, bound to the running event loop, and closed
+by ``close()`` from the FastAPI lifespan.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from app.core.config import utcms_config
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientManager:
+    """Owns one pooled ``aiohttp.ClientSession`` per upstream."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Tuple[aiohttp.ClientSession, asyncio.AbstractEventLoop]] = {}
+        # Sessions replaced after an event loop change; closed by ``close()``.
+        self._stale: List[Tuple[str, aiohttp.ClientSession, asyncio.AbstractEventLoop]] = []
+        self._created = 0
+
+    def session(self, upstream: str) -> aiohttp.ClientSession:
+        """Return the session for ``upstream``, creating it for the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        entry = self._sessions.get(upstream)
+        if entry is not None:
+            session, session_loop = entry
+            if not session.closed and session_loop is loop:
+                return session
+            # A session cannot be reused across event loops (tests, reloads); replace it
+            # and keep the old one so its connector is still closed.
+            self._sessions.pop(upstream, None)
+            if not session.closed:
+                self._stale.append((upstream, session, session_loop))
+
+        session = self._build_session()
+        self._sessions[upstream] = (session, loop)
+        self._created += 1
+        return session
+
+    async def close(self) -> None:
+        sessions, self._sessions = self._sessions, {}
+        stale, self._stale = self._stale, []
+        entries = [(upstream, session, session_loop) for upstream, (session, session_loop) in sessions.items()]
+        for upstream, session, session_loop in entries + stale:
+            try:
+                await self._close_session(session, session_loop)
+            except Exception as exc:
+                logger.warning(
+                    "http_session_close_failed",
+                    extra={"extra_fields": {"upstream": upstream, "error": str(exc)}},
+                )
+
+    @staticmethod
+    async def _close_session(session: aiohttp.ClientSession, session_loop: asyncio.AbstractEventLoop) -> None:
+        if session.closed:
+            return
+        if session_loop is asyncio.get_running_loop():
+            await session.close()
+        elif session_loop.is_running():
+            # Still serving another thread; close it on its own loop.
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
+        # A session whose loop has stopped cannot be closed any more; its loop owned the sockets.
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": sorted(name for name, (session, _) in self._sessions.items() if not session.closed),
+            "created": self._created,
+        }
+
+    @staticmethod
+    def _build_session() -> aiohttp.ClientSession:
+        dns_ttl = utcms_config.HTTP_DNS_CACHE_SECONDS
+        connector = aiohttp.TCPConnector(
+            limit=max(1, utcms_config.HTTP_POOL_LIMIT),
+            limit_per_host=max(0, utcms_config.HTTP_POOL_LIMIT_PER_HOST),
+            use_dns_cache=dns_ttl > 0,
+            ttl_dns_cache=dns_ttl if dns_ttl > 0 else None,
+            keepalive_timeout=max(1.0, utcms_config.HTTP_KEEPALIVE_SECONDS),
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=_positive_or_none(utcms_config.HTTP_TIMEOUT_SECONDS),
+            connect=_positive_or_none(utcms_config.HTTP_CONNECT_TIMEOUT_SECONDS),
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def _positive_or_none(value: float) -> Optional[float]:
+    return value if value and value > 0 else None
+
+
+http_clients = HTTPClientManager()
@@ -3,8 +3,12 @@ import json
 import logging
 import re
 import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 
 request_id_ctx: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
@@ -22,38 +26,54 @@ def get_request_id() -> str:
     return request_id_ctx.get()
 
 
+# Single alternation compiled once; each branch captures the prefix to keep.
+_REDACTION_PATTERN = re.compile(
+    r"(authorization\s*[:=]\s*bearer\s+)[a-z0-9._\-]+"
+    r"|(api[_-]?key\s*[:=]\s*)[^\s,;]+"
+    r"|(jwt[_-]?secret\s*[:=]\s*)[^\s,;]+"
+    r"|(password\s*[:=]\s*)[^\s,;]+"
+    r"|(token\s*[:=]\s*)[^\s,;]+",
+    re.IGNORECASE,
+)
+# Every redaction branch contains one of these; strings without them are returned as-is.
+_REDACTION_TRIGGERS = ("authorization", "api", "jwt", "password", "token")
+_SECRET_KEY_FRAGMENTS = ("password", "secret", "token", "api_key", "authorization")
+
+
+def _redact_match(match: "re.Match[str]") -> str:
+    return f"{match.group(match.lastindex)}***"
+
+
 def _sanitize_string(value: str) -> str:
-    sanitized = value
-    patterns = [
-        (r"(?i)(authorization\s*[:=]\s*bearer\s+)[a-z0-9._\-]+", r"\1***"),
-        (r"(?i)(api[_-]?key\s*[:=]\s*)[^\s,;]+", r"\1***"),
-        (r"(?i)(jwt[_-]?secret\s*[:=]\s*)[^\s,;]+", r"\1***"),
-        (r"(?i)(password\s*[:=]\s*)[^\s,;]+", r"\1***"),
-        (r"(?i)(token\s*[:=]\s*)[^\s,;]+", r"\1***"),
-    ]
+    lowered = value.lower()
+    if not any(trigger in lowered for trigger in _REDACTION_TRIGGERS):
+        return value
     try:
-        for pattern, replacement in patterns:
-            sanitized = re.sub(pattern, replacement, sanitized)
+        return _REDACTION_PATTERN.sub(_redact_match, value)
     except Exception:
         # During interpreter teardown regex internals may already be unavailable.
         return value
-    return sanitized
+
+
+@lru_cache(maxsize=2048)
+def _is_secret_key(key: str) -> bool:
+    lowered = key.lower()
+    return any(fragment in lowered for fragment in _SECRET_KEY_FRAGMENTS)
 
 
 def sanitize(value: Any) -> Any:
+    if isinstance(value, str):
+        return _sanitize_string(value)
     if isinstance(value, dict):
         clean: dict[str, Any] = {}
         for key, raw in value.items():
-            lowered = str(key).lower()
-            if any(secret_key in lowered for secret_key in ("password", "secret", "token", "api_key", "authorization")):
+            if _is_secret_key(key if isinstance(key, str) else str(key)):
                 clean[key] = "***"
             else:
                 clean[key] = sanitize(raw)
         return clean
     if isinstance(value, (list, tuple, set)):
         return [sanitize(v) for v in value]
-    if isinstance(value, str):
-        return _sanitize_string(value)
     return value
 
 
@@ -63,6 +83,200 @@ class RequestIdFilter(logging.Filter):
         return True
 
 
+# Only these high-volume events are collapsed; everything else is logged as-is.
+DEFAULT_DEDUP_EVENTS = ("safe_click_failed", "safe_fill_failed", "optional_dropdown_not_found")
+# Fields that differ between otherwise identical repeats and are left out of the dedup key.
+DEFAULT_VOLATILE_FIELDS = ("error", "duration_ms", "elapsed_ms", "attempt")
+DEDUP_SUMMARY_MESSAGE = "log_repeats_suppressed"
+
+
+def parse_sampling_rates(raw: Optional[str]) -> Dict[str, float]:
+    """Parse ``"logger=rate,other.logger=rate"`` into a mapping of sampling rates."""
+    rates: Dict[str, float] = {}
+    for item in (raw or "").split(","):
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or not name:
+            continue
+        try:
+            rates[name] = min(1.0, max(0.0, float(value)))
+        except ValueError:
+            continue
+    return rates
+
+
+class LogSamplingFilter(logging.Filter):
+    """Per-logger sampling and suppression of repeated events within a time window.
+
+    Records above ``max_level`` (errors by default) always pass. Only messages listed
+    in ``dedup_events`` are collapsed: repeats with the same logger, message and
+    ``extra_fields`` (ignoring ``volatile_fields``) inside the window are dropped. Once
+    the window of a collapsed event expires, a ``log_repeats_suppressed`` record with
+    the number of dropped repeats is emitted through ``summary_sink``.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        dedup_events: Iterable[str] = DEFAULT_DEDUP_EVENTS,
+        volatile_fields: Iterable[str] = DEFAULT_VOLATILE_FIELDS,
+        sampling_rates: Optional[Dict[str, float]] = None,
+        max_level: int = logging.WARNING,
+        max_keys: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+        summary_sink: Optional[Callable[[logging.LogRecord], Any]] = None,
+    ):
+        super().__init__()
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.dedup_events = frozenset(dedup_events)
+        self.volatile_fields = frozenset(volatile_fields)
+        self.summary_sink = summary_sink
+        self.max_level = max_level
+        self.max_keys = max(1, int(max_keys))
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> [window start, suppressed count, first record]; ordered by window start.
+        self._seen: "OrderedDict[tuple, list]" = OrderedDict()
+        self._rates: Dict[str, float] = {}
+        self._credits: Dict[str, float] = {}
+        for logger_name, rate in (sampling_rates or {}).items():
+            self.set_sampling_rate(logger_name, rate)
+
+    def set_sampling_rate(self, logger_name: str, rate: float) -> None:
+        """Keep roughly ``rate`` (0..1) of records from ``logger_name`` and its children."""
+        with self._lock:
+            self._rates[logger_name] = min(1.0, max(0.0, float(rate)))
+            self._credits.pop(logger_name, None)
+
+    def clear_sampling_rate(self, logger_name: str) -> None:
+        with self._lock:
+            self._rates.pop(logger_name, None)
+            self._credits.pop(logger_name, None)
+
+    def get_sampling_rates(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._rates)
+
+    def _rate_owner(self, logger_name: str) -> Optional[str]:
+        name = logger_name
+        while name:
+            if name in self._rates:
+                return name
+            name = name.rpartition(".")[0]
+        return "" if "" in self._rates else None
+
+    def _sampled(self, logger_name: str) -> bool:
+        owner = self._rate_owner(logger_name)
+        if owner is None:
+            return True
+        rate = self._rates[owner]
+        if rate >= 1.0:
+            return True
+        # Deterministic credit accumulation keeps the kept ratio exact over time.
+        credit = self._credits.get(owner, 0.0) + rate
+        if credit >= 1.0:
+            self._credits[owner] = credit - 1.0
+            return True
+        self._credits[owner] = credit
+        return False
+
+    def _dedup_key(self, record: logging.LogRecord) -> tuple:
+        extra_fields = getattr(record, "extra_fields", None)
+        key_values: tuple = ()
+        if isinstance(extra_fields, dict):
+            key_values = tuple(
+                sorted(
+                    (str(field), str(value))
+                    for field, value in extra_fields.items()
+                    if field not in self.volatile_fields
+                )
+            )
+        return record.name, record.levelno, str(record.msg), key_values
+
+    def _pop_expired(self, now: float) -> List[logging.LogRecord]:
+        summaries: List[logging.LogRecord] = []
+        while self._seen:
+            entry = next(iter(self._seen.values()))
+            if now - entry[0] < self.window_seconds:
+                break
+            self._seen.popitem(last=False)
+            if entry[1]:
+                summaries.append(self._summary_record(entry[2], entry[1]))
+        return summaries
+
+    def _summary_record(self, first: logging.LogRecord, suppressed: int) -> logging.LogRecord:
+        extra_fields = getattr(first, "extra_fields", None)
+        fields = {
+            "event": str(first.msg),
+            **(extra_fields if isinstance(extra_fields, dict) else {}),
+            "window_seconds": self.window_seconds,
+        }
+        summary = logging.LogRecord(
+            name=first.name,
+            level=first.levelno,
+            pathname=first.pathname,
+            lineno=first.lineno,
+            msg=DEDUP_SUMMARY_MESSAGE,
+            args=(),
+            exc_info=None,
+        )
+        summary.extra_fields = fields
+        summary.suppressed_repeats = suppressed
+        summary.request_id = getattr(first, "request_id", "-")
+        summary.dedup_summary = True
+        return summary
+
+    def _emit_summaries(self, summaries: List[logging.LogRecord]) -> None:
+        for summary in summaries:
+            try:
+                if self.summary_sink is not None:
+                    self.summary_sink(summary)
+                else:
+                    logging.getLogger(summary.name).handle(summary)
+            except Exception:
+                continue
+
+    def flush(self) -> None:
+        """Emit summaries for every collapsed event, expired or not (e.g. at shutdown)."""
+        with self._lock:
+            entries = list(self._seen.values())
+            self._seen.clear()
+        self._emit_summaries([self._summary_record(entry[2], entry[1]) for entry in entries if entry[1]])
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "dedup_summary", False) or record.levelno > self.max_level:
+            return True
+
+        summaries: List[logging.LogRecord] = []
+        keep = True
+        with self._lock:
+            now = self._clock()
+            if self._rates and not self._sampled(record.name):
+                keep = False
+            elif self.window_seconds > 0 and self._seen:
+                summaries = self._pop_expired(now)
+
+            if keep and self.window_seconds > 0 and str(record.msg) in self.dedup_events:
+                key = self._dedup_key(record)
+                entry = self._seen.get(key)
+                if entry is not None:
+                    entry[1] += 1
+                    keep = False
+                else:
+                    self._seen[key] = [now, 0, record]
+                    while len(self._seen) > self.max_keys:
+                        _, evicted = self._seen.popitem(last=False)
+                        if evicted[1]:
+                            summaries.append(self._summary_record(evicted[2], evicted[1]))
+
+        # Summaries go through the handlers again, so they are emitted outside the lock.
+        self._emit_summaries(summaries)
+        return keep
+
+
+log_sampling_filter = LogSamplingFilter()
+
+
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload = {
@@ -80,10 +294,18 @@ class JsonFormatter(logging.Formatter):
         if extra_fields:
             payload["extra"] = sanitize(extra_fields)
 
+        suppressed_repeats = getattr(record, "suppressed_repeats", 0)
+        if suppressed_repeats:
+            payload["suppressed_repeats"] = suppressed_repeats
+
         return json.dumps(payload, ensure_ascii=False)
 
 
-def configure_logging(log_level: str = "INFO") -> None:
+def configure_logging(
+    log_level: str = "INFO",
+    dedup_window_seconds: Optional[float] = None,
+    sampling_rates: Optional[Dict[str, float]] = None,
+) -> None:
     level = getattr(logging, (log_level or "INFO").upper(), logging.INFO)
     root = logging.getLogger()
     root.setLevel(level)
@@ -98,6 +320,12 @@ def configure_logging(log_level: str = "INFO") -> None:
     handler.setLevel(level)
     handler.setFormatter(formatter)
     handler.addFilter(request_filter)
+    if dedup_window_seconds is not None:
+        log_sampling_filter.window_seconds = max(0.0, float(dedup_window_seconds))
+    for logger_name, rate in (sampling_rates or {}).items():
+        log_sampling_filter.set_sampling_rate(logger_name, rate)
+    log_sampling_filter.summary_sink = handler.handle
+    handler.addFilter(log_sampling_filter)
     root.addHandler(handler)
 
     for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access", "fastapi"):
@@ -0,0 +1,115 @@
+"""Persian/Arabic text normalization shared by lookup and matching code."""
+
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+_DIGITS = {
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+}
+_DIGIT_MAP = str.maketrans(_DIGITS)
+_CHAR_MAP = str.maketrans(
+    {
+        "ي": "ی",
+        "ى": "ی",
+        "ئ": "ی",
+        "ك": "ک",
+        "ة": "ه",
+        "ۀ": "ه",
+        "أ": "ا",
+        "إ": "ا",
+        "ٱ": "ا",
+        "آ": "ا",
+        "ؤ": "و",
+        "‌": " ",  # ZWNJ
+        "‍": "",  # ZWJ
+        "‎": "",  # LRM
+        "‏": "",  # RLM
+        "ـ": "",  # tatweel
+        **_DIGITS,
+    }
+)
+_DIACRITICS_RE = re.compile("[ً-ْٰ]")
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_persian(text: str) -> str:
+    """
+    Normalize Persian text for comparison.
+
+    Unifies Arabic/Persian letter variants (ي/ی، ك/ک، ة/ه، آ/ا), drops diacritics,
+    tatweel and directional marks, turns ZWNJ into a space, converts Persian and
+    Arabic-Indic digits to ASCII, strips punctuation and collapses whitespace.
+    """
+    if not text:
+        return ""
+    value = str(text).translate(_CHAR_MAP)
+    value = _DIACRITICS_RE.sub("", value)
+    value = _NON_WORD_RE.sub(" ", value)
+    return _SPACES_RE.sub(" ", value).strip().lower()
+
+
+def to_ascii_digits(text: str) -> str:
+    """Convert Persian and Arabic-Indic digits to ASCII, leaving everything else as is."""
+    return str(text or "").translate(_DIGIT_MAP)
+
+
+def match_score(target: str, candidate: str) -> float:
+    """
+    Similarity of two labels in [0, 1] after Persian normalization.
+
+    Exact matches score 1.0, matches that only differ by spacing 0.97, containment
+    0.7-0.9 depending on how much of the longer label is covered, and anything else
+    the ``SequenceMatcher`` ratio scaled below containment.
+    """
+    left = normalize_persian(target)
+    right = normalize_persian(candidate)
+    if not left or not right:
+        return 0.0
+    if left == right:
+        return 1.0
+
+    left_compact = left.replace(" ", "")
+    right_compact = right.replace(" ", "")
+    if left_compact == right_compact:
+        return 0.97
+    if left_compact in right_compact or right_compact in left_compact:
+        shorter, longer = sorted((len(left_compact), len(right_compact)))
+        return 0.7 + 0.2 * (shorter / longer)
+    return 0.7 * SequenceMatcher(None, left_compact, right_compact).ratio()
+
+
+def best_option_match(
+    target: str,
+    options: Iterable[Sequence[str]],
+    threshold: float = 0.5,
+) -> Optional[Tuple[str, str]]:
+    """
+    Pick the ``(text, value)`` option that best matches ``target``.
+
+    Options without a value (placeholders such as «انتخاب کنید») are ignored. An exact
+    match on the option value wins outright; otherwise the highest ``match_score`` on
+    the option text at or above ``threshold`` is returned, earliest option first on ties.
+    """
+    if not target or not str(target).strip():
+        return None
+
+    target = str(target).strip()
+    best: Optional[Tuple[str, str]] = None
+    best_score = threshold
+    for option in options:
+        text, value = (str(option[0] or ""), str(option[1] or "")) if len(option) >= 2 else ("", "")
+        if not value.strip():
+            continue
+        if value.strip() == target:
+            return text, value
+        score = match_score(target, text)
+        if score > best_score or (best is None and score >= best_score):
+            best, best_score = (text, value), score
+            if score == 1.0:
+                break
+    return best
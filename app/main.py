@@ -7,11 +7,24 @@ from fastapi import FastAPI, Request
 
 from app.api.routes import reports, system, waybill_map
 from app.automation.browser import browser_manager
+from app.automation.captcha import shutdown_captcha_providers, warm_up_captcha_provider
+from app.automation.session_refresher import session_refresher
 from app.core.config import utcms_config
 from app.core.database import init_db
-from app.core.logging import configure_logging, reset_request_id, set_request_id
+from app.core.http_client import http_clients
+from app.core.logging import (
+    configure_logging,
+    log_sampling_filter,
+    parse_sampling_rates,
+    reset_request_id,
+    set_request_id,
+)
 
-configure_logging(utcms_config.LOG_LEVEL)
+configure_logging(
+    utcms_config.LOG_LEVEL,
+    dedup_window_seconds=utcms_config.LOG_DEDUP_WINDOW_SECONDS,
+    sampling_rates=parse_sampling_rates(utcms_config.LOG_SAMPLING_RATES),
+)
 logger = logging.getLogger(__name__)
 
 
@@ -19,8 +32,14 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     await init_db()
     await browser_manager.initialize()
+    await warm_up_captcha_provider()
+    session_refresher.start()
     yield
+    await session_refresher.stop()
     await browser_manager.close()
+    shutdown_captcha_providers()
+    await http_clients.close()
+    log_sampling_filter.flush()
 
 
 app = FastAPI(
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 class OperationMode(str, Enum):
     SAFE = "safe"
     FULL = "full"
+    VALIDATE_ONLY = "validate_only"
 
 
 class GeoCoordinateModel(BaseModel):
@@ -64,3 +65,15 @@ class WaybillMapRequest(BaseModel):
     cargo: CargoModel
     vehicle: VehicleModel
     financial: FinancialModel
+
+
+class DistanceMatrixRequest(BaseModel):
+    origins: List[GeoCoordinateModel] = Field(..., min_length=1, description="نقاط مبدا")
+    destinations: List[GeoCoordinateModel] = Field(..., min_length=1, description="نقاط مقصد")
+    stream: Optional[bool] = Field(
+        None,
+        description=(
+            "ارسال سطر به سطر (NDJSON)؛ اگر خالی باشد برای ماتریس‌های بزرگ خودکار فعال می‌شود "
+            "و false برای ماتریس بزرگ‌تر از آستانه stream با خطای 413 رد می‌شود"
+        ),
+    )
@@ -14,6 +14,7 @@ from app.core.config import utcms_config
 from app.core.exceptions import WaybillError
 from app.core.network import is_retryable_network_error
 from app.schemas.waybill import OperationMode, WaybillMapRequest
+from app.services.waybill_validation import preflight_waybill_request, validate_waybill_request
 
 
 logger = logging.getLogger(__name__)
@@ -56,6 +57,9 @@ class WaybillService:
         mode = request.operation_mode.value if isinstance(request.operation_mode, OperationMode) else str(request.operation_mode)
         dry_run = mode == OperationMode.SAFE.value
 
+        if mode == OperationMode.VALIDATE_ONLY.value:
+            return await self._validate_only(request_id, request)
+
         if mode == OperationMode.FULL.value and not utcms_config.ALLOW_LIVE_SUBMIT:
             raise HTTPException(
                 status_code=403,
@@ -64,47 +68,32 @@ class WaybillService:
 
         await report_service.record_request(mode=mode)
 
+        if utcms_config.WAYBILL_PRE_VALIDATION:
+            # خطاهای قابل تشخیص در پایتون پیش از گرفتن نوبت ترافیک و مرورگر رد می‌شوند
+            issues = validate_waybill_request(request)
+            if issues:
+                await report_service.record_failure(mode=mode, category="form")
+                raise HTTPException(status_code=422, detail=[issue.as_error() for issue in issues])
+
         max_attempts = max(1, utcms_config.WAYBILL_MAX_RETRIES + 1)
 
         for attempt in range(1, max_attempts + 1):
-            internal_session_id: Optional[str] = None
-            page = None
             started_at = time.perf_counter()
 
             try:
                 async with waybill_traffic_controller.slot(mode=mode):
                     await browser_manager.initialize()
-                    internal_session_id, context = await browser_manager.create_context()
-                    page = await browser_manager.new_page(context)
-
-                    from app.automation.auth import UTCMSAuthenticator
-                    from app.automation.waybill_enhanced import EnhancedWaybillManager
-
-                    auth = UTCMSAuthenticator(page, context)
-
-                    if not await auth._is_logged_in():
-                        username = utcms_config.UTCMS_USERNAME
-                        password = utcms_config.UTCMS_PASSWORD
-
-                        if not username or not password:
-                            raise HTTPException(status_code=401, detail="اطلاعات ورود به سیستم تنظیم نشده است")
-
-                        login_success = await auth.login(username, password)
-                        if not login_success:
-                            detail = "خطا در ورود به سامانه بارنامه"
-                            if auth.last_error:
-                                detail = f"{detail}: {auth.last_error}"
-                            raise HTTPException(status_code=401, detail=detail)
-
-                        await browser_manager.save_auth_state(context)
-                    else:
-                        await browser_manager.save_auth_state(context)
-
-                    manager = EnhancedWaybillManager(page, context)
-                    manager_result = await manager.create_waybill_with_map(
-                        self._build_waybill_payload(request),
-                        dry_run=dry_run,
-                    )
+                    async with browser_manager.lease_page() as lease:
+                        try:
+                            manager_result = await self._run_on_page(lease, request, dry_run)
+                        except Exception as exc:
+                            # A pooled context that failed mid-flow must re-check its login,
+                            # and one that lost the connection is retired altogether.
+                            if is_retryable_network_error(exc):
+                                lease.invalidate()
+                            else:
+                                lease.mark_authenticated(False)
+                            raise
 
                     latency_ms = (time.perf_counter() - started_at) * 1000
                     await report_service.record_success(mode=mode, latency_ms=latency_ms)
@@ -177,31 +166,57 @@ class WaybillService:
                 )
                 raise HTTPException(status_code=500, detail="خطای داخلی سرور در ثبت بارنامه")
 
-            finally:
-                if page:
-                    try:
-                        await page.close()
-                    except Exception:
-                        logger.warning(
-                            "page_close_failed",
-                            extra={"extra_fields": {"request_id": request_id}},
-                        )
+        raise HTTPException(status_code=500, detail="خطای داخلی سرور در ثبت بارنامه")
 
-                if internal_session_id:
-                    try:
-                        await browser_manager.close_context(internal_session_id)
-                    except Exception:
-                        logger.warning(
-                            "context_close_failed",
-                            extra={
-                                "extra_fields": {
-                                    "request_id": request_id,
-                                    "session_id": internal_session_id,
-                                }
-                            },
-                        )
+    @staticmethod
+    async def _validate_only(request_id: str, request: WaybillMapRequest) -> Dict[str, Any]:
+        # بدون نوبت ترافیک و مرورگر: فقط اعتبارسنجی پایتونی و کش‌های فرم
+        summary = preflight_waybill_request(request)
+        await report_service.record_validation(summary["ready_for_submit"])
+        return {
+            "success": summary["ready_for_submit"],
+            "request_id": request_id,
+            "mode": OperationMode.VALIDATE_ONLY.value,
+            "status": "validated" if summary["ready_for_submit"] else "invalid",
+            "validation_summary": summary,
+        }
 
-        raise HTTPException(status_code=500, detail="خطای داخلی سرور در ثبت بارنامه")
+    async def _run_on_page(self, lease, request: WaybillMapRequest, dry_run: bool) -> Dict[str, Any]:
+        from app.automation.auth import UTCMSAuthenticator
+        from app.automation.waybill_enhanced import EnhancedWaybillManager
+
+        page, context = lease.page, lease.context
+        if not lease.authenticated:
+            # Tabs sharing a pooled context log in once; the others wait and reuse it.
+            async with lease.auth_lock:
+                if not lease.authenticated:
+                    await self._ensure_authenticated(UTCMSAuthenticator(page, context))
+                    await browser_manager.save_auth_state(context)
+                    lease.mark_authenticated()
+
+        manager = EnhancedWaybillManager(page, context)
+        return await manager.create_waybill_with_map(
+            self._build_waybill_payload(request),
+            dry_run=dry_run,
+        )
+
+    @staticmethod
+    async def _ensure_authenticated(auth) -> None:
+        if await auth._is_logged_in():
+            return
+
+        username = utcms_config.UTCMS_USERNAME
+        password = utcms_config.UTCMS_PASSWORD
+
+        if not username or not password:
+            raise HTTPException(status_code=401, detail="اطلاعات ورود به سیستم تنظیم نشده است")
+
+        login_success = await auth.login(username, password)
+        if not login_success:
+            detail = "خطا در ورود به سامانه بارنامه"
+            if auth.last_error:
+                detail = f"{detail}: {auth.last_error}"
+            raise HTTPException(status_code=401, detail=detail)
 
     async def detect_map(self, session_id: Optional[str] = None) -> Dict[str, Any]:
         request_id = str(uuid.uuid4())
@@ -210,16 +225,12 @@ class WaybillService:
 
         await browser_manager.initialize()
 
-        internal_session_id: Optional[str] = None
-        page = None
         try:
-            internal_session_id, context = await browser_manager.create_context()
-            page = await browser_manager.new_page(context)
+            async with browser_manager.lease_page() as lease:
+                await _goto_with_retry(lease.page, utcms_config.WAYBILL_URL)
 
-            await _goto_with_retry(page, utcms_config.WAYBILL_URL)
-
-            map_controller = MapController(page)
-            map_type = await map_controller.detect_map_type()
+                map_controller = MapController(lease.page)
+                map_type = await map_controller.detect_map_type()
 
             if map_type:
                 await report_service.record_map_usage(map_type)
@@ -238,23 +249,6 @@ class WaybillService:
                 extra={"extra_fields": {"request_id": request_id, "error": str(exc)}},
             )
             raise HTTPException(status_code=500, detail="خطای داخلی سرور در تشخیص نقشه")
-        finally:
-            if page:
-                try:
-                    await page.close()
-                except Exception:
-                    logger.warning(
-                        "page_close_failed",
-                        extra={"extra_fields": {"request_id": request_id}},
-                    )
-            if internal_session_id:
-                try:
-                    await browser_manager.close_context(internal_session_id)
-                except Exception:
-                    logger.warning(
-                        "context_close_failed",
-                        extra={"extra_fields": {"request_id": request_id}},
-                    )
 
     @staticmethod
     def _build_waybill_payload(request: WaybillMapRequest) -> Dict[str, Any]:
@@ -0,0 +1,222 @@
+"""
+اعتبارسنجی سریع درخواست بارنامه پیش از گرفتن نوبت ترافیک و مرورگر
+
+همه بررسی‌ها در پایتون و بدون I/O انجام می‌شوند: رقم کنترل کد ملی، قالب شماره تلفن
+(ثابت یا همراه برای فرستنده و گیرنده، همراه برای راننده) و پلاک، مقادیر عددی وزن/تعداد/هزینه و وجود استان و شهر در کاتالوگ گزینه‌ها. بررسی کاتالوگ
+فقط وقتی انجام می‌شود که فهرست همان منو قبلا از سامانه خوانده شده باشد؛ فهرست ناشناخته
+به معنای نامعتبر بودن مقدار نیست. preflight_waybill_request همین بررسی‌ها را همراه با وضعیت
+کش‌های فرم برای حالت validate_only برمی‌گرداند.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.automation.form_route import form_routes
+from app.automation.option_catalog import OptionCatalog, option_catalog
+from app.automation.selectors import LocationSelectors
+from app.core.config import utcms_config
+from app.core.text import to_ascii_digits
+from app.schemas.waybill import LocationModel, WaybillMapRequest
+
+_SEPARATORS_RE = re.compile(r"[\s\-_|,٬]+")
+_THOUSANDS_RE = re.compile(r"[\s_,٬]+")
+_MOBILE_RE = re.compile(r"^(?:\+98|0098|98|0)?(9\d{9})$")
+# تلفن ثابت: پیش‌شماره دو رقمی استان و هشت رقم، مثل 02188888888
+_LANDLINE_RE = re.compile(r"^(?:\+98|0098|98|0)([1-8]\d{9})$")
+# دو رقم، یک حرف (یا «الف»)، سه رقم و دو رقم کد استان؛ مثل ۱۲ب۳۴۵ایران۶۷ یا 12A34567
+_PLATE_RE = re.compile(r"^\d{2}(?:الف|[A-Za-z]|[ء-يپ-ی])\d{3}\d{2}$")
+
+# فیلدهای متنی که فرم بدون آن‌ها ثبت نمی‌شود؛ فقط در خلاصه validate_only گزارش می‌شوند
+REQUIRED_TEXT_FIELDS = (
+    (("sender", "name"), "نام فرستنده"),
+    (("sender", "address"), "آدرس فرستنده"),
+    (("receiver", "name"), "نام گیرنده"),
+    (("receiver", "address"), "آدرس گیرنده"),
+    (("origin", "province"), "استان مبدا"),
+    (("origin", "city"), "شهر مبدا"),
+    (("destination", "province"), "استان مقصد"),
+    (("destination", "city"), "شهر مقصد"),
+)
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    loc: Tuple[str, ...]
+    msg: str
+
+    def as_error(self) -> Dict[str, Any]:
+        """هم‌شکل خطاهای اعتبارسنجی FastAPI برای پاسخ 422"""
+        return {"loc": ["body", *self.loc], "msg": self.msg, "type": "value_error"}
+
+
+def _compact(value: Any) -> str:
+    return _SEPARATORS_RE.sub("", to_ascii_digits(str(value or "")).strip())
+
+
+def is_valid_national_code(value: Any) -> bool:
+    code = _compact(value)
+    if not code.isdigit() or not 8 <= len(code) <= 10:
+        return False
+    code = code.zfill(10)
+    if len(set(code)) == 1:
+        return False
+    remainder = sum(int(digit) * (10 - index) for index, digit in enumerate(code[:9])) % 11
+    check = int(code[9])
+    return check == remainder if remainder < 2 else check == 11 - remainder
+
+
+def normalize_mobile(value: Any) -> Optional[str]:
+    """شماره موبایل به شکل 09xxxxxxxxx یا None"""
+    match = _MOBILE_RE.match(_compact(value))
+    return f"0{match.group(1)}" if match else None
+
+
+def normalize_phone(value: Any) -> Optional[str]:
+    """شماره موبایل یا تلفن ثابت به شکل 0xxxxxxxxxx یا None"""
+    mobile = normalize_mobile(value)
+    if mobile:
+        return mobile
+    match = _LANDLINE_RE.match(_compact(value))
+    return f"0{match.group(1)}" if match else None
+
+
+def is_valid_plate(value: Any) -> bool:
+    plate = _compact(value).replace("ایران", "").replace("IR", "")
+    return bool(_PLATE_RE.match(plate))
+
+
+def parse_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        try:
+            text = _THOUSANDS_RE.sub("", to_ascii_digits(str(value)))
+            number = float(text.replace("٫", ".").replace("/", "."))
+        except ValueError:
+            return None
+    return number if math.isfinite(number) else None
+
+
+def validate_waybill_request(
+    request: WaybillMapRequest,
+    catalog: Optional[OptionCatalog] = None,
+) -> List[ValidationIssue]:
+    """همه خطاهای قابل تشخیص پیش از باز کردن فرم؛ فهرست خالی یعنی درخواست قابل ارسال است"""
+    catalog = option_catalog if catalog is None else catalog
+    issues: List[ValidationIssue] = []
+
+    if not is_valid_national_code(request.sender.national_code):
+        issues.append(ValidationIssue(("sender", "national_code"), "کد ملی فرستنده نامعتبر است"))
+    if request.vehicle.driver_national_code and not is_valid_national_code(request.vehicle.driver_national_code):
+        issues.append(ValidationIssue(("vehicle", "driver_national_code"), "کد ملی راننده نامعتبر است"))
+
+    # فرستنده و گیرنده ممکن است تلفن ثابت داشته باشند؛ تلفن راننده باید همراه باشد
+    phones = (
+        (("sender", "phone"), request.sender.phone, True, normalize_phone, "تلفن فرستنده نامعتبر است"),
+        (("receiver", "phone"), request.receiver.phone, True, normalize_phone, "تلفن گیرنده نامعتبر است"),
+        (("vehicle", "driver_phone"), request.vehicle.driver_phone, False, normalize_mobile, "تلفن همراه راننده نامعتبر است"),
+    )
+    for loc, phone, required, normalize, message in phones:
+        if (phone or required) and normalize(phone) is None:
+            issues.append(ValidationIssue(loc, message))
+
+    if request.vehicle.plate and not is_valid_plate(request.vehicle.plate):
+        issues.append(ValidationIssue(("vehicle", "plate"), "پلاک خودرو نامعتبر است"))
+
+    weight = parse_number(request.cargo.weight)
+    if weight is None or weight <= 0:
+        issues.append(ValidationIssue(("cargo", "weight"), "وزن کالا باید عددی بزرگ‌تر از صفر باشد"))
+    count = parse_number(request.cargo.count)
+    if count is None or count < 1 or not count.is_integer():
+        issues.append(ValidationIssue(("cargo", "count"), "تعداد کالا باید عدد صحیح مثبت باشد"))
+    if request.financial.cost not in (None, ""):
+        cost = parse_number(request.financial.cost)
+        if cost is None or cost < 0:
+            issues.append(ValidationIssue(("financial", "cost"), "هزینه حمل باید عددی نامنفی باشد"))
+
+    for name, location in (("origin", request.origin), ("destination", request.destination)):
+        issues.extend(_check_location(name, location, catalog)[1])
+
+    return issues
+
+
+def preflight_waybill_request(
+    request: WaybillMapRequest,
+    catalog: Optional[OptionCatalog] = None,
+    account: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    خلاصه آمادگی درخواست برای حالت validate_only، بدون مرورگر و نوبت ترافیک
+
+    علاوه بر خطاهای validate_waybill_request، فیلدهای متنی خالی (REQUIRED_TEXT_FIELDS؛ در
+    پیش‌اعتبارسنجی safe/full بررسی نمی‌شوند) و وضعیت کش‌های فرم گزارش می‌شود: آیا استان/شهر
+    با فهرست خوانده‌شده از سامانه تایید شده، انتخابگر منوهای مکان در کاتالوگ ثبت شده و مسیر
+    رسیدن به فرم برای این حساب معلوم است.
+    """
+    catalog = option_catalog if catalog is None else catalog
+    account = utcms_config.UTCMS_USERNAME if account is None else account
+    issues = [*_blank_text_fields(request), *validate_waybill_request(request, catalog)]
+
+    locations = {"origin": (request.origin, "Origin"), "destination": (request.destination, "Destination")}
+    return {
+        "ready_for_submit": not issues,
+        "issues": [issue.as_error() for issue in issues],
+        "checks": {
+            "catalog": {name: _check_location(name, location, catalog)[0] for name, (location, _) in locations.items()},
+            "cached_selectors": {
+                name: {
+                    level: catalog.preferred_selector(_menu_selectors(templates, prefix)) is not None
+                    for level, templates in (
+                        ("province", LocationSelectors.PROVINCE_TEMPLATES),
+                        ("city", LocationSelectors.CITY_TEMPLATES),
+                        ("district", LocationSelectors.DISTRICT_TEMPLATES),
+                    )
+                }
+                for name, (_, prefix) in locations.items()
+            },
+            "form_route": "known" if form_routes.route_for(account) else "unknown",
+        },
+    }
+
+
+def _blank_text_fields(request: WaybillMapRequest) -> List[ValidationIssue]:
+    issues: List[ValidationIssue] = []
+    for loc, label in REQUIRED_TEXT_FIELDS:
+        section, field = loc
+        if not str(getattr(getattr(request, section), field) or "").strip():
+            issues.append(ValidationIssue(loc, f"{label} خالی است"))
+    return issues
+
+
+def _menu_selectors(templates: List[str], prefix: str) -> List[str]:
+    return [template.format(prefix=prefix, prefix_lower=prefix.lower()) for template in templates]
+
+
+def _check_location(
+    name: str,
+    location: LocationModel,
+    catalog: OptionCatalog,
+) -> Tuple[str, List[ValidationIssue]]:
+    """(verified | unverified | invalid، خطاها) بر اساس فهرست‌های موجود در کاتالوگ"""
+    if not catalog.knows("province", ()):
+        return "unverified", []
+
+    province_value = catalog.lookup("province", (), location.province)
+    if province_value is None:
+        return "invalid", [ValidationIssue((name, "province"), f"استان «{location.province}» در فهرست سامانه نیست")]
+
+    city_parents = (province_value,)
+    if not catalog.knows("city", city_parents):
+        return "unverified", []
+    if catalog.lookup("city", city_parents, location.city) is None:
+        return "invalid", [
+            ValidationIssue(
+                (name, "city"),
+                f"شهر «{location.city}» در استان «{location.province}» در فهرست سامانه نیست",
+            )
+        ]
+    return "verified", []
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for log redaction throughput (legacy sequential regexes vs single-pass engine)."""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.append(os.getcwd())
+
+from app.core.logging import sanitize  # noqa: E402
+
+
+_LEGACY_PATTERNS = [
+    (r"(?i)(authorization\s*[:=]\s*bearer\s+)[a-z0-9._\-]+", r"\1***"),
+    (r"(?i)(api[_-]?key\s*[:=]\s*)[^\s,;]+", r"\1***"),
+    (r"(?i)(jwt[_-]?secret\s*[:=]\s*)[^\s,;]+", r"\1***"),
+    (r"(?i)(password\s*[:=]\s*)[^\s,;]+", r"\1***"),
+    (r"(?i)(token\s*[:=]\s*)[^\s,;]+", r"\1***"),
+]
+
+
+def _legacy_sanitize_string(value: str) -> str:
+    for pattern, replacement in _LEGACY_PATTERNS:
+        value = re.sub(pattern, replacement, value)
+    return value
+
+
+def _legacy_sanitize(value):
+    if isinstance(value, dict):
+        clean = {}
+        for key, raw in value.items():
+            lowered = str(key).lower()
+            if any(k in lowered for k in ("password", "secret", "token", "api_key", "authorization")):
+                clean[key] = "***"
+            else:
+                clean[key] = _legacy_sanitize(raw)
+        return clean
+    if isinstance(value, (list, tuple, set)):
+        return [_legacy_sanitize(v) for v in value]
+    if isinstance(value, str):
+        return _legacy_sanitize_string(value)
+    return value
+
+
+# Representative log payloads: mostly clean event names and selectors, a few secrets.
+PAYLOADS = [
+    "safe_fill_failed",
+    {"selector": "input[name='txtSenderMobile']", "error": "Timeout 5000ms exceeded."},
+    {"field": "نوع کالا", "value": "General"},
+    {"method": "POST", "path": "/waybill/create-with-map", "duration_ms": 812.4, "client": "10.0.0.4"},
+    "http_request",
+    {"reason": "login failed: password=hunter2 token=abc123"},
+    {"api_key": "XYZ", "nested": {"authorization": "Bearer abc", "links": ["a", "b", "c"]}},
+]
+
+
+def _run(func, number: int) -> float:
+    return timeit.timeit(lambda: [func(item) for item in PAYLOADS], number=number)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000, help="iterations over the payload set")
+    args = parser.parse_args()
+
+    for item in PAYLOADS:
+        if sanitize(item) != _legacy_sanitize(item):
+            print(f"MISMATCH for payload: {item!r}")
+            return 1
+
+    legacy = _run(_legacy_sanitize, args.number)
+    current = _run(sanitize, args.number)
+    total = args.number * len(PAYLOADS)
+
+    print(f"payloads:  {total}")
+    print(f"legacy:    {total / legacy:,.0f} payloads/s")
+    print(f"current:   {total / current:,.0f} payloads/s")
+    print(f"speedup:   {legacy / current:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""Load generator and throughput benchmark for waybill creation.
+
+Drives either the HTTP API (`POST /waybill/create-with-map`) or `WaybillService`
+in-process at a configurable arrival rate, then reports throughput, latency
+percentiles and browser (Chromium) RSS/CPU sampled from /proc. The JSON report
+is stable so two runs can be compared with `--compare`.
+
+Examples:
+    # In-process against the local mock site (started automatically)
+    python scripts/bench_waybill_throughput.py --target service --mock-site \
+        --rate 0.5 --duration 120 --output bench/report.json
+
+    # Against a running API (configured separately to point at a stand-in site)
+    python scripts/bench_waybill_throughput.py --target api --api-url http://127.0.0.1:8000 \
+        --api-key "$API_KEY" --rate 1 --duration 60 --compare bench/previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.live_smoke import build_payload  # noqa: E402
+
+REPORT_SCHEMA_VERSION = 1
+BROWSER_PROCESS_MARKERS = ("chrome", "chromium", "headless_shell")
+
+
+@dataclass
+class Sample:
+    index: int
+    scheduled_at: float
+    started_at: float
+    latency_ms: float
+    status: int
+    error: Optional[str] = None
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile (same convention as ReportService._percentile)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = int(round((pct / 100) * (len(ordered) - 1)))
+    index = min(max(index, 0), len(ordered) - 1)
+    return round(ordered[index], 2)
+
+
+def arrival_offsets(rate: float, duration: float, arrival: str, seed: Optional[int] = None) -> List[float]:
+    """Request start offsets (seconds from t0) for a constant or Poisson arrival process."""
+    if rate <= 0 or duration <= 0:
+        return []
+    if arrival == "constant":
+        count = int(rate * duration)
+        return [i / rate for i in range(count)]
+
+    rng = random.Random(seed)
+    offsets: List[float] = []
+    t = rng.expovariate(rate)
+    while t < duration:
+        offsets.append(t)
+        t += rng.expovariate(rate)
+    return offsets
+
+
+class BrowserResourceSampler:
+    """Samples total RSS and CPU of Chromium processes via /proc."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.rss_mb: List[float] = []
+        self.cpu_percent: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    @staticmethod
+    def _browser_pids() -> List[int]:
+        pids: List[int] = []
+        proc = Path("/proc")
+        if not proc.exists():
+            return pids
+        for entry in proc.iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                comm = (entry / "comm").read_text().strip().lower()
+            except OSError:
+                continue
+            if any(marker in comm for marker in BROWSER_PROCESS_MARKERS):
+                pids.append(int(entry.name))
+        return pids
+
+    @staticmethod
+    def _rss_kb(pid: int) -> int:
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            pass
+        return 0
+
+    @staticmethod
+    def _cpu_ticks(pid: int) -> int:
+        try:
+            stat = Path(f"/proc/{pid}/stat").read_text()
+            fields = stat.rsplit(")", 1)[1].split()
+            return int(fields[11]) + int(fields[12])
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def sample_once(self) -> Dict[str, float]:
+        pids = self._browser_pids()
+        return {
+            "rss_kb": float(sum(self._rss_kb(pid) for pid in pids)),
+            "cpu_ticks": float(sum(self._cpu_ticks(pid) for pid in pids)),
+            "processes": float(len(pids)),
+        }
+
+    async def _run(self) -> None:
+        previous = self.sample_once()
+        previous_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            current = self.sample_once()
+            now = time.monotonic()
+            elapsed = max(1e-6, now - previous_at)
+            self.rss_mb.append(current["rss_kb"] / 1024)
+            cpu_seconds = max(0.0, current["cpu_ticks"] - previous["cpu_ticks"]) / self._clock_ticks
+            self.cpu_percent.append(100.0 * cpu_seconds / elapsed)
+            previous, previous_at = current, now
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self) -> Dict[str, Any]:
+        def stats(values: List[float]) -> Dict[str, float]:
+            if not values:
+                return {"max": 0.0, "mean": 0.0, "p95": 0.0}
+            return {
+                "max": round(max(values), 2),
+                "mean": round(sum(values) / len(values), 2),
+                "p95": percentile(values, 95),
+            }
+
+        return {
+            "samples": len(self.rss_mb),
+            "browser_rss_mb": stats(self.rss_mb),
+            "browser_cpu_percent": stats(self.cpu_percent),
+        }
+
+
+async def run_load(
+    send: Callable[[int], Awaitable[int]],
+    offsets: List[float],
+    max_in_flight: int = 0,
+) -> List[Sample]:
+    """Open-loop load: request i starts at offsets[i] regardless of earlier completions."""
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    limiter = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+    samples: List[Sample] = []
+
+    async def one(index: int, offset: float) -> None:
+        delay = t0 + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if limiter is not None and limiter.locked():
+            samples.append(Sample(index, offset, loop.time() - t0, 0.0, status=0, error="skipped_max_in_flight"))
+            return
+
+        started = loop.time()
+        status, error = 0, None
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            status = await send(index)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            if limiter is not None:
+                limiter.release()
+        samples.append(
+            Sample(index, offset, started - t0, (loop.time() - started) * 1000, status=status, error=error)
+        )
+
+    await asyncio.gather(*(one(i, offset) for i, offset in enumerate(offsets)))
+    samples.sort(key=lambda sample: sample.index)
+    return samples
+
+
+def summarize(samples: List[Sample], wall_seconds: float) -> Dict[str, Any]:
+    attempted = [s for s in samples if s.error != "skipped_max_in_flight"]
+    succeeded = [s for s in attempted if 200 <= s.status < 300]
+    latencies = [s.latency_ms for s in succeeded]
+    status_counts: Dict[str, int] = {}
+    for sample in samples:
+        key = "skipped" if sample.error == "skipped_max_in_flight" else str(sample.status or "exception")
+        status_counts[key] = status_counts.get(key, 0) + 1
+
+    wall_seconds = max(wall_seconds, 1e-6)
+    return {
+        "requests": len(samples),
+        "attempted": len(attempted),
+        "succeeded": len(succeeded),
+        "failed": len(attempted) - len(succeeded),
+        "success_rate": round(len(succeeded) / len(attempted), 4) if attempted else 0.0,
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_per_min": round(len(succeeded) / wall_seconds * 60, 2),
+        "status_counts": dict(sorted(status_counts.items())),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        },
+    }
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else str(key), item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Numeric diff of the `results` and `resources` sections of two reports."""
+    before: Dict[str, float] = {}
+    after: Dict[str, float] = {}
+    for section in ("results", "resources"):
+        _flatten(section, baseline.get(section, {}), before)
+        _flatten(section, current.get(section, {}), after)
+
+    diff: Dict[str, Dict[str, Optional[float]]] = {}
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        change_pct = None
+        if old not in (None, 0.0) and new is not None:
+            change_pct = round((new - old) / abs(old) * 100, 2)
+        diff[key] = {"baseline": old, "current": new, "change_pct": change_pct}
+    return diff
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_site(args: argparse.Namespace) -> "tuple[subprocess.Popen, str]":
+    port = args.mock_port or _free_port()
+    command = [
+        sys.executable,
+        str(PROJECT_ROOT / "scripts" / "mock_utcms_site.py"),
+        "--port", str(port),
+        "--captcha-value", args.mock_captcha,
+        "--map", args.mock_map,
+        "--latency-ms", str(args.mock_latency_ms),
+        "--rate-limit-ratio", str(args.mock_rate_limit_ratio),
+    ]
+    process = subprocess.Popen(command, cwd=PROJECT_ROOT)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("mock UTCMS site did not start")
+
+
+def configure_service_env(site_url: str, args: argparse.Namespace, workdir: str) -> None:
+    """Must run before `app` is imported: UTCMSConfig reads the environment at import time."""
+    defaults = {
+        "BASE_URL": site_url,
+        "LOGIN_URL": f"{site_url}/Login",
+        "WAYBILL_URL": f"{site_url}/Barname/Waybill/Create",
+        "UTCMS_USERNAME": "bench",
+        "UTCMS_PASSWORD": "bench",
+        "UTCMS_CAPTCHA_VALUE": args.mock_captcha,
+        "HEADLESS": "true",
+        "AUTH_STATE_PATH": os.path.join(workdir, "auth_state.json"),
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench_stats.db')}",
+    }
+    for key, value in defaults.items():
+        if args.mock_site or key not in os.environ:
+            os.environ[key] = value
+
+
+async def _service_sender(args: argparse.Namespace) -> "tuple[Callable[[int], Awaitable[int]], Callable[[], Awaitable[None]]]":
+    from fastapi import HTTPException
+
+    from app.automation.browser import browser_manager
+    from app.core.database import init_db
+    from app.schemas.waybill import WaybillMapRequest
+    from app.services.waybill_service import waybill_service
+
+    await init_db()
+    await browser_manager.initialize()
+    payload = build_payload()
+    payload["operation_mode"] = args.mode
+
+    async def send(index: int) -> int:
+        request = WaybillMapRequest(**{**payload, "session_id": f"bench-{index}"})
+        try:
+            await waybill_service.create_waybill_with_map(request)
+            return 200
+        except HTTPException as exc:
+            return exc.status_code
+
+    return send, browser_manager.close
+
+
+async def _api_sender(args: argparse.Namespace) -> "tuple[Callable[[int], Awaitable[int]], Callable[[], Awaitable[None]]]":
+    import httpx
+
+    headers = {"X-API-Key": args.api_key} if args.api_key else {}
+    client = httpx.AsyncClient(base_url=args.api_url.rstrip("/"), timeout=args.timeout, headers=headers)
+    payload = build_payload()
+    payload["operation_mode"] = args.mode
+
+    async def send(index: int) -> int:
+        response = await client.post(
+            "/waybill/create-with-map",
+            json={**payload, "session_id": f"bench-{index}"},
+        )
+        return response.status_code
+
+    return send, client.aclose
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.target == "service":
+        send, close = await _service_sender(args)
+    else:
+        send, close = await _api_sender(args)
+
+    offsets = arrival_offsets(args.rate, args.duration, args.arrival, seed=args.seed)
+    sampler = BrowserResourceSampler(interval=args.sample_interval)
+    sampler.start()
+    started = time.monotonic()
+    try:
+        samples = await run_load(send, offsets, max_in_flight=args.max_in_flight)
+    finally:
+        wall_seconds = time.monotonic() - started
+        await sampler.stop()
+        await close()
+
+    return {
+        "schema": REPORT_SCHEMA_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "target": args.target,
+        "config": {
+            "mode": args.mode,
+            "arrival": args.arrival,
+            "rate_per_s": args.rate,
+            "duration_s": args.duration,
+            "max_in_flight": args.max_in_flight,
+            "mock_site": bool(args.mock_site),
+            "mock_latency_ms": args.mock_latency_ms if args.mock_site else None,
+            "waybill_max_concurrent": os.getenv("WAYBILL_MAX_CONCURRENT"),
+            "waybill_min_gap_seconds": os.getenv("WAYBILL_MIN_GAP_SECONDS"),
+        },
+        "results": summarize(samples, wall_seconds),
+        "resources": sampler.summary(),
+        "errors": sorted({s.error for s in samples if s.error})[:20],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Waybill throughput benchmark")
+    parser.add_argument("--target", choices=("service", "api"), default="service")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--mode", choices=("safe", "full"), default="safe")
+    parser.add_argument("--rate", type=float, default=0.5, help="arrival rate (requests/second)")
+    parser.add_argument("--duration", type=float, default=60.0, help="arrival window in seconds")
+    parser.add_argument("--arrival", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="skip arrivals above this many in flight (0 = unbounded)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="HTTP timeout for --target api")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="browser RSS/CPU sampling interval")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--mock-site", action="store_true", help="start scripts/mock_utcms_site.py and point the service at it")
+    parser.add_argument("--mock-port", type=int, default=0)
+    parser.add_argument("--mock-latency-ms", type=float, default=0.0)
+    parser.add_argument("--mock-rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--mock-map", choices=("leaflet", "openlayers", "none"), default="leaflet")
+    parser.add_argument("--mock-captcha", default="12345")
+    parser.add_argument("--output", default="", help="write the JSON report to this path")
+    parser.add_argument("--compare", default="", help="baseline report to diff against")
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    mock_process = None
+    workdir = tempfile.mkdtemp(prefix="utcms-bench-")
+
+    try:
+        if args.mock_site:
+            mock_process, site_url = start_mock_site(args)
+            if args.target == "service":
+                configure_service_env(site_url, args, workdir)
+        elif args.target == "service":
+            os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench_stats.db')}")
+
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        if mock_process is not None:
+            mock_process.terminate()
+            try:
+                mock_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                mock_process.kill()
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        report["comparison"] = {
+            "baseline_commit": baseline.get("git_commit"),
+            "metrics": compare_reports(baseline, report),
+        }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0 if report["results"]["attempted"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
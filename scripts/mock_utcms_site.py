@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""Local stand-in for utcms.ir used for offline end-to-end and load testing.
+
+Serves a login page (with captcha image), the multi-step waybill form
+(`#btnGoLVL2`/`#btnGoLVL3`, cascading province/city/district selects and a
+Leaflet or OpenLayers map stub), success/error pages and a not-found shell.
+Login page fields come from `docs/site-audit/form_fields_unique.json`; the
+waybill form uses the selectors the automation targets. Latency and HTTP 429
+responses can be injected to exercise pacing and retry behaviour.
+
+Usage:
+    python scripts/mock_utcms_site.py --port 8765 --latency-ms 150 --rate-limit-ratio 0.02
+
+Then point the bot at it:
+    BASE_URL=http://127.0.0.1:8765 LOGIN_URL=http://127.0.0.1:8765/Login \
+    WAYBILL_URL=http://127.0.0.1:8765/Barname/Waybill/Create UTCMS_CAPTCHA_VALUE=12345 ...
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import random
+import secrets
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FIELD_INVENTORY_PATH = PROJECT_ROOT / "docs" / "site-audit" / "form_fields_unique.json"
+# Captured login page in the site audit (source_html prefix of the inventory rows).
+LOGIN_INVENTORY_SOURCE = "04-"
+
+AUTH_COOKIE = ".AspNetCore.Identity.Application"
+RULES_COOKIE = "RulesAccepted"
+LOGIN_PATHS = ("/Login", "/Barname/Account/Login", "/Account/Login", "/Barname/Login")
+WAYBILL_PATHS = ("/Barname/Waybill/Create", "/Barname/Document/HagigiHogugi", "/barname/Document/HagigiHogugi")
+
+# province -> city -> districts
+LOCATION_CATALOG: Dict[str, Dict[str, List[str]]] = {
+    "تهران": {
+        "تهران": ["منطقه ۱", "منطقه ۲", "منطقه ۳", "منطقه ۶", "منطقه ۱۲"],
+        "ری": ["مرکز"],
+        "اسلامشهر": ["مرکز"],
+    },
+    "خراسان رضوی": {
+        "مشهد": ["منطقه ۱", "منطقه ۲", "ثامن"],
+        "نیشابور": ["مرکز"],
+    },
+    "اصفهان": {
+        "اصفهان": ["منطقه ۱", "منطقه ۳", "منطقه ۱۴"],
+        "کاشان": ["مرکز"],
+    },
+    "فارس": {
+        "شیراز": ["منطقه ۱", "منطقه ۴"],
+        "مرودشت": ["مرکز"],
+    },
+    "آذربایجان شرقی": {
+        "تبریز": ["منطقه ۱", "منطقه ۲"],
+        "مراغه": ["مرکز"],
+    },
+    "خوزستان": {
+        "اهواز": ["منطقه ۱", "منطقه ۲"],
+        "آبادان": ["مرکز"],
+    },
+}
+
+
+@dataclass
+class MockSiteConfig:
+    username: str = ""  # empty accepts any non-empty username
+    password: str = ""  # empty accepts any non-empty password
+    captcha_value: str = "12345"  # empty accepts any captcha input
+    map_type: str = "leaflet"  # leaflet | openlayers | none
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    rate_limit_ratio: float = 0.0
+    max_requests_per_second: float = 0.0
+    show_rules_modal: bool = False
+    submit_error_ratio: float = 0.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockSiteState:
+    sessions: Set[str] = field(default_factory=set)
+    submissions: List[Dict[str, Any]] = field(default_factory=list)
+    request_count: int = 0
+    throttled_count: int = 0
+    window_started: float = 0.0
+    window_count: int = 0
+
+
+def load_field_inventory(source_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+    try:
+        rows = json.loads(FIELD_INVENTORY_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if source_prefix:
+        rows = [row for row in rows if str(row.get("source_html", "")).startswith(source_prefix)]
+    return rows
+
+
+async def _read_form(request: Request) -> Dict[str, str]:
+    # Parsed by hand so the mock does not need python-multipart.
+    body = (await request.body()).decode("utf-8", errors="replace")
+    return {key: values[-1] for key, values in parse_qs(body, keep_blank_values=True).items()}
+
+
+def _attr(name: str, value: Any) -> str:
+    if value in (None, ""):
+        return ""
+    return f' {name}="{html.escape(str(value), quote=True)}"'
+
+
+def _render_inventory_field(row: Dict[str, Any]) -> str:
+    tag = row.get("tag")
+    attrs = (
+        _attr("id", row.get("id"))
+        + _attr("name", row.get("name"))
+        + _attr("class", row.get("class"))
+    )
+    if tag == "input":
+        return f"<input{attrs}{_attr('type', row.get('type') or 'text')}>"
+    if tag == "select":
+        return f"<select{attrs}></select>"
+    if tag == "textarea":
+        return f"<textarea{attrs}></textarea>"
+    if tag == "button":
+        return f"<button{attrs}{_attr('type', row.get('type') or 'button')}></button>"
+    return ""
+
+
+def captcha_png(width: int = 120, height: int = 40, seed: int = 0) -> bytes:
+    """Return a small grayscale noise PNG; content is irrelevant to the mock check."""
+    rng = random.Random(seed)
+    raw = b"".join(
+        b"\x00" + bytes(rng.randint(160, 255) for _ in range(width))
+        for _ in range(height)
+    )
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return (
+        "<!DOCTYPE html><html lang=\"fa\" dir=\"rtl\"><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title>{head}</head><body>{body}</body></html>"
+    )
+
+
+def _nav() -> str:
+    return (
+        "<nav class=\"menu\"><a href=\"/Barname/Waybill/Create\">صدور بارنامه</a>"
+        " | <a href=\"/Home/Index\">خانه</a> | <a href=\"/Logout\">خروج</a></nav>"
+    )
+
+
+def render_login_page(error: Optional[str] = None) -> str:
+    inventory = "".join(
+        _render_inventory_field(row)
+        for row in load_field_inventory(LOGIN_INVENTORY_SOURCE)
+        if row.get("type") == "hidden" or "visually-hidden" in str(row.get("class") or "")
+    )
+    error_html = (
+        f"<div class=\"validation-summary-errors\"><ul><li>{html.escape(error)}</li></ul></div>"
+        if error
+        else ""
+    )
+    body = f"""
+<form method="post" action="/Login" id="loginForm">
+  {error_html}
+  <input type="hidden" name="RequestVerificationToken" value="{secrets.token_hex(16)}">
+  <div style="display:none">{inventory}</div>
+  <input id="user-name" name="UserName" type="text" class="form-control" autocomplete="username">
+  <input id="user-password" name="Password" type="password" class="form-control password">
+  <img id="DNTCaptchaImage" src="/DNTCaptchaImage/Show" alt="captcha" width="120" height="40">
+  <input id="DNTCaptchaInputText" name="DNTCaptchaInputText" type="text" class="text-box single-line form-control">
+  <button id="inter" type="submit" class="btn btn-primary d-grid w-100">ورود</button>
+</form>"""
+    return _page("ورود به سامانه", body)
+
+
+def _options(values: List[str], placeholder: str) -> str:
+    items = [f"<option value=\"\">{html.escape(placeholder)}</option>"]
+    items.extend(
+        f"<option value=\"{index}\">{html.escape(value)}</option>"
+        for index, value in enumerate(values, start=1)
+    )
+    return "".join(items)
+
+
+def _location_block(prefix: str, label: str) -> str:
+    provinces = _options(list(LOCATION_CATALOG), "انتخاب استان")
+    return f"""
+<fieldset class="location" data-prefix="{prefix}">
+  <legend>{label}</legend>
+  <select name="{prefix}Province" id="{prefix}Province" class="form-select province">{provinces}</select>
+  <select name="{prefix}City" id="{prefix}City" class="form-select city"><option value="">انتخاب شهر</option></select>
+  <select name="{prefix}District" id="{prefix}District" class="form-select district"><option value="">انتخاب منطقه</option></select>
+  <textarea name="{prefix}Address" id="{prefix}Address"></textarea>
+  <input type="hidden" name="{prefix}Lat" id="{prefix}Lat">
+  <input type="hidden" name="{prefix}Lng" id="{prefix}Lng">
+</fieldset>"""
+
+
+LEAFLET_STUB = """
+<script>
+(function () {
+  function LatLng(lat, lng) { this.lat = lat; this.lng = lng; }
+  function MockMap(el) {
+    this._el = el; this._handlers = {}; this._center = new LatLng(35.6892, 51.3890); this._zoom = 6;
+    el._leaflet_map = this;
+  }
+  MockMap.prototype.setView = function (ll, zoom) { this._center = ll; this._zoom = zoom; this.fire('moveend', {}); return this; };
+  MockMap.prototype.getCenter = function () { return this._center; };
+  MockMap.prototype.latLngToContainerPoint = function () { return {x: this._el.clientWidth / 2, y: this._el.clientHeight / 2}; };
+  MockMap.prototype.latLngToLayerPoint = MockMap.prototype.latLngToContainerPoint;
+  MockMap.prototype.on = function (type, fn) { (this._handlers[type] = this._handlers[type] || []).push(fn); return this; };
+  MockMap.prototype.off = function (type) { delete this._handlers[type]; return this; };
+  MockMap.prototype.fire = function (type, ev) { (this._handlers[type] || []).slice().forEach(function (fn) { fn(ev || {}); }); return this; };
+  window.L = {
+    version: '1.9.4-mock',
+    Map: MockMap,
+    latLng: function (lat, lng) { return new LatLng(lat, lng); },
+    map: function (el) { return new MockMap(typeof el === 'string' ? document.getElementById(el) : el); }
+  };
+  window.L.Map.getMap = function (selector) { var el = document.querySelector(selector); return el && el._leaflet_map; };
+  document.addEventListener('DOMContentLoaded', function () {
+    var map = window.L.map('map');
+    map.on('click', function (ev) { window.__mockMapPick(ev.latlng.lat, ev.latlng.lng); });
+  });
+})();
+</script>"""
+
+OPENLAYERS_STUB = """
+<script>
+(function () {
+  function View() { this._center = [0, 0]; this._zoom = 6; }
+  View.prototype.setCenter = function (c) { this._center = c; };
+  View.prototype.getCenter = function () { return this._center; };
+  View.prototype.setZoom = function (z) { this._zoom = z; };
+  View.prototype.getAnimating = function () { return false; };
+  function MockMap(opts) {
+    this._el = typeof opts.target === 'string' ? document.getElementById(opts.target) : opts.target;
+    this._view = new View(); this._handlers = {}; this._el._map = this;
+  }
+  MockMap.prototype.getView = function () { return this._view; };
+  MockMap.prototype.getPixelFromCoordinate = function () { return [this._el.clientWidth / 2, this._el.clientHeight / 2]; };
+  MockMap.prototype.on = function (type, fn) { (this._handlers[type] = this._handlers[type] || []).push(fn); };
+  MockMap.prototype.dispatchEvent = function (ev) { (this._handlers[ev.type] || []).slice().forEach(function (fn) { fn(ev); }); };
+  window.ol = {
+    Map: MockMap,
+    proj: {
+      fromLonLat: function (c) { return [c[0], c[1]]; },
+      toLonLat: function (c) { return [c[0], c[1]]; }
+    }
+  };
+  window.ol.Map.getMapById = function (selector) { var el = document.querySelector(selector); return el && el._map; };
+  document.addEventListener('DOMContentLoaded', function () {
+    var map = new window.ol.Map({target: 'map'});
+    map.on('click', function (ev) { var ll = window.ol.proj.toLonLat(ev.coordinate); window.__mockMapPick(ll[1], ll[0]); });
+  });
+})();
+</script>"""
+
+FORM_SCRIPT = """
+<script>
+(function () {
+  var picks = 0;
+  window.__mockMapPick = function (lat, lng) {
+    var prefix = picks % 2 === 0 ? 'Origin' : 'Destination';
+    picks += 1;
+    document.getElementById(prefix + 'Lat').value = lat;
+    document.getElementById(prefix + 'Lng').value = lng;
+  };
+  function fill(select, items, placeholder) {
+    select.innerHTML = '';
+    var empty = document.createElement('option'); empty.value = ''; empty.textContent = placeholder; select.appendChild(empty);
+    items.forEach(function (item) {
+      var opt = document.createElement('option'); opt.value = item.id; opt.textContent = item.name; select.appendChild(opt);
+    });
+  }
+  document.addEventListener('DOMContentLoaded', function () {
+    document.getElementById('btnGoLVL2').addEventListener('click', function () {
+      document.getElementById('lvl2').style.display = 'block';
+    });
+    document.getElementById('btnGoLVL3').addEventListener('click', function () {
+      document.getElementById('lvl3').style.display = 'block';
+    });
+    document.querySelectorAll('fieldset.location').forEach(function (fs) {
+      var prefix = fs.dataset.prefix;
+      var province = document.getElementById(prefix + 'Province');
+      var city = document.getElementById(prefix + 'City');
+      var district = document.getElementById(prefix + 'District');
+      province.addEventListener('change', function () {
+        fetch('/Barname/Location/Cities?provinceId=' + encodeURIComponent(province.value))
+          .then(function (r) { return r.json(); })
+          .then(function (items) { fill(city, items, 'انتخاب شهر'); fill(district, [], 'انتخاب منطقه'); });
+      });
+      city.addEventListener('change', function () {
+        fetch('/Barname/Location/Districts?provinceId=' + encodeURIComponent(province.value) + '&cityId=' + encodeURIComponent(city.value))
+          .then(function (r) { return r.json(); })
+          .then(function (items) { fill(district, items, 'انتخاب منطقه'); });
+      });
+    });
+  });
+})();
+</script>"""
+
+
+def render_waybill_form(config: MockSiteConfig, rules_pending: bool = False, error: Optional[str] = None) -> str:
+    map_stub = {"leaflet": LEAFLET_STUB, "openlayers": OPENLAYERS_STUB}.get(config.map_type, "")
+    map_html = "<div id=\"map\" style=\"width:600px;height:300px\"></div>" if map_stub else ""
+    error_html = (
+        f"<div class=\"validation-summary-errors\"><ul><li>{html.escape(error)}</li></ul></div>"
+        if error
+        else ""
+    )
+    rules_html = ""
+    if rules_pending:
+        rules_html = """
+<div id="ExceptRulesModalReal" class="modal show" style="display:block">
+  <label><input type="checkbox" id="ruleExcepted" name="ruleExcepted" class="form-check-input"> قوانین را می‌پذیرم</label>
+  <button id="submitRules" type="button" class="btn btn-primary"
+    onclick="if(document.getElementById('ruleExcepted').checked){document.cookie='RulesAccepted=1;path=/';location.reload();}">تایید</button>
+</div>"""
+    body = f"""
+{_nav()}
+{rules_html}
+<form method="post" action="/Barname/Waybill/Create" id="waybillForm">
+  {error_html}
+  <input type="hidden" name="RequestVerificationToken" value="{secrets.token_hex(16)}">
+  <section id="lvl1">
+    <select name="senderSelectType" id="senderSelectType"><option value="1">حقیقی</option><option value="2">حقوقی</option></select>
+    <input name="txtSenderFirstName" id="txtSenderFirstName">
+    <input name="txtSenderLastName" id="txtSenderLastName">
+    <input name="txtSenderMobile" id="txtSenderMobile">
+    <input name="txtSenderTell" id="txtSenderTell">
+    <input name="txtSenderNationalCode" id="txtSenderNationalCode">
+    <button type="button" id="btnGoLVL2">مرحله بعد</button>
+  </section>
+  <section id="lvl2" style="display:none">
+    <select name="receiverSelectType" id="receiverSelectType"><option value="1">حقیقی</option><option value="2">حقوقی</option></select>
+    <input name="txtReceiverFirstName" id="txtReceiverFirstName">
+    <input name="txtReceiverLastName" id="txtReceiverLastName">
+    <input name="txtReceiverMobile" id="txtReceiverMobile">
+    <input name="txtReceiverTell" id="txtReceiverTell">
+    <button type="button" id="btnGoLVL3">مرحله بعد</button>
+  </section>
+  <section id="lvl3" style="display:none">
+    {map_html}
+    {_location_block("Origin", "مبدا")}
+    {_location_block("Destination", "مقصد")}
+    <select name="CargoType" id="CargoType"><option value="General">General</option><option value="عمومی">عمومی</option></select>
+    <input name="CargoWeight" id="CargoWeight">
+    <input name="CargoCount" id="CargoCount">
+    <textarea name="CargoDescription" id="CargoDescription"></textarea>
+    <input name="DriverNationalCode" id="DriverNationalCode">
+    <input name="DriverPhone" id="DriverPhone">
+    <input name="PlateNumber" id="PlateNumber">
+    <select name="VehicleType" id="VehicleType"><option value="Truck">Truck</option><option value="وانت">وانت</option></select>
+    <input name="TransportCost" id="TransportCost">
+    <select name="PaymentMethod" id="PaymentMethod"><option value="Cash">Cash</option><option value="نقدی">نقدی</option></select>
+    <button type="submit" class="btn btn-primary">ثبت</button>
+  </section>
+</form>"""
+    return _page("صدور بارنامه", body, head=map_stub + FORM_SCRIPT)
+
+
+def render_not_found_page() -> str:
+    body = (
+        "<h1>صفحه مورد نظر شما یافت نشد</h1>"
+        "<a href=\"/Home/Index\">بازگشت به خانه</a> <a href=\"/Login\">ورود مجدد به سامانه</a>"
+    )
+    return _page("یافت نشد", body)
+
+
+def create_mock_site(config: Optional[MockSiteConfig] = None) -> FastAPI:
+    config = config or MockSiteConfig()
+    state = MockSiteState()
+    rng = random.Random(config.seed)
+    app = FastAPI(title="UTCMS mock site", docs_url=None, redoc_url=None, openapi_url=None)
+    app.state.mock_config = config
+    app.state.mock_state = state
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        state.request_count += 1
+        loop = asyncio.get_running_loop()
+
+        if config.max_requests_per_second > 0:
+            now = loop.time()
+            if now - state.window_started >= 1.0:
+                state.window_started = now
+                state.window_count = 0
+            state.window_count += 1
+            if state.window_count > config.max_requests_per_second:
+                state.throttled_count += 1
+                return Response(status_code=429, headers={"Retry-After": "1"}, content="Too Many Requests")
+
+        if config.rate_limit_ratio > 0 and rng.random() < config.rate_limit_ratio:
+            state.throttled_count += 1
+            return Response(status_code=429, headers={"Retry-After": "1"}, content="Too Many Requests")
+
+        delay_ms = max(0.0, config.latency_ms) + rng.uniform(0, max(0.0, config.latency_jitter_ms))
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        return await call_next(request)
+
+    def is_authenticated(request: Request) -> bool:
+        return request.cookies.get(AUTH_COOKIE) in state.sessions
+
+    def credentials_valid(username: str, password: str, captcha: str) -> Optional[str]:
+        if not username or not password:
+            return "نام کاربری و رمز عبور الزامی است"
+        if config.username and username != config.username:
+            return "نام کاربری یا رمز عبور اشتباه است"
+        if config.password and password != config.password:
+            return "نام کاربری یا رمز عبور اشتباه است"
+        if config.captcha_value and captcha != config.captcha_value:
+            return "کد امنیتی اشتباه است"
+        return None
+
+    @app.get("/")
+    async def root(request: Request):
+        target = "/Barname/Waybill/Create" if is_authenticated(request) else "/Login"
+        return RedirectResponse(target, status_code=302)
+
+    @app.get("/DNTCaptchaImage/Show")
+    async def captcha_image():
+        return Response(content=captcha_png(seed=rng.randint(0, 2**31)), media_type="image/png")
+
+    async def login_page():
+        return HTMLResponse(render_login_page())
+
+    async def login_submit(request: Request):
+        form = await _read_form(request)
+        error = credentials_valid(
+            str(form.get("UserName") or form.get("NationalCode") or "").strip(),
+            str(form.get("Password") or "").strip(),
+            str(form.get("DNTCaptchaInputText") or form.get("CapToken") or "").strip(),
+        )
+        if error:
+            return HTMLResponse(render_login_page(error=error))
+
+        session_token = secrets.token_urlsafe(24)
+        state.sessions.add(session_token)
+        response = RedirectResponse("/Barname/Waybill/Create", status_code=302)
+        response.set_cookie(AUTH_COOKIE, session_token, httponly=True, path="/")
+        return response
+
+    for path in LOGIN_PATHS:
+        app.add_api_route(path, login_page, methods=["GET"], include_in_schema=False)
+        app.add_api_route(path, login_submit, methods=["POST"], include_in_schema=False)
+
+    @app.get("/Logout")
+    async def logout(request: Request):
+        state.sessions.discard(request.cookies.get(AUTH_COOKIE, ""))
+        response = RedirectResponse("/Login", status_code=302)
+        response.delete_cookie(AUTH_COOKIE, path="/")
+        return response
+
+    @app.get("/Home/Index")
+    async def home(request: Request):
+        if not is_authenticated(request):
+            return RedirectResponse("/Login", status_code=302)
+        return HTMLResponse(_page("سامانه بارنامه", _nav() + "<h1>خانه</h1>"))
+
+    async def waybill_form(request: Request):
+        if not is_authenticated(request):
+            return RedirectResponse("/Login", status_code=302)
+        rules_pending = config.show_rules_modal and request.cookies.get(RULES_COOKIE) != "1"
+        return HTMLResponse(render_waybill_form(config, rules_pending=rules_pending))
+
+    async def waybill_submit(request: Request):
+        if not is_authenticated(request):
+            return RedirectResponse("/Login", status_code=302)
+        form = await _read_form(request)
+        required = ("txtSenderFirstName", "txtSenderMobile", "txtReceiverFirstName", "CargoWeight")
+        missing = [name for name in required if not str(form.get(name) or "").strip()]
+        if missing:
+            return HTMLResponse(render_waybill_form(config, error=f"فیلدهای الزامی تکمیل نشده: {', '.join(missing)}"))
+        if config.submit_error_ratio > 0 and rng.random() < config.submit_error_ratio:
+            return HTMLResponse(render_waybill_form(config, error="خطا در ثبت بارنامه؛ دوباره تلاش کنید"))
+
+        tracking_code = str(rng.randint(10**9, 10**10 - 1))
+        state.submissions.append({"tracking_code": tracking_code, "form": form})
+        return RedirectResponse(f"/Barname/Waybill/Details/{tracking_code}", status_code=303)
+
+    for path in WAYBILL_PATHS:
+        app.add_api_route(path, waybill_form, methods=["GET"], include_in_schema=False)
+        app.add_api_route(path, waybill_submit, methods=["POST"], include_in_schema=False)
+
+    @app.get("/Barname/Waybill/Details/{tracking_code}")
+    async def waybill_details(tracking_code: str, request: Request):
+        if not is_authenticated(request):
+            return RedirectResponse("/Login", status_code=302)
+        body = (
+            f"{_nav()}<div class=\"alert alert-success\">بارنامه با موفقیت ثبت شد</div>"
+            f"<p>شماره بارنامه: <span class=\"tracking-code\">{html.escape(tracking_code)}</span></p>"
+        )
+        return HTMLResponse(_page("جزئیات بارنامه", body))
+
+    @app.get("/Barname/Location/Cities")
+    async def cities(provinceId: int = 0):
+        provinces = list(LOCATION_CATALOG)
+        if not 1 <= provinceId <= len(provinces):
+            return JSONResponse([])
+        names = list(LOCATION_CATALOG[provinces[provinceId - 1]])
+        return JSONResponse([{"id": index, "name": name} for index, name in enumerate(names, start=1)])
+
+    @app.get("/Barname/Location/Districts")
+    async def districts(provinceId: int = 0, cityId: int = 0):
+        provinces = list(LOCATION_CATALOG)
+        if not 1 <= provinceId <= len(provinces):
+            return JSONResponse([])
+        province_cities = LOCATION_CATALOG[provinces[provinceId - 1]]
+        city_names = list(province_cities)
+        if not 1 <= cityId <= len(city_names):
+            return JSONResponse([])
+        names = province_cities[city_names[cityId - 1]]
+        return JSONResponse([{"id": index, "name": name} for index, name in enumerate(names, start=1)])
+
+    @app.get("/__mock__/stats")
+    async def mock_stats():
+        return {
+            "requests": state.request_count,
+            "throttled": state.throttled_count,
+            "sessions": len(state.sessions),
+            "submissions": len(state.submissions),
+        }
+
+    @app.exception_handler(404)
+    async def not_found(request: Request, exc):
+        return HTMLResponse(render_not_found_page(), status_code=404)
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local mock UTCMS site for offline load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--username", default="", help="required username (empty accepts any)")
+    parser.add_argument("--password", default="", help="required password (empty accepts any)")
+    parser.add_argument("--captcha-value", default="12345", help="expected captcha text (empty accepts any)")
+    parser.add_argument("--map", dest="map_type", choices=("leaflet", "openlayers", "none"), default="leaflet")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed latency added to every response")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="uniform random extra latency")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="answer 429 above this many requests/second")
+    parser.add_argument("--submit-error-ratio", type=float, default=0.0, help="fraction of submits rejected")
+    parser.add_argument("--rules-modal", action="store_true", help="show the rules acceptance modal after login")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = MockSiteConfig(
+        username=args.username,
+        password=args.password,
+        captcha_value=args.captcha_value,
+        map_type=args.map_type,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        rate_limit_ratio=args.rate_limit_ratio,
+        max_requests_per_second=args.max_rps,
+        show_rules_modal=args.rules_modal,
+        submit_error_ratio=args.submit_error_ratio,
+        seed=args.seed,
+    )
+    uvicorn.run(create_mock_site(config), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Minimal pytest-benchmark style harness with stored, machine-normalized baselines.
+
+Timings are divided by a fixed pure-Python calibration workload measured in the
+same session, so baselines stay comparable across machines of different speed.
+Benchmarks are skipped unless `--perf` or `--perf-save` is given.
+"""
+
+import json
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_THRESHOLD = 0.30
+REPEATS = 5
+
+
+def _calibration_workload() -> int:
+    total = 0
+    for i in range(2000):
+        total += (i * i) % 7
+    return total
+
+
+def _best_seconds_per_call(func: Callable[[], Any]) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+
+class PerfSession:
+    def __init__(self, config):
+        self.enabled = config.getoption("--perf") or config.getoption("--perf-save")
+        self.save = config.getoption("--perf-save")
+        self.baselines: Dict[str, Any] = {}
+        if BASELINE_PATH.exists():
+            self.baselines = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+        threshold = config.getoption("--perf-threshold")
+        self.threshold = threshold if threshold is not None else self.baselines.get("threshold", DEFAULT_THRESHOLD)
+        self.results: Dict[str, Dict[str, float]] = {}
+        self._calibration: float = 0.0
+
+    @property
+    def calibration(self) -> float:
+        if not self._calibration:
+            self._calibration = _best_seconds_per_call(_calibration_workload)
+        return self._calibration
+
+    def write_baselines(self) -> None:
+        payload = {
+            "threshold": self.threshold,
+            "calibration": "seconds per call of _calibration_workload on the recording machine",
+            "benchmarks": {
+                name: {"relative": round(result["relative"], 4), "ns_per_call": round(result["ns_per_call"], 1)}
+                for name, result in sorted(self.results.items())
+            },
+        }
+        BASELINE_PATH.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def perf_session(request):
+    session = PerfSession(request.config)
+    yield session
+    if session.save and session.results:
+        session.write_baselines()
+
+
+@pytest.fixture
+def perf_benchmark(request, perf_session):
+    """Time `func(*args, **kwargs)` and fail if it regressed beyond the threshold."""
+    if not perf_session.enabled:
+        pytest.skip("micro-benchmarks run only with --perf or --perf-save")
+
+    name = request.node.name
+
+    def run(func: Callable[..., Any], *args, **kwargs) -> Any:
+        result = func(*args, **kwargs)
+        seconds = _best_seconds_per_call(lambda: func(*args, **kwargs))
+        relative = seconds / perf_session.calibration
+        perf_session.results[name] = {"relative": relative, "ns_per_call": seconds * 1e9}
+
+        baseline = perf_session.baselines.get("benchmarks", {}).get(name)
+        if baseline and not perf_session.save:
+            allowed = baseline["relative"] * (1 + perf_session.threshold)
+            assert relative <= allowed, (
+                f"{name} regressed: {relative:.4f} vs baseline {baseline['relative']:.4f} "
+                f"(+{(relative / baseline['relative'] - 1) * 100:.1f}%, threshold {perf_session.threshold:.0%})"
+            )
+        return result
+
+    return run
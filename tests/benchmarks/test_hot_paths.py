@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.automation.location_selector import RouteCalculator
+from app.automation.map_controller import GeoCoordinate
+from app.automation.reporting import ReportService
+from app.core.logging import sanitize
+from app.core.network import is_retryable_network_error
+from app.core.security import require_sensitive_auth
+from app.schemas.waybill import (
+    CargoModel,
+    FinancialModel,
+    GeoCoordinateModel,
+    LocationModel,
+    OperationMode,
+    ReceiverModel,
+    SenderModel,
+    VehicleModel,
+    WaybillMapRequest,
+)
+from app.services.waybill_service import WaybillService
+
+JWT_SECRET = "bench-secret-with-at-least-32-bytes!!"
+
+
+class _FakeRequest:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def _run_sync(coro):
+    """Drive a coroutine that never suspends without paying for an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def _request() -> WaybillMapRequest:
+    return WaybillMapRequest(
+        session_id="bench",
+        operation_mode=OperationMode.SAFE,
+        sender=SenderModel(name="علی محمدی", phone="09121234567", address="تهران", national_code="0012345679"),
+        receiver=ReceiverModel(name="رضا رضایی", phone="09127654321", address="مشهد"),
+        origin=LocationModel(
+            province="تهران", city="تهران", address="میدان آزادی",
+            coordinates=GeoCoordinateModel(lat=35.6997, lng=51.3380),
+        ),
+        destination=LocationModel(
+            province="خراسان رضوی", city="مشهد", address="بلوار وکیل آباد",
+            coordinates=GeoCoordinateModel(lat=36.2972, lng=59.6067),
+        ),
+        cargo=CargoModel(type="General", weight=1000, count=1, description="bench"),
+        vehicle=VehicleModel(driver_national_code="0012345679", driver_phone="09120000000", plate="12A34567"),
+        financial=FinancialModel(cost=100000, payment_method="Cash"),
+    )
+
+
+def test_is_retryable_network_error(perf_benchmark):
+    messages = [
+        "Timeout 5000ms exceeded.",
+        "page.goto: net::ERR_NAME_NOT_RESOLVED at https://barname.utcms.ir/Login",
+        "Element is not attached to the DOM",
+        "پر کردن فیلد `وزن کالا` ناموفق بود",
+    ]
+
+    def run():
+        return [is_retryable_network_error(message) for message in messages]
+
+    assert perf_benchmark(run) == [True, True, False, False]
+
+
+def test_sanitize_log_payload(perf_benchmark):
+    payload = {
+        "selector": "input[name='txtSenderMobile']",
+        "error": "Timeout 5000ms exceeded.",
+        "links": [{"text": "حمل بارنامه", "href": "/Barname/Waybill/Create"}] * 5,
+        "reason": "login failed token=abc",
+    }
+
+    cleaned = perf_benchmark(sanitize, payload)
+    assert cleaned["reason"] == "login failed token=***"
+
+
+def test_report_percentile(perf_benchmark):
+    samples = [float((i * 7919) % 2000) for i in range(2000)]
+    assert perf_benchmark(ReportService._percentile, samples, 95) > 0
+
+
+def test_build_waybill_payload(perf_benchmark):
+    request = _request()
+    payload = perf_benchmark(WaybillService._build_waybill_payload, request)
+    assert payload["origin"]["city"] == "تهران"
+
+
+def test_require_sensitive_auth_jwt(perf_benchmark):
+    token = jwt.encode({"sub": "bench"}, JWT_SECRET, algorithm="HS256")
+    request = _FakeRequest({"Authorization": f"Bearer {token}"})
+
+    with patch("app.core.security.utcms_config.API_AUTH_MODE", "jwt"), \
+         patch("app.core.security.utcms_config.JWT_SECRET", JWT_SECRET), \
+         patch("app.core.security.utcms_config.JWT_ALGORITHM", "HS256"):
+        assert perf_benchmark(lambda: _run_sync(require_sensitive_auth(request))) is None
+
+        with pytest.raises(HTTPException) as exc:
+            _run_sync(require_sensitive_auth(_FakeRequest({})))
+        assert exc.value.status_code == 401
+
+
+def test_haversine(perf_benchmark):
+    calculator = RouteCalculator(page=None)
+    origin = GeoCoordinate(latitude=35.6997, longitude=51.3380)
+    destination = GeoCoordinate(latitude=36.2972, longitude=59.6067)
+
+    result = perf_benchmark(calculator._calculate_haversine, origin, destination)
+    assert 740 < result["distance_value"] / 1000 < 760
@@ -5,3 +5,20 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("perf", "hot-path micro-benchmarks (tests/benchmarks)")
+    group.addoption("--perf", action="store_true", default=False, help="run micro-benchmarks")
+    group.addoption(
+        "--perf-save",
+        action="store_true",
+        default=False,
+        help="run micro-benchmarks and overwrite tests/benchmarks/baselines.json",
+    )
+    group.addoption(
+        "--perf-threshold",
+        type=float,
+        default=None,
+        help="allowed slowdown vs baseline as a fraction (default: value stored in baselines.json)",
+    )
@@ -18,6 +18,7 @@ class TestUTCMSAuthenticator(unittest.IsolatedAsyncioTestCase):
         self.page = AsyncMock()
         self.context = AsyncMock()
         self.auth = UTCMSAuthenticator(self.page, self.context)
+        self.auth._probe_login_url = AsyncMock(return_value=None)
         self.page.expect_navigation = Mock(return_value=_NoopAsyncContext())
 
     async def test_login_fails_fast_when_captcha_detected_without_value(self):
@@ -173,6 +174,73 @@ class TestUTCMSAuthenticator(unittest.IsolatedAsyncioTestCase):
 
         self.assertTrue(result)
 
+    async def test_rejected_captcha_answer_is_reported_to_provider(self):
+        from app.automation.captcha.base import CaptchaResult
+        from app.automation.captcha.stats import CaptchaStats
+
+        provider = AsyncMock()
+        stats = CaptchaStats()
+        result = CaptchaResult(solved=True, provider="twocaptcha", value="1234", task_id="77")
+
+        with patch("app.automation.auth.captcha_stats", stats):
+            self.auth._captcha_attempt = (provider, result)
+            self.auth.last_error = "کد امنيتی وارد شده صحیح نیست"
+            await self.auth._record_captcha_outcome(False)
+
+            self.auth._captcha_attempt = (provider, result)
+            self.auth.last_error = "نام کاربری یا رمز عبور اشتباه است"
+            await self.auth._record_captcha_outcome(False)
+
+            self.auth._captcha_attempt = (provider, result)
+            await self.auth._record_captcha_outcome(True)
+
+        provider.report.assert_awaited_once_with(result, accepted=False)
+        snapshot = stats.snapshot()["twocaptcha"]
+        self.assertEqual((snapshot["accepted"], snapshot["rejected"]), (1, 1))
+
+    async def test_captcha_error_from_earlier_candidate_is_not_reported_again(self):
+        from app.automation.captcha.base import CaptchaResult
+        from app.automation.captcha.stats import CaptchaStats
+
+        provider = AsyncMock()
+        result = CaptchaResult(solved=True, provider="twocaptcha", value="1234", task_id="77")
+
+        async def handle_captcha(selector):
+            self.auth._captcha_attempt = (provider, result)
+            return True
+
+        submits = iter(["کد امنیتی وارد شده صحیح نیست", "نام کاربری یا رمز عبور اشتباه است"])
+
+        async def submit(selector):
+            message = next(submits)
+            if not self.auth.last_error:
+                self.auth.last_error = message
+            return False
+
+        self.auth._login_urls = AsyncMock(return_value=["https://a/Login", "https://a/Account/Login"])
+        self.auth._goto_with_retry = AsyncMock()
+        self.auth._find_selector = AsyncMock(return_value="#field")
+        self.auth._fill_credentials = AsyncMock(return_value=True)
+        self.auth._handle_captcha = handle_captcha
+        self.auth._submit_login = submit
+
+        with patch("app.automation.auth.asyncio.sleep", AsyncMock()), patch(
+            "app.automation.auth.captcha_stats", CaptchaStats()
+        ):
+            self.assertFalse(await self.auth.login("user", "pass"))
+
+        provider.report.assert_awaited_once_with(result, accepted=False)
+        self.assertEqual(self.auth.last_error, "نام کاربری یا رمز عبور اشتباه است")
+
+    async def test_login_navigates_to_probed_url_first(self):
+        self.auth._candidate_login_urls = lambda: ["https://a/Login", "https://a/Account/Login"]
+        self.auth._probe_login_url = AsyncMock(return_value="https://a/Account/Login")
+
+        with patch("app.automation.auth.utcms_config.LOGIN_URL_PROBE", True):
+            urls = await self.auth._login_urls()
+
+        self.assertEqual(urls, ["https://a/Account/Login", "https://a/Login"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from scripts.bench_waybill_throughput import (
+    Sample,
+    arrival_offsets,
+    compare_reports,
+    percentile,
+    run_load,
+    summarize,
+)
+
+
+def test_arrival_offsets_constant_and_poisson():
+    assert arrival_offsets(2.0, 3.0, "constant") == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+
+    offsets = arrival_offsets(5.0, 10.0, "poisson", seed=7)
+    assert offsets == sorted(offsets)
+    assert all(0 <= value < 10.0 for value in offsets)
+    assert 25 <= len(offsets) <= 80
+
+
+@pytest.mark.asyncio
+async def test_run_load_records_status_and_skips_above_in_flight_cap():
+    async def send(index: int) -> int:
+        await asyncio.sleep(0.05)
+        return 200 if index % 2 == 0 else 503
+
+    samples = await run_load(send, [0.0, 0.0, 0.0, 0.1], max_in_flight=2)
+
+    assert [sample.index for sample in samples] == [0, 1, 2, 3]
+    assert sum(1 for sample in samples if sample.error == "skipped_max_in_flight") == 1
+    assert {sample.status for sample in samples if not sample.error} == {200, 503}
+
+
+def test_summarize_and_compare_reports():
+    samples = [
+        Sample(0, 0.0, 0.0, 100.0, 200),
+        Sample(1, 0.5, 0.5, 300.0, 200),
+        Sample(2, 1.0, 1.0, 50.0, 429),
+    ]
+    results = summarize(samples, wall_seconds=60.0)
+
+    assert results["succeeded"] == 2
+    assert results["throughput_per_min"] == 2.0
+    assert results["latency_ms"]["p95"] == percentile([100.0, 300.0], 95)
+    assert results["status_counts"] == {"200": 2, "429": 1}
+
+    diff = compare_reports({"results": {"throughput_per_min": 1.0}}, {"results": results})
+    assert diff["results.throughput_per_min"]["change_pct"] == 100.0
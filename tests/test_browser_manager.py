@@ -1,7 +1,9 @@
+import asyncio
 import unittest
 from unittest.mock import AsyncMock, patch, MagicMock
 import sys
 import os
+import time
 
 # Add app to path
 sys.path.append(os.getcwd())
@@ -63,6 +65,22 @@ class TestBrowserManager(unittest.IsolatedAsyncioTestCase):
         self.mock_start.assert_not_called()
         self.mock_playwright.chromium.launch.assert_not_called()
 
+    @patch('app.automation.browser.async_playwright')
+    async def test_concurrent_initialize_launches_one_browser(self, mock_async_playwright):
+        mock_async_playwright.return_value.start = self.mock_start
+
+        async def slow_launch(**kwargs):
+            await asyncio.sleep(0.01)
+            return self.mock_browser
+
+        self.mock_playwright.chromium.launch.side_effect = slow_launch
+
+        await asyncio.gather(*(self.browser_manager.initialize() for _ in range(3)))
+
+        self.mock_start.assert_awaited_once()
+        self.mock_playwright.chromium.launch.assert_awaited_once()
+        self.assertIs(self.browser_manager.browser, self.mock_browser)
+
     @patch('app.automation.browser.async_playwright')
     async def test_create_context_new(self, mock_async_playwright):
         # Setup initialization mocks
@@ -147,5 +165,173 @@ class TestBrowserManager(unittest.IsolatedAsyncioTestCase):
         self.mock_playwright.stop.assert_awaited_once()
         self.assertIsNone(self.browser_manager.playwright)
 
+    async def test_lease_page_without_pooling_uses_private_context(self):
+        self.browser_manager.browser = self.mock_browser
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", False):
+            async with self.browser_manager.lease_page() as lease:
+                self.assertIs(lease.page, self.mock_page)
+                lease.mark_authenticated()
+                self.assertFalse(lease.authenticated)
+
+        self.mock_page.close.assert_awaited_once()
+        self.mock_context.close.assert_awaited_once()
+        self.assertEqual(self.browser_manager._contexts, {})
+
+    async def test_lease_page_pools_tabs_up_to_limit(self):
+        self.browser_manager.browser = self.mock_browser
+
+        def make_context(**kwargs):
+            context = AsyncMock()
+            context.new_page.side_effect = lambda: AsyncMock()
+            return context
+
+        self.mock_browser.new_context.side_effect = make_context
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", True), \
+             patch("app.core.config.utcms_config.BROWSER_CONTEXT_TAB_LIMIT", 2):
+            async with self.browser_manager.lease_page() as first, \
+                       self.browser_manager.lease_page() as second, \
+                       self.browser_manager.lease_page() as third:
+                self.assertIs(first.context, second.context)
+                self.assertIsNot(first.context, third.context)
+                first.mark_authenticated()
+                self.assertTrue(second.authenticated)
+                self.assertEqual(self.browser_manager.pool_snapshot()["open_pages"], 3)
+
+            # Contexts stay open for the next waybill, pages do not.
+            self.assertEqual(self.browser_manager.pool_snapshot()["contexts"], 2)
+            self.assertEqual(self.browser_manager.pool_snapshot()["open_pages"], 0)
+
+            async with self.browser_manager.lease_page() as reused:
+                self.assertTrue(reused.authenticated)
+                self.assertIs(reused.context, first.context)
+
+        self.assertEqual(self.mock_browser.new_context.await_count, 2)
+
+    async def test_invalidated_lease_retires_context_after_release(self):
+        self.browser_manager.browser = self.mock_browser
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", True), \
+             patch("app.core.config.utcms_config.BROWSER_CONTEXT_TAB_LIMIT", 2):
+            async with self.browser_manager.lease_page() as lease:
+                lease.mark_authenticated()
+                lease.invalidate()
+
+        self.mock_context.close.assert_awaited_once()
+        self.assertEqual(self.browser_manager.pool_snapshot()["contexts"], 0)
+        self.assertEqual(self.browser_manager._contexts, {})
+
+    async def test_recycle_by_age_drains_in_flight_context(self):
+        old_browser = AsyncMock()
+        old_context = AsyncMock()
+        old_browser.new_context.return_value = old_context
+        self.mock_playwright.chromium.launch.return_value = self.mock_browser
+        self.browser_manager.playwright = self.mock_playwright
+        self.browser_manager.browser = old_browser
+        self.browser_manager._launched_at = 0.0
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", False), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_AGE_SECONDS", 0), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_RSS_MB", 0):
+            async with self.browser_manager.lease_page() as in_flight:
+                self.assertIs(in_flight.context, old_context)
+
+                with patch("app.core.config.utcms_config.BROWSER_MAX_AGE_SECONDS", 1):
+                    self.assertTrue(await self.browser_manager.maybe_recycle())
+
+                # The new browser serves fresh contexts; the old one waits for the lease.
+                self.assertIs(self.browser_manager.browser, self.mock_browser)
+                old_browser.close.assert_not_awaited()
+                old_context.close.assert_not_awaited()
+
+        old_context.close.assert_awaited_once()
+        old_browser.close.assert_awaited_once()
+        self.assertEqual(self.browser_manager.pool_snapshot()["draining_browsers"], 0)
+        self.assertEqual(self.browser_manager.recycle_count, 1)
+
+    async def test_recycle_by_memory_retires_idle_pooled_contexts(self):
+        old_browser = AsyncMock()
+        self.browser_manager.playwright = self.mock_playwright
+        self.browser_manager.browser = old_browser
+        self.browser_manager._launched_at = 0.0
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", True), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_AGE_SECONDS", 0), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_CONTEXTS", 0), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_RSS_MB", 0):
+            async with self.browser_manager.lease_page():
+                pass
+            self.assertEqual(self.browser_manager.pool_snapshot()["contexts"], 1)
+
+            with patch("app.core.config.utcms_config.BROWSER_MAX_RSS_MB", 100), \
+                 patch("app.automation.browser.browser_process_rss_mb", return_value=250.0):
+                self.assertTrue(await self.browser_manager.maybe_recycle())
+
+        self.assertEqual(self.browser_manager.pool_snapshot()["contexts"], 0)
+        old_browser.close.assert_awaited_once()
+        self.assertIs(self.browser_manager.browser, self.mock_browser)
+
+    async def test_memory_is_not_rechecked_while_recycled_browser_drains(self):
+        old_browser = AsyncMock()
+        old_browser.new_context.return_value = AsyncMock()
+        self.browser_manager.playwright = self.mock_playwright
+        self.browser_manager.browser = old_browser
+        self.browser_manager._launched_at = time.monotonic()
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", False), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_AGE_SECONDS", 0), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_CONTEXTS", 0), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_RSS_MB", 100), \
+             patch("app.core.config.utcms_config.BROWSER_MEMORY_CHECK_SECONDS", 0), \
+             patch("app.automation.browser.browser_process_rss_mb", return_value=50.0) as rss:
+            async with self.browser_manager.lease_page():
+                rss.return_value = 250.0
+                self.assertTrue(await self.browser_manager.maybe_recycle())
+                # The draining browser still counts towards the process RSS.
+                self.assertFalse(await self.browser_manager.maybe_recycle())
+                self.assertEqual(self.browser_manager.pool_snapshot()["draining_browsers"], 1)
+
+            self.mock_playwright.chromium.launch.assert_awaited_once()
+            self.assertEqual(self.browser_manager.recycle_count, 1)
+            old_browser.close.assert_awaited_once()
+
+    async def test_no_recycle_below_thresholds(self):
+        self.browser_manager.browser = self.mock_browser
+        self.browser_manager._launched_at = time.monotonic()
+
+        with patch("app.core.config.utcms_config.BROWSER_MAX_AGE_SECONDS", 3600), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_CONTEXTS", 10), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_RSS_MB", 100), \
+             patch("app.automation.browser.browser_process_rss_mb", return_value=50.0):
+            self.assertFalse(await self.browser_manager.maybe_recycle())
+
+        self.mock_browser.close.assert_not_awaited()
+
+    async def test_adopt_context_retires_pool_and_serves_authenticated_context(self):
+        self.browser_manager.browser = self.mock_browser
+
+        def make_context(**kwargs):
+            context = AsyncMock()
+            context.new_page.side_effect = lambda: AsyncMock()
+            return context
+
+        self.mock_browser.new_context.side_effect = make_context
+
+        with patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", True), \
+             patch("app.core.config.utcms_config.BROWSER_CONTEXT_TAB_LIMIT", 2), \
+             patch("app.core.config.utcms_config.BROWSER_MAX_RSS_MB", 0):
+            async with self.browser_manager.lease_page() as stale:
+                pass
+            session_id, fresh = await self.browser_manager.create_context()
+            self.assertTrue(await self.browser_manager.adopt_context(session_id, fresh))
+
+            async with self.browser_manager.lease_page() as lease:
+                self.assertIs(lease.context, fresh)
+                self.assertTrue(lease.authenticated)
+
+        stale.context.close.assert_awaited_once()
+        self.assertEqual(self.browser_manager.authenticated_contexts(), [fresh])
+
 if __name__ == '__main__':
     unittest.main()
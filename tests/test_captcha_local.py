@@ -0,0 +1,137 @@
+import base64
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.automation.captcha import get_captcha_provider, shutdown_captcha_providers
+from app.automation.captcha.base import CaptchaResult
+from app.automation.captcha.local import LocalCaptchaProvider
+from app.automation.captcha.stats import CaptchaStats
+
+MODEL_SPEC = "tests.test_captcha_local:make_model"
+
+
+class EchoModel:
+    """Reads "<text>|<confidence>" from the image bytes."""
+
+    def predict(self, image_png: bytes):
+        text, _, confidence = image_png.decode().partition("|")
+        return text, float(confidence)
+
+
+def make_model():
+    return EchoModel()
+
+
+def _image(text: str, confidence: float) -> str:
+    return base64.b64encode(f"{text}|{confidence}".encode()).decode()
+
+
+@pytest.mark.asyncio
+async def test_local_solver_accepts_confident_prediction():
+    fallback = AsyncMock()
+    stats = CaptchaStats()
+    provider = LocalCaptchaProvider(MODEL_SPEC, min_confidence=0.8, workers=0, fallback=fallback)
+
+    with patch("app.automation.captcha.local.captcha_stats", stats):
+        result = await provider.solve_text_captcha(_image("48213", 0.93))
+    provider.close()
+
+    assert (result.solved, result.provider, result.value, result.confidence) == (True, "local", "48213", 0.93)
+    fallback.solve_text_captcha.assert_not_awaited()
+    assert stats.snapshot()["local"]["solved"] == 1
+
+
+@pytest.mark.asyncio
+async def test_local_solver_falls_back_below_confidence_threshold():
+    fallback = AsyncMock()
+    fallback.solve_text_captcha.return_value = CaptchaResult(solved=True, provider="twocaptcha", value="48218")
+    provider = LocalCaptchaProvider(MODEL_SPEC, min_confidence=0.8, workers=0, fallback=fallback)
+
+    with patch("app.automation.captcha.local.captcha_stats", CaptchaStats()):
+        result = await provider.solve_text_captcha(_image("4821", 0.41))
+        provider.fallback = None
+        unsolved = await provider.solve_text_captcha(_image("4821", 0.41))
+    provider.close()
+
+    assert (result.provider, result.value) == ("twocaptcha", "48218")
+    assert (unsolved.solved, unsolved.error) == (False, "low_confidence")
+
+
+@pytest.mark.asyncio
+async def test_local_provider_forwards_fallback_reports():
+    fallback = AsyncMock()
+    fallback.name = "twocaptcha"
+    provider = LocalCaptchaProvider(MODEL_SPEC, workers=0, fallback=fallback)
+
+    remote = CaptchaResult(solved=True, provider="twocaptcha", value="48218", task_id="77")
+    await provider.report(remote, accepted=False)
+    await provider.report(CaptchaResult(solved=True, provider="local", value="48213"), accepted=False)
+    provider.close()
+
+    fallback.report.assert_awaited_once_with(remote, False)
+
+
+@pytest.mark.asyncio
+async def test_local_solver_runs_model_in_process_pool():
+    provider = LocalCaptchaProvider(MODEL_SPEC, workers=1, timeout_seconds=30)
+    try:
+        assert await provider.warm_up() is True
+        with patch("app.automation.captcha.local.captcha_stats", CaptchaStats()):
+            result = await provider.solve_text_captcha(_image("90210", 0.99))
+    finally:
+        provider.close()
+
+    assert result.solved and result.value == "90210"
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_is_rebuilt_after_backoff():
+    fallback = AsyncMock()
+    fallback.solve_text_captcha.return_value = CaptchaResult(solved=True, provider="twocaptcha", value="48218")
+    provider = LocalCaptchaProvider(
+        "tests.test_captcha_local:missing_model", workers=1, timeout_seconds=30, fallback=fallback
+    )
+    try:
+        # Forked workers must not inherit a model loaded by the in-process tests.
+        with patch("app.automation.captcha.local.captcha_stats", CaptchaStats()), \
+             patch("app.automation.captcha.local._worker_model", None):
+            first = await provider.solve_text_captcha(_image("90210", 0.99))
+            assert provider._executor is None
+            with patch.object(provider, "_get_executor") as get_executor:
+                await provider.solve_text_captcha(_image("90210", 0.99))
+            get_executor.assert_not_called()
+
+            provider.model_spec = MODEL_SPEC
+            provider._pool_retry_at = 0.0
+            recovered = await provider.solve_text_captcha(_image("90210", 0.99))
+    finally:
+        provider.close()
+
+    assert first.provider == "twocaptcha"
+    assert fallback.solve_text_captcha.await_count == 2
+    assert (recovered.provider, recovered.value) == ("local", "90210")
+    assert provider._pool_failures == 0
+
+
+def test_local_provider_is_shared_and_wired_to_remote_fallback():
+    with patch("app.core.config.utcms_config.CAPTCHA_PROVIDER", "local"), patch(
+        "app.core.config.utcms_config.LOCAL_CAPTCHA_MODEL", MODEL_SPEC
+    ), patch("app.core.config.utcms_config.TWOCAPTCHA_API_KEY", "key"):
+        first = get_captcha_provider()
+        second = get_captcha_provider()
+        assert isinstance(first, LocalCaptchaProvider) and first is second
+        assert first.fallback is not None
+    shutdown_captcha_providers()
+
+
+def test_captcha_stats_track_latency_and_accuracy():
+    stats = CaptchaStats()
+    stats.record_solve("local", True, 40.0)
+    stats.record_solve("local", True, 60.0)
+    stats.record_outcome("local", accepted=True)
+    stats.record_outcome("local", accepted=False)
+
+    snapshot = stats.snapshot()["local"]
+    assert snapshot["attempts"] == 2 and snapshot["accuracy"] == 0.5
+    assert snapshot["latency_ms"]["p95"] == 60.0
@@ -1,8 +1,12 @@
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
-from app.automation.captcha.twocaptcha import TwoCaptchaProvider
+from app.automation.captcha.base import CaptchaResult
+from app.automation.captcha.router import CaptchaRouter
+from app.automation.captcha.stats import CaptchaStats
+from app.automation.captcha.twocaptcha import SolveTimeModel, TwoCaptchaProvider, TwoCaptchaResultPoller
 
 
 @pytest.mark.asyncio
@@ -26,3 +30,133 @@ async def test_twocaptcha_failure_when_api_key_missing():
 
     assert result.solved is False
     assert result.error == "missing_api_key"
+
+
+def test_solve_time_model_schedules_first_poll_near_median():
+    model = SolveTimeModel(min_samples=5)
+    assert model.next_delay(0, 0, default=5.0, minimum=1.0) == 5.0
+
+    for seconds in (6, 7, 8, 9, 14):
+        model.observe(seconds)
+
+    assert model.next_delay(0, 0, default=5.0, minimum=1.0) == 8
+    assert model.next_delay(8, 1, default=5.0, minimum=1.0) == 2.0
+    # Past the 90th percentile the interval grows, capped at twice the fixed interval.
+    assert model.next_delay(20, 4, default=5.0, minimum=1.0) == 3.0
+    assert model.next_delay(60, 9, default=5.0, minimum=1.0) == 10.0
+
+
+@pytest.mark.asyncio
+async def test_poller_batches_concurrent_tasks_into_one_request():
+    model = SolveTimeModel()
+    model.next_delay = lambda *args, **kwargs: 0.01
+    poller = TwoCaptchaResultPoller("key", "https://2captcha.test/res.php", timing=model)
+    calls = []
+
+    async def fetch(task_ids):
+        calls.append(list(task_ids))
+        if len(calls) == 1:
+            return ["CAPCHA_NOT_READY", "7781"]
+        return ["4412"]
+
+    poller._fetch = fetch
+    first, second = await asyncio.gather(
+        poller.wait_for("1", timeout_seconds=30, poll_seconds=5),
+        poller.wait_for("2", timeout_seconds=30, poll_seconds=5),
+    )
+
+    assert (first, second) == ("4412", "7781")
+    assert calls == [["1", "2"], ["1"]]
+
+
+@pytest.mark.asyncio
+async def test_poller_reschedules_batch_after_transient_fetch_failure():
+    model = SolveTimeModel()
+    model.next_delay = lambda *args, **kwargs: 0.01
+    poller = TwoCaptchaResultPoller("key", "https://2captcha.test/res.php", timing=model)
+    calls = []
+
+    async def fetch(task_ids):
+        calls.append(list(task_ids))
+        if len(calls) == 1:
+            raise ConnectionResetError("reset by peer")
+        return ["5511", "6622"]
+
+    poller._fetch = fetch
+    first, second = await asyncio.gather(
+        poller.wait_for("1", timeout_seconds=30, poll_seconds=0.01),
+        poller.wait_for("2", timeout_seconds=30, poll_seconds=0.01),
+    )
+
+    assert (first, second) == ("5511", "6622")
+    assert calls == [["1", "2"], ["1", "2"]]
+
+
+@pytest.mark.asyncio
+async def test_report_bad_solve_calls_reportbad():
+    provider = TwoCaptchaProvider(api_key="key")
+    resp = AsyncMock()
+    resp.json.return_value = {"status": 1, "request": "OK_REPORT_RECORDED"}
+    session = AsyncMock()
+    session.get = lambda url, params: _Response(resp, params)
+
+    with patch("app.automation.captcha.twocaptcha.http_clients") as clients:
+        clients.session.return_value = session
+        await provider.report(CaptchaResult(solved=True, provider="twocaptcha", value="x", task_id="99"), accepted=False)
+
+    assert resp.params == {"key": "key", "action": "reportbad", "id": "99", "json": 1}
+
+
+class _Response:
+    def __init__(self, resp, params):
+        self.resp = resp
+        resp.params = params
+
+    async def __aenter__(self):
+        return self.resp
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def _provider(name, cost=0.0):
+    provider = AsyncMock()
+    provider.name = name
+    provider.cost_per_solve = cost
+    provider.solve_text_captcha.return_value = CaptchaResult(solved=True, provider=name, value=name)
+    return provider
+
+
+def test_router_explores_then_prefers_fastest_accepted_provider():
+    stats = CaptchaStats()
+    local, remote = _provider("local"), _provider("twocaptcha", cost=0.001)
+    router = CaptchaRouter([local, remote], min_samples=2, stats=stats)
+    assert router.rank() == [local, remote]
+
+    for _ in range(2):
+        stats.record_solve("local", True, 300)
+        stats.record_outcome("local", accepted=False)
+    assert router.rank() == [remote, local]  # remote still unmeasured
+
+    for _ in range(2):
+        stats.record_solve("twocaptcha", True, 600)
+        stats.record_outcome("twocaptcha", accepted=True)
+    # local: 0.3s / (0.9 / 3) = 1.0s expected; twocaptcha: 0.6s / (2.9 / 3) ~ 0.62s
+    assert router.rank() == [remote, local]
+
+    router.cost_weight_seconds = 1_000  # 0.001 per solve weighs as 1s
+    assert router.rank() == [local, remote]
+
+
+@pytest.mark.asyncio
+async def test_router_falls_through_to_next_provider():
+    local, remote = _provider("local"), _provider("twocaptcha")
+    local.solve_text_captcha.return_value = CaptchaResult(solved=False, provider="local", error="low_confidence")
+    router = CaptchaRouter([local, remote], stats=CaptchaStats())
+
+    result = await router.solve_text_captcha("ZmFrZQ==")
+    await router.report(result, accepted=False)
+
+    assert result.provider == "twocaptcha"
+    remote.report.assert_awaited_once_with(result, False)
+    local.report.assert_not_awaited()
@@ -0,0 +1,105 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import geo
+from app.main import app
+
+
+client = TestClient(app)
+
+TEHRAN = (35.6892, 51.3890)
+MASHHAD = (36.2605, 59.6168)
+SHIRAZ = (29.5918, 52.5837)
+
+
+def test_python_matrix_matches_scalar_haversine():
+    origins = [TEHRAN, SHIRAZ]
+    destinations = [MASHHAD, TEHRAN, SHIRAZ]
+
+    matrix = geo.haversine_matrix(origins, destinations, use_numpy=False)
+
+    assert len(matrix) == 2 and all(len(row) == 3 for row in matrix)
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
+            assert matrix[i][j] == pytest.approx(geo.haversine_km(*origin, *destination), abs=1e-9)
+    assert matrix[0][1] == pytest.approx(0.0)
+    assert 730 < matrix[0][0] < 750
+
+
+@pytest.mark.skipif(geo.np is None, reason="NumPy is not installed")
+def test_numpy_matrix_matches_python_fallback():
+    origins = [(30 + i * 0.37, 50 + i * 0.21) for i in range(300)]
+    destinations = [(25 + j * 0.5, 45 + j * 0.3) for j in range(40)]
+
+    vectorized = geo.haversine_matrix(origins, destinations)
+    fallback = geo.haversine_matrix(origins, destinations, use_numpy=False)
+
+    for row_vectorized, row_fallback in zip(vectorized, fallback):
+        assert row_vectorized == pytest.approx(row_fallback, rel=1e-9)
+
+
+def test_empty_inputs_yield_no_rows():
+    assert geo.haversine_matrix([], [TEHRAN]) == []
+    assert geo.haversine_matrix([TEHRAN], []) == []
+
+
+def _points(*pairs):
+    return [{"lat": lat, "lng": lng} for lat, lng in pairs]
+
+
+def test_distance_matrix_endpoint_returns_json_matrix():
+    payload = {"origins": _points(TEHRAN), "destinations": _points(MASHHAD, SHIRAZ)}
+
+    with patch("app.core.config.utcms_config.API_AUTH_MODE", "off"):
+        response = client.post("/waybill/distance-matrix", json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rows"] == 1 and body["cols"] == 2
+    assert body["engine"] == geo.matrix_engine()
+    assert body["distances_km"][0][0] == pytest.approx(geo.haversine_km(*TEHRAN, *MASHHAD), abs=1e-3)
+
+
+def test_distance_matrix_endpoint_streams_large_matrices():
+    payload = {"origins": _points(TEHRAN, SHIRAZ, MASHHAD), "destinations": _points(MASHHAD, SHIRAZ)}
+
+    with patch("app.core.config.utcms_config.API_AUTH_MODE", "off"), \
+         patch("app.core.config.utcms_config.DISTANCE_MATRIX_STREAM_THRESHOLD", 4):
+        response = client.post("/waybill/distance-matrix", json=payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["x-matrix-rows"] == "3"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["row"] for line in lines] == [0, 1, 2]
+    assert lines[2]["distances_km"][0] == pytest.approx(0.0)
+
+
+def test_distance_matrix_endpoint_rejects_too_many_points():
+    payload = {"origins": _points(TEHRAN, SHIRAZ, MASHHAD), "destinations": _points(MASHHAD)}
+
+    with patch("app.core.config.utcms_config.API_AUTH_MODE", "off"), \
+         patch("app.core.config.utcms_config.DISTANCE_MATRIX_MAX_POINTS", 2):
+        response = client.post("/waybill/distance-matrix", json=payload)
+
+    assert response.status_code == 422
+
+
+def test_distance_matrix_endpoint_rejects_unstreamed_large_matrices():
+    payload = {
+        "origins": _points(TEHRAN, SHIRAZ, MASHHAD),
+        "destinations": _points(MASHHAD, SHIRAZ),
+        "stream": False,
+    }
+
+    with patch("app.core.config.utcms_config.API_AUTH_MODE", "off"), \
+         patch("app.core.config.utcms_config.DISTANCE_MATRIX_STREAM_THRESHOLD", 4):
+        rejected = client.post("/waybill/distance-matrix", json=payload)
+        payload["origins"] = _points(TEHRAN, SHIRAZ)
+        allowed = client.post("/waybill/distance-matrix", json=payload)
+
+    assert rejected.status_code == 413
+    assert allowed.status_code == 200 and allowed.json()["rows"] == 2
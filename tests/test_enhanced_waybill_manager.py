@@ -1,6 +1,6 @@
 import unittest
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 import sys
 import os
 
@@ -13,6 +13,8 @@ from app.automation.location_selector import LocationSelector, RouteCalculator
 from app.automation.map_controller import MapController, GeoCoordinate
 from app.automation.browser import PageInteractor
 from app.core.config import utcms_config
+from app.automation.form_route import FormRouteMemory
+from app.automation.page_probe import PageSnapshot
 
 class TestEnhancedWaybillManager(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
@@ -44,6 +46,8 @@ class TestEnhancedWaybillManager(unittest.IsolatedAsyncioTestCase):
 
         self.mock_location_selector.select_location = AsyncMock()
         self.mock_route_calculator.calculate_distance = AsyncMock()
+        self.mock_location_selector.resolve_coordinates = AsyncMock(return_value=None)
+        self.mock_route_calculator.cached_route = MagicMock(return_value=None)
 
         # Initialize manager
         self.manager = EnhancedWaybillManager(self.mock_page, self.mock_context)
@@ -235,5 +239,131 @@ class TestEnhancedWaybillManager(unittest.IsolatedAsyncioTestCase):
         self.assertIn("ایجاد بارنامه با شکست مواجه شد: Network Error", str(context.exception))
         self.mock_interactor.screenshot.assert_called_once_with("waybill_map_error")
 
+    async def test_pre_resolution_geocodes_concurrently_and_feeds_selector(self):
+        """Origin and destination are geocoded together and passed into location selection."""
+        both_started = asyncio.Event()
+        started = []
+        coords = {
+            "Tehran": {"lat": 35.6892, "lng": 51.389},
+            "Mashhad": {"lat": 36.2972, "lng": 59.6067},
+        }
+
+        async def resolve(location):
+            started.append(location["city"])
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return coords[location["city"]]
+
+        self.mock_location_selector.resolve_coordinates.side_effect = resolve
+        self.mock_location_selector.select_location.side_effect = [
+            {"success": True, "method": "map", "coordinates": coords["Tehran"]},
+            {"success": True, "method": "map", "coordinates": coords["Mashhad"]},
+        ]
+        cached = {"distance": "740 km", "method": "google_distance_matrix"}
+        self.mock_route_calculator.cached_route.return_value = cached
+        self.manager._submit_waybill = AsyncMock(return_value={"success": True})
+        data = {"origin": {"city": "Tehran"}, "destination": {"city": "Mashhad"}}
+
+        with patch("asyncio.sleep", new_callable=AsyncMock):
+            result = await self.manager.create_waybill_with_map(data)
+
+        self.mock_location_selector.select_location.assert_any_call(
+            {"city": "Tehran", "coordinates": coords["Tehran"]}, origin=True
+        )
+        self.mock_location_selector.select_location.assert_any_call(
+            {"city": "Mashhad", "coordinates": coords["Mashhad"]}, origin=False
+        )
+        self.mock_route_calculator.calculate_distance.assert_not_called()
+        self.assertEqual(result["route"], cached)
+
+    async def test_pre_resolution_failure_falls_back_to_page_flow(self):
+        """Geocoding errors during pre-resolution leave the location data untouched."""
+        self.mock_location_selector.resolve_coordinates.side_effect = RuntimeError("boom")
+        self.mock_location_selector.select_location.side_effect = [
+            {"success": True, "coordinates": None},
+            {"success": True, "coordinates": None},
+        ]
+        self.manager._submit_waybill = AsyncMock(return_value={"success": True})
+        data = {"origin": {"city": "Tehran"}, "destination": {"city": "Mashhad"}}
+
+        with patch("asyncio.sleep", new_callable=AsyncMock):
+            await self.manager.create_waybill_with_map(data)
+
+        self.mock_location_selector.select_location.assert_any_call({"city": "Tehran"}, origin=True)
+        self.mock_route_calculator.cached_route.assert_not_called()
+
+    async def test_form_recovery_is_one_navigation_and_route_is_remembered(self):
+        """A not-found landing follows the menu link once; the next request goes straight there."""
+        form_url = "https://barname.utcms.ir/Barname/Document/HagigiHogugi"
+        not_found = PageSnapshot(
+            url="https://barname.utcms.ir/Barname/Waybill/Create",
+            title="صفحه یافت نشد",
+            matched={"not_found": "text=یافت نشد"},
+            links=[{"text": "حمل بارنامه", "href": "/Barname/Document/HagigiHogugi"}],
+        )
+        ready = PageSnapshot(url=form_url, matched={"form": "#btnGoLVL2"})
+        self.mock_page.url = not_found.url
+        self.manager._dump_not_found_snapshot = AsyncMock()
+        routes = FormRouteMemory()
+
+        with patch("app.automation.waybill_enhanced.form_routes", routes), patch(
+            "app.automation.waybill_enhanced.snapshot_page", AsyncMock(side_effect=[not_found, ready, ready])
+        ):
+            await self.manager._ensure_waybill_form_page()
+            self.mock_page.goto.assert_awaited_once_with(form_url, wait_until="domcontentloaded")
+            self.assertEqual(routes.route_for(self.manager.account), form_url)
+
+            self.mock_page.goto.reset_mock()
+            self.mock_page.url = form_url
+            await self.manager._ensure_waybill_form_page()
+
+        self.mock_page.goto.assert_not_awaited()
+        self.assertEqual(routes.stats()["hits"], 1)
+
+    async def test_script_driven_menu_link_is_clicked(self):
+        home = PageSnapshot(
+            url="https://barname.utcms.ir/Home/Index",
+            links=[{"text": "حمل بارنامه", "href": "javascript:void(0)"}],
+            ready_state="complete",
+        )
+        ready = PageSnapshot(url="https://barname.utcms.ir/Home/Index#waybill", matched={"form": "#btnGoLVL2"})
+        self.mock_page.url = home.url
+        self.mock_page.locator = MagicMock()
+        self.mock_page.locator.return_value.first.click = AsyncMock()
+
+        with patch("app.automation.waybill_enhanced.form_routes", FormRouteMemory()), patch(
+            "app.automation.waybill_enhanced.snapshot_page", AsyncMock(side_effect=[home, ready])
+        ):
+            await self.manager._ensure_waybill_form_page()
+
+        self.mock_page.locator.assert_called_once_with("a:has-text('حمل بارنامه')")
+        self.mock_page.locator.return_value.first.click.assert_awaited_once()
+        self.mock_page.goto.assert_not_awaited()
+        # Loaded pages are classified at once, without waiting for the load event.
+        self.mock_page.wait_for_load_state.assert_awaited_once_with("domcontentloaded")
+
+    async def test_waits_for_load_only_while_home_page_is_loading(self):
+        loading = PageSnapshot(url="https://barname.utcms.ir/Barname/Waybill/Create", ready_state="interactive")
+        ready = PageSnapshot(url=loading.url, matched={"form": "#btnGoLVL2"}, ready_state="complete")
+
+        with patch("app.automation.waybill_enhanced.form_routes", FormRouteMemory()), patch(
+            "app.automation.waybill_enhanced.snapshot_page", AsyncMock(side_effect=[loading, ready])
+        ):
+            await self.manager._ensure_waybill_form_page()
+
+        self.mock_page.wait_for_load_state.assert_awaited_once_with("load", timeout=utcms_config.WAYBILL_FORM_WAIT_MS)
+        self.mock_page.goto.assert_not_awaited()
+
+    async def test_no_access_page_fails_without_sweeping_urls(self):
+        no_access = PageSnapshot(url="https://barname.utcms.ir/Home/InfoIndex")
+
+        with patch(
+            "app.automation.waybill_enhanced.snapshot_page", AsyncMock(return_value=no_access)
+        ), self.assertRaises(WaybillError):
+            await self.manager._ensure_waybill_form_page()
+
+        self.mock_page.goto.assert_not_awaited()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+from app.automation.form_route import (
+    FormRouteMemory,
+    PageState,
+    classify_page,
+    form_link,
+    form_link_click_selector,
+)
+from app.automation.page_probe import PageSnapshot
+
+
+def test_classify_page_states():
+    assert classify_page(PageSnapshot(matched={"form": "#btnGoLVL2"})) == PageState.FORM_READY
+    assert classify_page(PageSnapshot(url="https://x/Home/InfoIndex")) == PageState.NO_ACCESS
+    assert (
+        classify_page(PageSnapshot(links=[{"text": "نامه درخواست دسترسی", "href": "/Request"}]))
+        == PageState.NO_ACCESS
+    )
+    assert classify_page(PageSnapshot(matched={"login": "input[type='password']"})) == PageState.LOGIN
+    assert classify_page(PageSnapshot(url="https://x/Error?code=404")) == PageState.NOT_FOUND
+    assert classify_page(PageSnapshot(title="صفحه یافت نشد")) == PageState.NOT_FOUND
+    assert classify_page(PageSnapshot(url="https://x/Home/Index")) == PageState.HOME
+
+
+def test_form_link_prefers_menu_text_over_href():
+    snapshot = PageSnapshot(
+        url="https://x/Home/Index",
+        links=[
+            {"text": "لیست بارنامه‌ها", "href": "/Barname/Waybill/List"},
+            {"text": "حمل بارنامه", "href": "/Barname/Document/HagigiHogugi"},
+            {"text": "صدور بارنامه", "href": "javascript:void(0)"},
+        ],
+    )
+
+    assert form_link(snapshot) == "https://x/Barname/Document/HagigiHogugi"
+    assert form_link(PageSnapshot(url="https://x/", links=[{"text": "", "href": "#"}])) is None
+    # A script-driven menu entry is clicked instead of navigated to.
+    assert form_link_click_selector(snapshot) == "a:has-text('صدور بارنامه')"
+    assert form_link_click_selector(PageSnapshot(links=[{"text": "حمل بارنامه", "href": "/x"}])) is None
+
+
+def test_route_memory_is_per_account_and_ignores_non_http_urls():
+    routes = FormRouteMemory()
+    routes.remember("a", "https://x/form")
+    routes.remember("b", "<MagicMock>")
+
+    assert routes.route_for("a") == "https://x/form"
+    assert routes.route_for("b") is None
+    routes.forget("a")
+    assert routes.stats() == {"accounts": 0, "hits": 0, "misses": 0}
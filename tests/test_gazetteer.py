@@ -0,0 +1,102 @@
+import sqlite3
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.automation.gazetteer import Gazetteer, GazetteerEntry, get_gazetteer, place_key
+from app.automation.geocode_cache import GeocodeCache
+from app.automation.location_selector import LocationSelector
+from app.core.text import normalize_persian
+
+
+def test_normalize_persian_unifies_variants():
+    assert normalize_persian("كرمانشاه") == normalize_persian("کرمانشاه")
+    assert normalize_persian("ري") == "ری"
+    assert normalize_persian("منطقه ۱۲") == "منطقه 12"
+    assert normalize_persian("منطقه ١٢") == "منطقه 12"
+    assert normalize_persian("نجف‌آباد") == "نجف اباد"
+    assert normalize_persian("  شیراز،  فارس ") == "شیراز فارس"
+
+
+def test_place_key_ignores_prefix_and_spacing():
+    assert place_key("استان خراسان رضوی") == place_key("خراسان‌رضوی")
+    assert place_key("شهر بندر عباس") == place_key("بندرعباس")
+
+
+def test_bundled_gazetteer_resolves_city_and_province():
+    gazetteer = get_gazetteer()
+
+    mashhad = gazetteer.geocode({"province": "خراسان رضوي", "city": "مشهد"})
+    assert mashhad == pytest.approx({"lat": 36.2605, "lng": 59.6168})
+
+    # An unknown city is left to the remote geocoder instead of the distant province centre
+    assert gazetteer.geocode({"province": "کرمان", "city": "بم"}) is None
+    assert gazetteer.geocode({"province": "استان فارس"}) is not None
+    assert gazetteer.geocode({"province": "Tehran", "city": "Tehran"}) is not None
+    assert gazetteer.geocode({"province": "ناشناخته", "city": "ناشناخته"}) is None
+
+    tajrish = gazetteer.geocode({"province": "تهران", "city": "تهران", "district": "منطقه 1"})
+    assert tajrish == pytest.approx({"lat": 35.8040, "lng": 51.4330})
+    assert gazetteer.geocode({"province": "تهران", "city": "تهران", "district": "ونک"}) is not None
+    # An unknown district inside a known city still resolves to the city
+    assert gazetteer.geocode({"province": "تهران", "city": "تهران", "district": "ناشناخته"}) == pytest.approx(
+        {"lat": 35.6892, "lng": 51.3890}
+    )
+
+
+def test_lookup_prefers_district_and_disambiguates_by_province():
+    gazetteer = Gazetteer(
+        [
+            GazetteerEntry(kind="city", name="مرکز", lat=1.0, lng=1.0, province="الف"),
+            GazetteerEntry(kind="city", name="مرکز", lat=2.0, lng=2.0, province="ب"),
+            GazetteerEntry(kind="district", name="منطقه ۱", lat=3.0, lng=3.0, province="الف", city="مرکز"),
+        ]
+    )
+
+    assert gazetteer.lookup(province="ب", city="مرکز").lat == 2.0
+    assert gazetteer.lookup(province="الف", city="مرکز", district="منطقه 1").lat == 3.0
+    assert gazetteer.lookup(province="ج", city="مرکز") is None
+
+
+def test_gazetteer_loads_from_sqlite(tmp_path):
+    db_path = tmp_path / "places.sqlite"
+    connection = sqlite3.connect(db_path)
+    connection.execute("CREATE TABLE places (kind, name, province, city, lat, lng, aliases)")
+    connection.execute(
+        "INSERT INTO places VALUES ('city', 'يزد', 'یزد', '', 31.8974, 54.3569, 'Yazd')"
+    )
+    connection.execute("INSERT INTO places VALUES ('city', 'bad', '', '', 'x', 0, '')")
+    connection.commit()
+    connection.close()
+
+    gazetteer = Gazetteer.from_path(db_path)
+
+    assert len(gazetteer) == 1
+    assert gazetteer.lookup(city="یزد").lng == 54.3569
+    assert gazetteer.lookup(city="yazd") is not None
+
+
+@pytest.mark.asyncio
+async def test_geocode_address_uses_gazetteer_before_remote():
+    selector = LocationSelector(AsyncMock())
+    selector._geocode_remote = AsyncMock(return_value={"lat": 0.0, "lng": 0.0})
+
+    result = await selector._geocode_address({"province": "اصفهان", "city": "كاشان"})
+
+    assert result == pytest.approx({"lat": 33.985, "lng": 51.41})
+    selector._geocode_remote.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_geocode_address_remote_fallback_is_optional():
+    selector = LocationSelector(AsyncMock())
+    selector._geocode_remote = AsyncMock(return_value={"lat": 9.0, "lng": 9.0})
+    location = {"province": "ناشناخته", "city": "ناشناخته", "address": "x"}
+
+    with patch("app.core.config.utcms_config.GEOCODE_REMOTE_FALLBACK", False):
+        assert await selector._geocode_address(location) is None
+    selector._geocode_remote.assert_not_awaited()
+
+    with patch("app.core.config.utcms_config.GEOCODE_REMOTE_FALLBACK", True), \
+         patch("app.automation.location_selector.geocode_cache", GeocodeCache(path="")):
+        assert await selector._geocode_address(location) == {"lat": 9.0, "lng": 9.0}
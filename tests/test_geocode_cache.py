@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.automation.geocode_cache import GeocodeCache, geocode_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_normalizes_persian_variants():
+    assert geocode_cache_key({"city": "كرج", "address": "خيابان  ۱۲"}) == geocode_cache_key(
+        {"city": "کرج", "address": "خیابان 12"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_then_sqlite_hits_and_ttl(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "geo.sqlite3")
+    cache = GeocodeCache(path=path, ttl_seconds=60, negative_ttl_seconds=10, clock=clock)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {"lat": 35.7, "lng": 51.4}
+
+    location = {"city": "تهران", "address": "آزادی"}
+    assert await cache.get_or_fetch(location, fetch) == {"lat": 35.7, "lng": 51.4}
+    assert await cache.get_or_fetch(location, fetch) == {"lat": 35.7, "lng": 51.4}
+
+    # A fresh process only has the SQLite layer
+    restarted = GeocodeCache(path=path, ttl_seconds=60, negative_ttl_seconds=10, clock=clock)
+    assert await restarted.get_or_fetch(location, fetch) == {"lat": 35.7, "lng": 51.4}
+    assert len(calls) == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert restarted.stats()["sqlite_hits"] == 1
+
+    clock.now += 61
+    await restarted.get_or_fetch(location, fetch)
+    assert len(calls) == 2
+    cache.close()
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_empty_results_are_cached_briefly():
+    clock = FakeClock()
+    cache = GeocodeCache(path="", ttl_seconds=60, negative_ttl_seconds=10, clock=clock)
+    calls = []
+
+    async def empty_fetch():
+        calls.append(1)
+        return None
+
+    location = {"city": "ناشناخته", "address": "x"}
+    assert await cache.get_or_fetch(location, empty_fetch) is None
+    assert await cache.get_or_fetch(location, empty_fetch) is None
+    assert len(calls) == 1
+    assert cache.stats()["negative_hits"] == 1
+
+    clock.now += 11
+    await cache.get_or_fetch(location, empty_fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_errors_are_not_cached():
+    cache = GeocodeCache(path="", ttl_seconds=60, negative_ttl_seconds=10, clock=FakeClock())
+    calls = []
+
+    async def flaky_fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()
+        return {"lat": 36.3, "lng": 59.6}
+
+    location = {"city": "مشهد", "address": "x"}
+    assert await cache.get_or_fetch(location, flaky_fetch) is None
+    assert await cache.get_or_fetch(location, flaky_fetch) == {"lat": 36.3, "lng": 59.6}
+    assert len(calls) == 2
+    assert cache.stats()["fetch_errors"] == 1
+    assert cache.stats()["negative_hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_lookups_are_coalesced():
+    cache = GeocodeCache(path="", ttl_seconds=60, negative_ttl_seconds=10)
+    calls = []
+    release = asyncio.Event()
+
+    async def slow_fetch():
+        calls.append(1)
+        await release.wait()
+        return {"lat": 1.0, "lng": 2.0}
+
+    location = {"city": "مشهد", "address": "وکیل آباد"}
+    tasks = [asyncio.create_task(cache.get_or_fetch(location, slow_fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == [{"lat": 1.0, "lng": 2.0}] * 5
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["coalesced"] == 4
+    assert stats["hit_rate"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest_entry():
+    cache = GeocodeCache(path="", max_entries=2, ttl_seconds=60, negative_ttl_seconds=10)
+
+    async def fetch():
+        return {"lat": 0.0, "lng": 0.0}
+
+    for city in ("a", "b", "c"):
+        await cache.get_or_fetch({"city": city, "address": ""}, fetch)
+
+    assert cache.stats()["entries"] == 2
+    assert geocode_cache_key({"city": "a"}) not in cache._memory
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.automation.captcha.twocaptcha import TwoCaptchaProvider
+from app.core.http_client import HTTPClientManager
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_reused_per_upstream_and_closed():
+    manager = HTTPClientManager()
+
+    first = manager.session("twocaptcha")
+    assert manager.session("twocaptcha") is first
+    geocode = manager.session("geocode")
+    assert geocode is not first
+    assert manager.stats() == {"sessions": ["geocode", "twocaptcha"], "created": 2}
+
+    await manager.close()
+    assert first.closed and geocode.closed
+
+    reopened = manager.session("twocaptcha")
+    assert reopened is not first and not reopened.closed
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_from_another_loop_is_replaced_and_closed():
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    manager = HTTPClientManager()
+
+    async def open_session():
+        return manager.session("geocode")
+
+    try:
+        old = asyncio.run_coroutine_threadsafe(open_session(), other_loop).result(timeout=5)
+
+        current = manager.session("geocode")
+        assert current is not old and not old.closed
+
+        await manager.close()
+        assert old.closed and current.closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(timeout=5)
+        other_loop.close()
+
+
+@pytest.mark.asyncio
+async def test_twocaptcha_polls_through_shared_session():
+    responses = iter(
+        [
+            {"status": 1, "request": "42"},
+            {"status": 0, "request": "CAPCHA_NOT_READY"},
+            {"status": 1, "request": "abcd"},
+        ]
+    )
+
+    def respond(*args, **kwargs):
+        resp = MagicMock()
+        resp.json = AsyncMock(return_value=next(responses))
+        ctx = MagicMock()
+        ctx.__aenter__ = AsyncMock(return_value=resp)
+        ctx.__aexit__ = AsyncMock(return_value=False)
+        return ctx
+
+    session = MagicMock()
+    session.post.side_effect = respond
+    session.get.side_effect = respond
+    clients = MagicMock()
+    clients.session.return_value = session
+
+    provider = TwoCaptchaProvider(api_key="key", timeout_seconds=30, poll_seconds=0.1, max_retries=1)
+    with patch("app.automation.captcha.twocaptcha.http_clients", clients), patch(
+        "app.automation.captcha.twocaptcha.SolveTimeModel.next_delay", return_value=0.01
+    ):
+        result = await provider.solve_text_captcha("ZmFrZQ==")
+
+    assert result.solved is True and result.value == "abcd"
+    assert session.post.call_count == 1
+    assert session.get.call_count == 2
+    assert {call.args[0] for call in clients.session.call_args_list} == {"twocaptcha"}
@@ -109,5 +109,163 @@ class TestLocationSelector(unittest.IsolatedAsyncioTestCase):
             # Should try province and city
             self.assertEqual(selector._select_from_options.call_count, 2)
 
+    async def test_select_from_options_uses_single_eval_and_select(self):
+        page = AsyncMock()
+        page.eval_on_selector.return_value = [
+            ["انتخاب استان", ""],
+            ["تهران", "1"],
+            ["خراسان رضوي", "2"],
+            ["كرمانشاه", "3"],
+        ]
+        selector = LocationSelector(page)
+
+        self.assertTrue(await selector._select_from_options(["#Province"], "خراسان‌رضوی"))
+
+        page.eval_on_selector.assert_awaited_once()
+        page.select_option.assert_awaited_once_with("#Province", value="2")
+        page.query_selector_all.assert_not_awaited()
+
+    async def test_select_from_options_skips_missing_select_and_placeholder(self):
+        page = AsyncMock()
+        page.eval_on_selector.side_effect = [
+            Exception("no element"),
+            [["انتخاب شهر", ""], ["مشهد مقدس", "11"], ["نیشابور", "12"]],
+        ]
+        selector = LocationSelector(page)
+
+        self.assertTrue(await selector._select_from_options(["#missing", "#City"], "مشهد"))
+        page.select_option.assert_awaited_once_with("#City", value="11")
+
+        page.reset_mock()
+        self.assertFalse(await selector._select_from_options(["#City"], ""))
+        page.eval_on_selector.assert_not_awaited()
+
+    async def test_option_catalog_selects_known_value_without_scanning(self):
+        from app.automation.option_catalog import OptionCatalog
+
+        catalog = OptionCatalog(revalidate_seconds=3600)
+        page = AsyncMock()
+        page.eval_on_selector.return_value = [["انتخاب شهر", ""], ["مشهد", "11"], ["نیشابور", "12"]]
+        selector = LocationSelector(page)
+        selectors = ["#OriginCity", "select[name='OriginCity']"]
+
+        with patch("app.automation.location_selector.option_catalog", catalog):
+            first = await selector._select_from_options(selectors, "مشهد", level="city", parents=("2",))
+            page.reset_mock()
+            second = await selector._select_from_options(selectors, "نيشابور", level="city", parents=("2",))
+
+        self.assertEqual((first, second), ("11", "12"))
+        page.eval_on_selector.assert_not_awaited()
+        page.wait_for_selector.assert_awaited_once()
+        self.assertIn('option[value="12"]', page.wait_for_selector.await_args.args[0])
+        page.select_option.assert_awaited_once_with("#OriginCity", value="12")
+
+    async def test_option_catalog_rescans_when_known_option_is_missing(self):
+        from app.automation.option_catalog import OptionCatalog
+
+        catalog = OptionCatalog(revalidate_seconds=3600)
+        catalog.record("province", (), [["تهران", "1"]])
+        catalog.remember_selector(["#Province"], "#Province")
+        page = AsyncMock()
+        page.wait_for_selector.side_effect = Exception("timeout")
+        page.eval_on_selector.return_value = [["تهران", "101"]]
+        selector = LocationSelector(page)
+
+        with patch("app.automation.location_selector.option_catalog", catalog):
+            selected = await selector._select_from_options(["#Province"], "تهران", level="province")
+
+        self.assertEqual(selected, "101")
+        self.assertEqual(catalog.resolve("province", (), "تهران"), "101")
+
+    async def test_option_catalog_miss_waits_for_dependent_list_before_scanning(self):
+        from app.automation.option_catalog import OptionCatalog
+
+        catalog = OptionCatalog(revalidate_seconds=3600)
+        catalog.record("city", ("2",), [["مشهد", "11"]])
+        catalog.remember_selector(["#OriginCity"], "#OriginCity")
+        page = AsyncMock()
+        calls = []
+        page.wait_for_function.side_effect = lambda *args, **kwargs: calls.append("wait")
+
+        async def eval_options(*args):
+            calls.append("scan")
+            return [["انتخاب شهر", ""], ["مشهد", "11"], ["نیشابور", "12"]]
+
+        page.eval_on_selector.side_effect = eval_options
+        selector = LocationSelector(page)
+
+        with patch("app.automation.location_selector.option_catalog", catalog):
+            selected = await selector._select_from_options(
+                ["#OriginCity"], "نیشابور", level="city", parents=("2",)
+            )
+
+        self.assertEqual(selected, "12")
+        self.assertEqual(calls, ["wait", "scan"])
+        self.assertEqual(page.wait_for_function.await_args.kwargs["arg"], ["#OriginCity"])
+        page.wait_for_selector.assert_not_awaited()
+        self.assertEqual(catalog.lookup("city", ("2",), "نیشابور"), "12")
+
+    def test_option_catalog_miss_invalidates_list(self):
+        from app.automation.option_catalog import OptionCatalog
+
+        catalog = OptionCatalog(revalidate_seconds=3600)
+        catalog.record("city", ("2",), [["مشهد", "11"]])
+        self.assertIsNone(catalog.resolve("city", ("2",), "نیشابور"))
+        self.assertFalse(catalog.knows("city", ("2",)))
+        self.assertEqual(catalog.stats()["misses"], 1)
+
+    async def test_dropdown_cascade_skips_fixed_waits_when_catalog_is_warm(self):
+        from app.automation.option_catalog import OptionCatalog
+
+        catalog = OptionCatalog(revalidate_seconds=3600)
+        page = AsyncMock()
+        page.eval_on_selector.side_effect = [
+            [["تهران", "1"]],
+            [["تهران", "10"], ["ری", "11"]],
+        ]
+        selector = LocationSelector(page)
+        location_data = {"province": "تهران", "city": "ری", "address": "x"}
+
+        with patch("app.automation.location_selector.option_catalog", catalog), \
+             patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            cold = await selector._try_dropdown_selection(location_data, "Origin")
+            self.assertEqual(mock_sleep.await_count, 1)
+            mock_sleep.reset_mock()
+            warm = await selector._try_dropdown_selection(location_data, "Origin")
+
+        self.assertTrue(cold["success"] and warm["success"])
+        mock_sleep.assert_not_awaited()
+        self.assertEqual(page.eval_on_selector.await_count, 2)
+
+    def test_option_catalog_revalidates_after_interval(self):
+        from app.automation.option_catalog import OptionCatalog
+
+        now = [0.0]
+        catalog = OptionCatalog(revalidate_seconds=10, clock=lambda: now[0])
+        catalog.record("city", ("1",), [["تهران", "10"]])
+        self.assertEqual(catalog.resolve("city", ("1",), "تهران"), "10")
+        now[0] = 10.0
+        self.assertFalse(catalog.knows("city", ("1",)))
+        self.assertIsNone(catalog.resolve("city", ("1",), "تهران"))
+
+    def test_best_option_match_ranking(self):
+        from app.core.text import best_option_match
+
+        options = [["شهر ری", "10"], ["ری", "11"], ["ساری", "12"], ["کرج", "13"]]
+        self.assertEqual(best_option_match("ري", options), ("ری", "11"))
+        self.assertEqual(best_option_match("13", options), ("کرج", "13"))
+        self.assertEqual(best_option_match("کرجج", options), ("کرج", "13"))
+        self.assertIsNone(best_option_match("اصفهان", options))
+
+    async def test_resolve_coordinates_prefers_given_and_skips_empty(self):
+        selector = LocationSelector(AsyncMock())
+        selector._geocode_address = AsyncMock(return_value={"lat": 1.0, "lng": 2.0})
+
+        given = {"lat": 35.7, "lng": 51.4}
+        self.assertEqual(await selector.resolve_coordinates({"coordinates": given}), given)
+        self.assertIsNone(await selector.resolve_coordinates({}))
+        selector._geocode_address.assert_not_awaited()
+        self.assertEqual(await selector.resolve_coordinates({"city": "تهران"}), {"lat": 1.0, "lng": 2.0})
+
 if __name__ == '__main__':
     unittest.main()
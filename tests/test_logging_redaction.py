@@ -28,3 +28,18 @@ def test_json_formatter_includes_request_id_and_redacted_message():
     payload = formatter.format(record)
     assert "rid-1" in payload
     assert "SECRET123" not in payload
+
+
+def test_sanitize_redacts_every_secret_in_one_pass():
+    message = "Authorization: Bearer abc.def-1 api-key=K1, jwt_secret=S1; password: P1 token=T1"
+    cleaned = sanitize(message)
+
+    for secret in ("abc.def-1", "K1", "S1", "P1", "T1"):
+        assert secret not in cleaned
+    assert cleaned.count("***") == 5
+    assert cleaned.startswith("Authorization: Bearer ***")
+
+
+def test_sanitize_returns_untouched_strings_without_triggers():
+    message = "safe_fill_failed selector=input[name='CargoWeight']"
+    assert sanitize(message) is message
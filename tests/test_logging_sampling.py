@@ -0,0 +1,110 @@
+import logging
+
+from app.core.logging import JsonFormatter, LogSamplingFilter, parse_sampling_rates
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _record(name="app.automation.browser", msg="safe_fill_failed", level=logging.WARNING, **fields):
+    record = logging.LogRecord(
+        name=name,
+        level=level,
+        pathname=__file__,
+        lineno=1,
+        msg=msg,
+        args=(),
+        exc_info=None,
+    )
+    record.extra_fields = fields
+    return record
+
+
+def test_repeated_warnings_are_collapsed_within_window():
+    clock = _FakeClock()
+    summaries = []
+    log_filter = LogSamplingFilter(window_seconds=10, clock=clock, summary_sink=summaries.append)
+
+    assert log_filter.filter(_record(selector="#a", error="timeout 1")) is True
+    assert log_filter.filter(_record(selector="#a", error="timeout 2")) is False
+    assert log_filter.filter(_record(selector="#a", error="timeout 3")) is False
+    # A different key field is a different event.
+    assert log_filter.filter(_record(selector="#b")) is True
+    assert summaries == []
+
+    # The first record after the window closes flushes a summary of the dropped repeats.
+    clock.now = 11
+    record = _record(selector="#a")
+    assert log_filter.filter(record) is True
+    assert not getattr(record, "suppressed_repeats", 0)
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert summary.msg == "log_repeats_suppressed"
+    assert summary.extra_fields["event"] == "safe_fill_failed"
+    assert summary.extra_fields["selector"] == "#a"
+    assert summary.suppressed_repeats == 2
+    assert log_filter.filter(summary) is True
+
+    payload = JsonFormatter().format(summary)
+    assert '"suppressed_repeats": 2' in payload
+
+
+def test_only_allowlisted_events_are_collapsed():
+    log_filter = LogSamplingFilter(window_seconds=60, clock=_FakeClock())
+
+    assert log_filter.filter(_record(name="app.main", msg="http_request", level=logging.INFO, path="/x")) is True
+    assert log_filter.filter(_record(name="app.main", msg="http_request", level=logging.INFO, path="/x")) is True
+    assert log_filter.filter(_record(msg="login_failed", reason="captcha")) is True
+    assert log_filter.filter(_record(msg="login_failed", reason="captcha")) is True
+
+
+def test_every_non_volatile_field_is_part_of_the_key():
+    log_filter = LogSamplingFilter(window_seconds=60, clock=_FakeClock())
+
+    assert log_filter.filter(_record(msg="safe_click_failed", selector="#a", reason="detached")) is True
+    assert log_filter.filter(_record(msg="safe_click_failed", selector="#a", reason="hidden")) is True
+    assert log_filter.filter(_record(msg="safe_click_failed", selector="#a", reason="hidden", attempt=2)) is False
+
+
+def test_flush_emits_pending_summaries():
+    summaries = []
+    log_filter = LogSamplingFilter(window_seconds=60, clock=_FakeClock(), summary_sink=summaries.append)
+
+    log_filter.filter(_record(selector="#a"))
+    log_filter.filter(_record(selector="#a"))
+    log_filter.filter(_record(selector="#b"))
+    log_filter.flush()
+
+    assert [(s.extra_fields["selector"], s.suppressed_repeats) for s in summaries] == [("#a", 1)]
+
+
+def test_errors_are_never_suppressed():
+    log_filter = LogSamplingFilter(window_seconds=60, clock=_FakeClock())
+
+    assert log_filter.filter(_record(level=logging.ERROR)) is True
+    assert log_filter.filter(_record(level=logging.ERROR)) is True
+
+
+def test_sampling_rate_applies_to_child_loggers_and_can_change_at_runtime():
+    log_filter = LogSamplingFilter(window_seconds=0)
+    log_filter.set_sampling_rate("app.automation", 0.25)
+
+    kept = sum(log_filter.filter(_record(name="app.automation.browser")) for _ in range(100))
+    assert kept == 25
+    assert log_filter.filter(_record(name="app.services")) is True
+
+    log_filter.set_sampling_rate("app.automation", 0.0)
+    assert log_filter.filter(_record(name="app.automation.browser")) is False
+
+    log_filter.clear_sampling_rate("app.automation")
+    assert log_filter.filter(_record(name="app.automation.browser")) is True
+
+
+def test_parse_sampling_rates_ignores_invalid_items():
+    rates = parse_sampling_rates("app.automation=0.5, bad, app.core=x, uvicorn.access=2")
+    assert rates == {"app.automation": 0.5, "uvicorn.access": 1.0}
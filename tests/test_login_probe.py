@@ -0,0 +1,81 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.automation.login_probe import LoginUrlProbe, looks_like_login_form
+from app.core.http_client import http_clients
+
+LOGIN_HTML = "<form method='post'><input name='Username'><input type=password name='Password'></form>"
+
+
+def _site(hits):
+    async def not_found(request):
+        hits.append(request.path)
+        return web.Response(status=404)
+
+    async def redirect(request):
+        hits.append(request.path)
+        raise web.HTTPFound("/Barname/Account/Login?ReturnUrl=%2F")
+
+    async def login(request):
+        hits.append(request.path)
+        return web.Response(text=LOGIN_HTML, content_type="text/html")
+
+    async def slow_login(request):
+        hits.append(request.path)
+        await asyncio.sleep(0.3)
+        return web.Response(text=LOGIN_HTML, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/Login", not_found)
+    app.router.add_get("/Account/Login", redirect)
+    app.router.add_get("/Barname/Account/Login", login)
+    app.router.add_get("/Slow/Login", slow_login)
+    return app
+
+
+def test_looks_like_login_form():
+    assert looks_like_login_form(LOGIN_HTML)
+    assert not looks_like_login_form("<form><input name='q'></form>")
+
+
+@pytest.mark.asyncio
+async def test_probe_picks_first_working_candidate_and_remembers_it():
+    hits = []
+    async with TestServer(_site(hits)) as server:
+        probe = LoginUrlProbe()
+        candidates = [str(server.make_url(path)) for path in ("/Login", "/Account/Login", "/Slow/Login")]
+
+        resolved = await probe.resolve(candidates)
+        assert resolved == str(server.make_url("/Barname/Account/Login?ReturnUrl=%2F"))
+
+        hits.clear()
+        assert await probe.resolve(candidates) == resolved
+        assert hits == []
+
+        probe.forget(resolved)
+        assert probe.known_url is None
+        assert await probe.resolve(candidates[:1]) is None
+    await http_clients.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_is_not_repeated_until_retry_interval():
+    hits = []
+    now = [0.0]
+    async with TestServer(_site(hits)) as server:
+        probe = LoginUrlProbe(clock=lambda: now[0])
+        candidates = [str(server.make_url("/Login"))]
+
+        with patch("app.core.config.utcms_config.LOGIN_PROBE_RETRY_SECONDS", 60):
+            assert await probe.resolve(candidates) is None
+            assert await probe.resolve(candidates) is None
+            assert (probe.probes, hits) == (1, ["/Login"])
+
+            now[0] = 61
+            assert await probe.resolve(candidates) is None
+            assert probe.probes == 2
+    await http_clients.close()
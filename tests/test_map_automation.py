@@ -7,19 +7,69 @@ import os
 # Add app to path
 sys.path.append(os.getcwd())
 
-from app.automation.map_controller import MapController, GeoCoordinate
+from app.automation.map_controller import MapController, GeoCoordinate, map_detection_cache
 from app.automation.location_selector import LocationSelector
 from app.automation.waybill_enhanced import EnhancedWaybillManager
 
 class TestMapAutomation(unittest.IsolatedAsyncioTestCase):
     async def test_detect_google_map(self):
         page = AsyncMock()
-        # Mock evaluate to return true for Google Maps check (first call)
-        page.evaluate.side_effect = [True, False, False, False]
+        # Detection runs as a single evaluate returning library/selector details
+        page.evaluate.return_value = {"library": "google_maps", "version": "3.55", "selector": "#map"}
 
         controller = MapController(page)
         map_type = await controller.detect_map_type()
         self.assertEqual(map_type, 'google_maps')
+        self.assertEqual(controller.map_selector, "#map")
+        page.evaluate.assert_awaited_once()
+        page.query_selector.assert_not_awaited()
+
+    async def test_detect_map_reuses_page_and_path_cache(self):
+        page = AsyncMock()
+        page.url = "https://example.test/Barname/Waybill/Create"
+        page.evaluate.return_value = {"library": "leaflet", "selector": "#map", "instance": "element._leaflet_map"}
+
+        # Origin and destination use separate controllers on the same page
+        self.assertEqual(await MapController(page).detect_map_type(), "leaflet")
+        self.assertEqual(await MapController(page).detect_map_type(), "leaflet")
+        page.evaluate.assert_awaited_once()
+
+        # A new page on the same path reuses the detection until the TTL expires
+        other_page = AsyncMock()
+        other_page.url = "https://example.test/Barname/Waybill/Create?step=2"
+        controller = MapController(other_page)
+        self.assertEqual(await controller.detect_map_type(), "leaflet")
+        self.assertEqual(controller.detection.instance, "element._leaflet_map")
+        other_page.evaluate.assert_not_awaited()
+
+        map_detection_cache.clear()
+
+    async def test_detect_map_does_not_cache_missing_map(self):
+        page = AsyncMock()
+        page.url = "https://example.test/Barname/Waybill/Empty"
+        page.evaluate.return_value = {"library": None, "selector": None}
+
+        controller = MapController(page)
+        self.assertIsNone(await controller.detect_map_type())
+        self.assertIsNone(await controller.detect_map_type())
+        self.assertEqual(page.evaluate.await_count, 2)
+
+    async def test_unknown_map_is_not_cached_per_path(self):
+        page = AsyncMock()
+        page.url = "https://example.test/Barname/Waybill/Loading"
+        page.evaluate.return_value = {"library": "unknown_map", "selector": "#map"}
+
+        controller = MapController(page)
+        self.assertEqual(await controller.detect_map_type(), "unknown_map")
+
+        # A later request on the same path detects again once the library has loaded.
+        other_page = AsyncMock()
+        other_page.url = page.url
+        other_page.evaluate.return_value = {"library": "leaflet", "selector": "#map"}
+        self.assertEqual(await MapController(other_page).detect_map_type(), "leaflet")
+        other_page.evaluate.assert_awaited_once()
+
+        map_detection_cache.clear()
 
     async def test_location_selector_map_fallback(self):
         page = AsyncMock()
@@ -75,6 +125,55 @@ class TestMapAutomation(unittest.IsolatedAsyncioTestCase):
         # Expected distance is around 740km
         self.assertTrue(result["distance_value"] > 700000)
 
+    async def test_route_cache_skips_page_for_repeated_lane(self):
+        from app.automation.location_selector import RouteCalculator
+        from app.automation.route_cache import RouteCache
+
+        cache = RouteCache(precision=3, ttl_seconds=60, max_entries=10)
+        page = AsyncMock()
+        page.evaluate.return_value = {"distance": "740 km", "distance_value": 740000, "duration": "9 hours"}
+        calculator = RouteCalculator(page)
+
+        with patch("app.automation.location_selector.route_cache", cache):
+            first = await calculator.calculate_distance(GeoCoordinate(35.68921, 51.38901), GeoCoordinate(36.2972, 59.6067))
+            # Within rounding precision: same lane
+            second = await calculator.calculate_distance(GeoCoordinate(35.68924, 51.38899), GeoCoordinate(36.2972, 59.6067))
+
+        page.evaluate.assert_awaited_once()
+        self.assertEqual(first["method"], "google_distance_matrix")
+        self.assertEqual(second, first)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    async def test_route_cache_ignores_in_page_haversine(self):
+        from app.automation.location_selector import RouteCalculator
+        from app.automation.route_cache import RouteCache
+
+        cache = RouteCache(precision=3, ttl_seconds=60, max_entries=10)
+        page = AsyncMock()
+        page.evaluate.return_value = {"distance": "740 km", "distance_value": 740000, "method": "haversine"}
+        calculator = RouteCalculator(page)
+
+        with patch("app.automation.location_selector.route_cache", cache):
+            await calculator.calculate_distance(GeoCoordinate(35.6892, 51.389), GeoCoordinate(36.2972, 59.6067))
+            await calculator.calculate_distance(GeoCoordinate(35.6892, 51.389), GeoCoordinate(36.2972, 59.6067))
+
+        self.assertEqual(page.evaluate.await_count, 2)
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    def test_route_cache_ttl_and_size_limits(self):
+        from app.automation.route_cache import RouteCache
+
+        now = [0.0]
+        cache = RouteCache(precision=4, ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+        keys = [cache.key(1.0, 1.0, float(i), 2.0) for i in range(3)]
+        for key in keys:
+            cache.put(key, {"distance_value": 1, "method": "haversine"})
+
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        now[0] = 11.0
+        self.assertIsNone(cache.get(keys[2]))
+
     @patch("asyncio.sleep", new_callable=AsyncMock)
     async def test_search_address(self, mock_sleep):
         page = AsyncMock()
@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+
+from scripts.mock_utcms_site import AUTH_COOKIE, MockSiteConfig, create_mock_site
+
+
+def _login(client: TestClient, captcha: str = "12345"):
+    return client.post(
+        "/Login",
+        data={"UserName": "user", "Password": "pass", "DNTCaptchaInputText": captcha},
+        follow_redirects=False,
+    )
+
+
+def test_login_page_exposes_automation_selectors():
+    client = TestClient(create_mock_site(MockSiteConfig()))
+    page = client.get("/Login").text
+
+    assert 'name="UserName"' in page
+    assert 'name="DNTCaptchaInputText"' in page
+    assert 'id="DNTCaptchaImage"' in page
+    assert 'name="DNTCaptchaToken"' in page
+    assert client.get("/DNTCaptchaImage/Show").content.startswith(b"\x89PNG")
+
+
+def test_login_rejects_wrong_captcha_and_accepts_valid_one():
+    client = TestClient(create_mock_site(MockSiteConfig(captcha_value="12345")))
+
+    rejected = _login(client, captcha="00000")
+    assert rejected.status_code == 200
+    assert "validation-summary-errors" in rejected.text
+
+    accepted = _login(client)
+    assert accepted.status_code == 302
+    assert AUTH_COOKIE in accepted.cookies
+
+    form = client.get("/Barname/Waybill/Create").text
+    for marker in ("btnGoLVL2", "btnGoLVL3", 'name="OriginProvince"', 'id="map"', "window.L"):
+        assert marker in form
+
+
+def test_cascading_location_endpoints():
+    client = TestClient(create_mock_site(MockSiteConfig()))
+
+    cities = client.get("/Barname/Location/Cities", params={"provinceId": 1}).json()
+    assert cities[0]["name"] == "تهران"
+    districts = client.get("/Barname/Location/Districts", params={"provinceId": 1, "cityId": 1}).json()
+    assert len(districts) > 1
+
+
+def test_submit_returns_tracking_code_page():
+    client = TestClient(create_mock_site(MockSiteConfig(seed=1)))
+    _login(client)
+
+    response = client.post(
+        "/Barname/Waybill/Create",
+        data={
+            "txtSenderFirstName": "علی",
+            "txtSenderMobile": "09121234567",
+            "txtReceiverFirstName": "رضا",
+            "CargoWeight": "1000",
+        },
+    )
+    assert "tracking-code" in response.text
+    assert "/Barname/Waybill/Details/" in str(response.url)
+
+
+def test_rate_limit_injection_and_not_found_shell():
+    throttled = TestClient(create_mock_site(MockSiteConfig(rate_limit_ratio=1.0)))
+    assert throttled.get("/Login").status_code == 429
+
+    client = TestClient(create_mock_site(MockSiteConfig()))
+    missing = client.get("/Barname/Unknown")
+    assert missing.status_code == 404
+    assert "یافت نشد" in missing.text
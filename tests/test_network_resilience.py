@@ -23,8 +23,8 @@ def _request() -> WaybillMapRequest:
     return WaybillMapRequest(
         session_id="network-test",
         operation_mode=OperationMode.SAFE,
-        sender=SenderModel(name="S", phone="0912", address="A", national_code="1234567890"),
-        receiver=ReceiverModel(name="R", phone="0912", address="B"),
+        sender=SenderModel(name="S", phone="09121234567", address="A", national_code="0012345679"),
+        receiver=ReceiverModel(name="R", phone="09127654321", address="B"),
         origin=LocationModel(province="P1", city="C1", address="O", coordinates=GeoCoordinateModel(lat=1.0, lng=1.0)),
         destination=LocationModel(
             province="P2",
@@ -33,7 +33,7 @@ def _request() -> WaybillMapRequest:
             coordinates=GeoCoordinateModel(lat=2.0, lng=2.0),
         ),
         cargo=CargoModel(type="General", weight=1000, count=1, description="x"),
-        vehicle=VehicleModel(driver_national_code="123", driver_phone="0912", plate="12A34567", type="Truck"),
+        vehicle=VehicleModel(driver_national_code="0012345679", driver_phone="09120000000", plate="12A34567", type="Truck"),
         financial=FinancialModel(cost=1000, payment_method="Cash"),
     )
 
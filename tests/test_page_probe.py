@@ -0,0 +1,68 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.automation.page_probe import first_match, probe_selectors
+
+
+@pytest.mark.asyncio
+async def test_probe_checks_all_groups_in_one_evaluate():
+    page = MagicMock()
+    page.evaluate = AsyncMock(
+        return_value={
+            "matched": {"username": "input[name='UserName']", "password": None},
+            "unsupported": ["input >> nth=0"],
+        }
+    )
+    page.query_selector = AsyncMock(return_value=object())
+
+    result = await probe_selectors(
+        page,
+        {
+            "username": ["#user", "input[name='UserName']"],
+            "password": ["input >> nth=0", "#pass"],
+        },
+    )
+
+    assert result == {"username": "input[name='UserName']", "password": "input >> nth=0"}
+    page.evaluate.assert_awaited_once()
+    assert page.evaluate.await_args.args[1]["groups"]["username"] == ["#user", "input[name='UserName']"]
+    page.query_selector.assert_awaited_once_with("input >> nth=0")
+
+
+@pytest.mark.asyncio
+async def test_probe_waits_until_every_group_matched():
+    page = MagicMock()
+    page.evaluate = AsyncMock(
+        side_effect=[
+            {"matched": {"match": None}, "unsupported": []},
+            {"matched": {"match": "text=خروج"}, "unsupported": []},
+        ]
+    )
+
+    assert await first_match(page, ["text=خروج"], visible=True, timeout_ms=2000) == "text=خروج"
+    assert page.evaluate.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_probe_falls_back_to_query_selector_without_script_support():
+    page = MagicMock()
+    page.evaluate = AsyncMock(side_effect=RuntimeError("no js"))
+    page.query_selector = AsyncMock(side_effect=[None, object()])
+
+    assert await first_match(page, ["#a", "#b", "#c"]) == "#b"
+    assert page.query_selector.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unsupported_selector_ahead_of_script_match_keeps_priority():
+    page = MagicMock()
+    page.evaluate = AsyncMock(
+        return_value={"matched": {"match": "#later"}, "unsupported": ["input >> nth=0"]}
+    )
+    page.query_selector = AsyncMock(return_value=object())
+
+    assert await first_match(page, ["input >> nth=0", "#later"]) == "input >> nth=0"
+
+    page.query_selector = AsyncMock(return_value=None)
+    assert await first_match(page, ["input >> nth=0", "#later"]) == "#later"
@@ -19,7 +19,8 @@ class TestScriptLoading(unittest.TestCase):
             "extract_route_info_generic",
             "extract_suggestions",
             "get_map_center",
-            "calculate_distance"
+            "calculate_distance",
+            "probe_selectors",
         ]
 
         for script in scripts:
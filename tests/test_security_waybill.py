@@ -46,7 +46,7 @@ async def test_create_waybill_leaks_sensitive_info():
             "name": "Test Sender",
             "phone": "09123456789",
             "address": "Tehran",
-            "national_code": "1234567890"
+            "national_code": "0012345679"
         },
         "receiver": {
             "name": "Test Receiver",
@@ -72,7 +72,7 @@ async def test_create_waybill_leaks_sensitive_info():
             "description": "Test"
         },
         "vehicle": {
-            "driver_national_code": "1234567890",
+            "driver_national_code": "0012345679",
             "driver_phone": "09123456789",
             "plate": "12A34567",
             "type": "Truck"
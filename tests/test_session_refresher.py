@@ -0,0 +1,107 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.automation.auth import auth_cookie_expiry
+from app.automation.session_refresher import SessionRefresher, storage_state_expiry
+
+
+def _cookies(expires):
+    return [
+        {"name": "theme", "expires": 10.0},
+        {"name": ".AspNetCore.Identity.Application", "expires": expires},
+        {"name": "ASP.NET_SessionId", "expires": -1},
+    ]
+
+
+def test_auth_cookie_expiry_uses_earliest_persistent_auth_cookie(tmp_path):
+    assert auth_cookie_expiry(_cookies(5000.0)) == 5000.0
+    assert auth_cookie_expiry([{"name": "ASP.NET_SessionId", "expires": -1}]) is None
+
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({"cookies": _cookies(7200.0), "origins": []}))
+    assert storage_state_expiry(str(state)) == 7200.0
+    assert storage_state_expiry(str(tmp_path / "missing.json")) is None
+
+
+@pytest.mark.asyncio
+async def test_run_once_waits_until_lead_window_then_refreshes(tmp_path):
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({"cookies": _cookies(10_000.0)}))
+    now = [5_000.0]
+    refresher = SessionRefresher(clock=lambda: now[0])
+    refresher.refresh = AsyncMock(return_value=True)
+
+    with patch("app.core.config.utcms_config.USE_PERSISTENT_AUTH_STATE", True), patch(
+        "app.core.config.utcms_config.AUTH_STATE_PATH", str(state)
+    ), patch("app.core.config.utcms_config.SESSION_REFRESH_LEAD_SECONDS", 600), patch(
+        "app.core.config.utcms_config.SESSION_REFRESH_CHECK_SECONDS", 60
+    ):
+        assert await refresher.run_once() == 60
+        refresher.refresh.assert_not_awaited()
+
+        now[0] = 9_350.0
+        assert await refresher.run_once() == 50
+        refresher.refresh.assert_not_awaited()
+
+        now[0] = 9_400.0
+        await refresher.run_once()
+        refresher.refresh.assert_awaited_once()
+        assert refresher.session_expires_at == 10_000.0
+
+
+@pytest.mark.asyncio
+async def test_refresh_logs_in_on_spare_context_and_hands_it_to_pool():
+    context = AsyncMock()
+    context.cookies.return_value = _cookies(90_000.0)
+    manager = MagicMock()
+    manager.create_context = AsyncMock(return_value=("spare", context))
+    manager.new_page = AsyncMock(return_value=AsyncMock())
+    manager.save_auth_state = AsyncMock()
+    manager.adopt_context = AsyncMock(return_value=True)
+    manager.close_context = AsyncMock()
+    authenticator = MagicMock()
+    authenticator.return_value.login = AsyncMock(return_value=True)
+    refresher = SessionRefresher(clock=lambda: 80_000.0)
+    controller = MagicMock()
+    controller.slot.return_value.__aenter__ = AsyncMock(return_value=None)
+    controller.slot.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("app.automation.session_refresher.browser_manager", manager), patch(
+        "app.automation.session_refresher.UTCMSAuthenticator", authenticator
+    ), patch("app.automation.session_refresher.waybill_traffic_controller", controller):
+        assert await refresher.refresh() is True
+
+    # The refresh login is paced through the same traffic slots as waybill requests.
+    controller.slot.assert_called_once_with(mode="safe")
+    controller.slot.return_value.__aenter__.assert_awaited_once()
+
+    context.clear_cookies.assert_awaited_once()
+    manager.save_auth_state.assert_awaited_once_with(context)
+    manager.adopt_context.assert_awaited_once_with("spare", context)
+    manager.close_context.assert_not_awaited()
+    assert refresher.stats()["refreshes"] == 1
+    assert refresher.session_expires_at == 90_000.0
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_closes_spare_context():
+    manager = MagicMock()
+    manager.create_context = AsyncMock(return_value=("spare", AsyncMock()))
+    manager.new_page = AsyncMock(return_value=AsyncMock())
+    manager.close_context = AsyncMock()
+    manager.adopt_context = AsyncMock()
+    authenticator = MagicMock()
+    authenticator.return_value.login = AsyncMock(return_value=False)
+    authenticator.return_value.last_error = "captcha"
+    refresher = SessionRefresher()
+
+    with patch("app.automation.session_refresher.browser_manager", manager), patch(
+        "app.automation.session_refresher.UTCMSAuthenticator", authenticator
+    ):
+        assert await refresher.refresh() is False
+
+    manager.adopt_context.assert_not_awaited()
+    manager.close_context.assert_awaited_once_with("spare")
+    assert refresher.failures == 1
@@ -81,7 +81,7 @@ def test_create_waybill_valid_payload(mock_close, mock_init):
                         "name": "Sender Name",
                         "phone": "09123456789",
                         "address": "Sender Address",
-                        "national_code": "1234567890"
+                        "national_code": "0012345679"
                     },
                     "receiver": {
                         "name": "Receiver Name",
@@ -107,7 +107,7 @@ def test_create_waybill_valid_payload(mock_close, mock_init):
                         "description": "Test Cargo"
                     },
                     "vehicle": {
-                        "driver_national_code": "0000000000",
+                        "driver_national_code": "0012345679",
                         "driver_phone": "09120000000",
                         "plate": "12A34567",
                         "type": "Truck"
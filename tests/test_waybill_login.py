@@ -16,12 +16,12 @@ from app.api.routes.waybill_map import (
 def create_mock_request():
     return WaybillMapRequest(
         session_id="test_session",
-        sender=SenderModel(name="Sender", phone="09121234567", address="Addr", national_code="1234567890"),
+        sender=SenderModel(name="Sender", phone="09121234567", address="Addr", national_code="0012345679"),
         receiver=ReceiverModel(name="Receiver", phone="09121234567", address="Addr"),
         origin=LocationModel(province="Test", city="City", address="Addr", coordinates=GeoCoordinateModel(lat=1.0, lng=1.0)),
         destination=LocationModel(province="Test", city="City", address="Addr", coordinates=GeoCoordinateModel(lat=2.0, lng=2.0)),
         cargo=CargoModel(type="Type", weight=1000, count=1, description="Desc"),
-        vehicle=VehicleModel(driver_national_code="1234567890", driver_phone="09121234567", plate="12A34567", type="Truck"),
+        vehicle=VehicleModel(driver_national_code="0012345679", driver_phone="09121234567", plate="12A34567", type="Truck"),
         financial=FinancialModel(cost=1000000, payment_method="Cash")
     )
 
@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
@@ -21,14 +21,14 @@ def create_request(operation_mode: OperationMode = OperationMode.SAFE) -> Waybil
     return WaybillMapRequest(
         session_id="svc-test",
         operation_mode=operation_mode,
-        sender=SenderModel(name="Sender", phone="0912", address="Addr", national_code="1234567890"),
-        receiver=ReceiverModel(name="Receiver", phone="0912", address="Addr"),
+        sender=SenderModel(name="Sender", phone="09121234567", address="Addr", national_code="0012345679"),
+        receiver=ReceiverModel(name="Receiver", phone="09127654321", address="Addr"),
         origin=LocationModel(province="A", city="B", address="C", coordinates=GeoCoordinateModel(lat=1.0, lng=1.0)),
         destination=LocationModel(
             province="D", city="E", address="F", coordinates=GeoCoordinateModel(lat=2.0, lng=2.0)
         ),
         cargo=CargoModel(type="General", weight=1000, count=1, description="test"),
-        vehicle=VehicleModel(driver_national_code="123", driver_phone="0912", plate="12A34567", type="Truck"),
+        vehicle=VehicleModel(driver_national_code="0012345679", driver_phone="09120000000", plate="12A34567", type="Truck"),
         financial=FinancialModel(cost=1000, payment_method="Cash"),
     )
 
@@ -74,3 +74,59 @@ async def test_service_blocks_full_mode_without_env_flag():
             await service.create_waybill_with_map(request)
 
     assert exc.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_service_pooled_context_logs_in_once():
+    from app.automation.browser import BrowserManager
+
+    service = WaybillService()
+    pooled_manager = BrowserManager()
+    context = AsyncMock()
+    context.new_page.side_effect = lambda: AsyncMock()
+    create_context = AsyncMock(return_value=("sid", context))
+
+    with patch("app.services.waybill_service.browser_manager", pooled_manager), patch.object(
+        pooled_manager, "initialize", AsyncMock()
+    ), patch.object(pooled_manager, "create_context", create_context), patch.object(
+        pooled_manager, "save_auth_state", AsyncMock()
+    ), patch("app.automation.auth.UTCMSAuthenticator") as auth_cls, patch(
+        "app.automation.waybill_enhanced.EnhancedWaybillManager"
+    ) as manager_cls, patch("app.automation.reporting.report_service.record_request", AsyncMock()), patch(
+        "app.automation.reporting.report_service.record_success", AsyncMock()
+    ), patch("app.core.config.utcms_config.BROWSER_CONTEXT_POOLING", True), patch(
+        "app.core.config.utcms_config.BROWSER_CONTEXT_TAB_LIMIT", 2
+    ):
+        auth_cls.return_value._is_logged_in = AsyncMock(return_value=True)
+        manager_cls.return_value.create_waybill_with_map = AsyncMock(return_value={"success": True})
+
+        await service.create_waybill_with_map(create_request())
+        await service.create_waybill_with_map(create_request())
+
+    auth_cls.return_value._is_logged_in.assert_awaited_once()
+    create_context.assert_awaited_once()
+    assert manager_cls.return_value.create_waybill_with_map.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_only_skips_traffic_slot_and_browser():
+    from app.automation.reporting import ReportService
+
+    service = WaybillService()
+    controller = MagicMock()
+    browser = MagicMock()
+    reports = ReportService()
+
+    with patch("app.services.waybill_service.waybill_traffic_controller", controller), patch(
+        "app.services.waybill_service.browser_manager", browser
+    ), patch("app.services.waybill_service.report_service", reports):
+        response = await service.create_waybill_with_map(create_request(OperationMode.VALIDATE_ONLY))
+
+    assert response["mode"] == "validate_only" and response["status"] == "validated"
+    summary = response["validation_summary"]
+    assert summary["ready_for_submit"] is True
+    assert summary["checks"]["catalog"] == {"origin": "unverified", "destination": "unverified"}
+    assert summary["checks"]["form_route"] == "unknown"
+    controller.slot.assert_not_called()
+    assert browser.mock_calls == []
+    assert reports.get_mode_counters()["validate_only"] == {"requests": 1, "success": 1, "failure": 0}
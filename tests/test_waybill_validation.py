@@ -0,0 +1,130 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.automation.option_catalog import OptionCatalog
+from app.schemas.waybill import WaybillMapRequest
+from app.services.waybill_service import WaybillService
+from app.services.waybill_validation import (
+    is_valid_national_code,
+    is_valid_plate,
+    normalize_mobile,
+    normalize_phone,
+    parse_number,
+    preflight_waybill_request,
+    validate_waybill_request,
+)
+
+
+def _request(**overrides) -> WaybillMapRequest:
+    payload = {
+        "sender": {"name": "علی", "phone": "09121234567", "address": "a", "national_code": "0012345679"},
+        "receiver": {"name": "رضا", "phone": "۰۹۱۲۷۶۵۴۳۲۱", "address": "b"},
+        "origin": {"province": "تهران", "city": "تهران", "address": "a"},
+        "destination": {"province": "خراسان رضوی", "city": "مشهد", "address": "b"},
+        "cargo": {"weight": "۱٬۲۰۰", "count": 2},
+        "vehicle": {"plate": "۱۲ ب ۳۴۵ - ۶۷"},
+        "financial": {"cost": 5000000},
+    }
+    for section, values in overrides.items():
+        payload[section] = {**payload[section], **values}
+    return WaybillMapRequest.model_validate(payload)
+
+
+def test_field_validators():
+    assert is_valid_national_code("0012345679") and is_valid_national_code("۰۰۱۲۳۴۵۶۷۹")
+    assert not is_valid_national_code("1234567890")
+    assert not is_valid_national_code("1111111111")
+    assert normalize_mobile("+98 912 123 4567") == "09121234567"
+    assert normalize_mobile("0912") is None
+    assert normalize_mobile("02188888888") is None
+    assert normalize_phone("021-8888 8888") == "02188888888"
+    assert normalize_phone("+98 912 123 4567") == "09121234567"
+    assert normalize_phone("0218888") is None
+    assert is_valid_plate("12A34567") and is_valid_plate("12الف345ایران67")
+    assert not is_valid_plate("12345")
+    assert parse_number("۱٬۲۰۰") == 1200.0 and parse_number("abc") is None
+
+
+def test_valid_request_has_no_issues():
+    assert validate_waybill_request(_request(), catalog=OptionCatalog()) == []
+    # The README example uses a Tehran landline for the receiver.
+    assert validate_waybill_request(_request(receiver={"phone": "02188888888"}), catalog=OptionCatalog()) == []
+    issues = validate_waybill_request(_request(vehicle={"driver_phone": "02188888888"}), catalog=OptionCatalog())
+    assert [issue.loc for issue in issues] == [("vehicle", "driver_phone")]
+
+
+def test_collects_every_issue_with_field_locations():
+    request = _request(
+        sender={"national_code": "1234567890", "phone": "12"},
+        cargo={"weight": "0", "count": "1.5"},
+        vehicle={"plate": "xyz"},
+        financial={"cost": "-5"},
+    )
+
+    locs = {issue.loc for issue in validate_waybill_request(request, catalog=OptionCatalog())}
+
+    assert locs == {
+        ("sender", "national_code"),
+        ("sender", "phone"),
+        ("cargo", "weight"),
+        ("cargo", "count"),
+        ("vehicle", "plate"),
+        ("financial", "cost"),
+    }
+
+
+def test_location_checked_only_against_known_catalog_lists():
+    catalog = OptionCatalog()
+    catalog.record("province", (), [["تهران", "1"], ["خراسان رضوی", "11"]])
+    catalog.record("city", ("11",), [["مشهد", "110"], ["نیشابور", "111"]])
+
+    assert validate_waybill_request(_request(), catalog=catalog) == []
+
+    issues = validate_waybill_request(
+        _request(origin={"province": "کالیفرنیا"}, destination={"city": "شیراز"}), catalog=catalog
+    )
+    assert [issue.loc for issue in issues] == [("origin", "province"), ("destination", "city")]
+
+
+@pytest.mark.asyncio
+async def test_service_rejects_invalid_request_before_traffic_slot():
+    controller = MagicMock()
+
+    with patch("app.services.waybill_service.waybill_traffic_controller", controller), patch(
+        "app.services.waybill_service.report_service.record_request", AsyncMock()
+    ), patch("app.services.waybill_service.report_service.record_failure", AsyncMock()) as record_failure:
+        with pytest.raises(HTTPException) as exc:
+            await WaybillService().create_waybill_with_map(_request(sender={"national_code": "1234567890"}))
+
+    assert exc.value.status_code == 422
+    assert exc.value.detail[0]["loc"] == ["body", "sender", "national_code"]
+    controller.slot.assert_not_called()
+    record_failure.assert_awaited_once_with(mode="safe", category="form")
+
+
+def test_preflight_reports_issues_and_cache_state():
+    catalog = OptionCatalog()
+    catalog.record("province", (), [["تهران", "1"]])
+    catalog.record("city", ("1",), [["تهران", "10"]])
+    catalog.remember_selector(['select[name="OriginProvince"]'], 'select[name="OriginProvince"]')
+
+    summary = preflight_waybill_request(_request(receiver={"name": " "}), catalog=catalog, account="user")
+
+    assert summary["ready_for_submit"] is False
+    assert [error["loc"] for error in summary["issues"]] == [
+        ["body", "receiver", "name"],
+        ["body", "destination", "province"],
+    ]
+    assert summary["checks"]["catalog"] == {"origin": "verified", "destination": "invalid"}
+    assert summary["checks"]["cached_selectors"]["origin"]["province"] is True
+    assert summary["checks"]["cached_selectors"]["destination"]["province"] is False
+
+
+def test_blank_text_fields_are_reported_only_by_preflight():
+    request = _request(receiver={"name": " "})
+
+    assert validate_waybill_request(request, catalog=OptionCatalog()) == []
+    summary = preflight_waybill_request(request, catalog=OptionCatalog(), account="user")
+    assert [error["loc"] for error in summary["issues"]] == [["body", "receiver", "name"]]